@@ -0,0 +1,158 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#   "numpy",
+#   "SimpleITK",
+# ]
+# ///
+
+"""
+Benchmarks for resample_to_volume.
+
+Each benchmark runs in a fresh child process so that the reported peak
+resident set size (ru_maxrss) belongs to that benchmark alone.
+
+Usage
+-----
+    python benchmarks/bench_resample_to_volume.py [--inputs N] [--size N] [-j N]
+                                                  [--grid-inputs N]
+"""
+
+import argparse
+import multiprocessing
+import resource
+import sys
+import time
+from pathlib import Path
+
+_SRC = Path(__file__).resolve().parent.parent / "src"
+if _SRC.exists():
+    sys.path.insert(0, str(_SRC))
+
+import SimpleITK as sitk  # pylint: disable=wrong-import-position
+
+from sitk_tools import resample_to_volume as rtv  # pylint: disable=wrong-import-position
+
+
+def _make_slices(n: int, size: int) -> list[sitk.Image]:
+    """Return *n* single-slice images stacked along Z, one per output plane."""
+    slices = []
+    for k in range(n):
+        img = sitk.Image([size, size, 1], sitk.sitkInt16) + k
+        img.SetOrigin((0.0, 0.0, float(k)))
+        slices.append(img)
+    return slices
+
+
+def _stack_materialised(images, size, spacing, origin, direction, interpolator, pad):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Reference implementation: resample every input before combining."""
+    resampled = [
+        rtv.resample_to_reference(img, size, spacing, origin, direction, interpolator, pad)
+        for img in images
+    ]
+    combined = resampled[0]
+    for r in resampled[1:]:
+        combined = sitk.Maximum(combined, r)
+    return combined
+
+
+def _peak_rss_mb() -> float:
+    """Return the peak resident set size of this process in MiB."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    return rss / (1024.0 * 1024.0) if sys.platform == "darwin" else rss / 1024.0
+
+
+def _run_stack(mode: str, n: int, size: int, jobs: int, queue) -> None:  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Child-process body: stack *n* slices with *mode* and report timing/RSS."""
+    images = _make_slices(n, size)
+    grid = rtv.compute_reference_grid(images, [1.0, 1.0, 1.0])
+    baseline = _peak_rss_mb()
+    start = time.perf_counter()
+    if mode == "materialised":
+        _stack_materialised(images, *grid, sitk.sitkLinear, 0.0)
+    else:
+        rtv.stack_images(images, *grid, sitk.sitkLinear, 0.0, jobs=jobs)
+    elapsed = time.perf_counter() - start
+    queue.put((elapsed, baseline, _peak_rss_mb()))
+
+
+def bench_stack_memory(n: int, size: int, jobs: int) -> None:
+    """Compare peak memory of streaming vs. materialised combining."""
+    out_mb = size * size * n * 4 / (1024.0 * 1024.0)
+    print(f"stack_images: {n} slices of {size}x{size} -> {out_mb:.1f} MiB float32 output")
+    ctx = multiprocessing.get_context("spawn")
+    modes = [("materialised", 1), ("streaming", 1)]
+    if jobs > 1:
+        modes.append((f"streaming -j{jobs}", jobs))
+    for mode, mode_jobs in modes:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_stack, args=(mode, n, size, mode_jobs, queue))
+        proc.start()
+        elapsed, baseline, peak = queue.get()
+        proc.join()
+        growth = peak - baseline
+        print(
+            f"  {mode:>16}: {elapsed:7.2f} s, peak RSS growth {growth:8.1f} MiB "
+            f"({growth / out_mb:5.2f} x output)"
+        )
+
+
+def bench_reference_grid(n: int, repeats: int = 5) -> None:
+    """Time compute_reference_grid for *n* single-slice DICOM-like headers."""
+    headers = [
+        rtv.ImageHeader(
+            path=f"slice{k:05d}.dcm",
+            size=(512, 512, 1),
+            spacing=(0.7, 0.7, 1.0),
+            origin=(-180.0, -180.0, 0.5 * k),
+            direction=(1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0),
+            pixel_id=sitk.sitkInt16,
+            dicom=True,
+        )
+        for k in range(n)
+    ]
+    sizes, spacings, origins, directions = rtv._geometry_arrays(headers)  # pylint: disable=protected-access
+    rotation = directions[0]
+
+    timings = {}
+    for label, func in (
+        ("gather geometry", lambda: rtv._geometry_arrays(headers)),  # pylint: disable=protected-access
+        ("bounding box", lambda: rtv._bounding_box(  # pylint: disable=protected-access
+            sizes, spacings, origins, directions, rotation)),
+        ("compute_reference_grid", lambda: rtv.compute_reference_grid(headers, None)),
+    ):
+        best = float("inf")
+        for _ in range(repeats):
+            start = time.perf_counter()
+            func()
+            best = min(best, time.perf_counter() - start)
+        timings[label] = best
+
+    print(f"reference grid: {n} headers (best of {repeats})")
+    for label, best in timings.items():
+        print(f"  {label:>22}: {best * 1e3:8.3f} ms")
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Parse arguments and run the benchmarks."""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--inputs", type=int, default=64,
+                        help="Number of single-slice inputs (default: 64).")
+    parser.add_argument("--size", type=int, default=256,
+                        help="In-plane size of each slice in voxels (default: 256).")
+    parser.add_argument("-j", "--jobs", type=int, default=4,
+                        help="Thread count for the parallel streaming run (default: 4).")
+    parser.add_argument("--grid-inputs", type=int, default=10000,
+                        help="Number of headers for the reference-grid benchmark "
+                             "(default: 10000).")
+    args = parser.parse_args(argv)
+    bench_reference_grid(args.grid_inputs)
+    bench_stack_memory(args.inputs, args.size, args.jobs)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# /// script
+# requires-python = ">=3.10"
+# dependencies = [
+#   "numpy",
+#   "vtk",
+# ]
+# ///
+
+"""
+Benchmarks for split_vtk_volume piece writing.
+
+Compares the direct NumPy-to-VTI writer against the vtkExtractVOI +
+vtkXMLImageDataWriter pipeline.  Each writer runs in a fresh child process
+so that the reported peak resident set size (ru_maxrss) belongs to that
+run alone; growth is measured from after the source volume is built.
+
+Usage
+-----
+    python benchmarks/bench_split_vtk_volume.py [--size N] [--pieces N]
+                                                [--compressor NAME]
+"""
+
+import argparse
+import multiprocessing
+from pathlib import Path
+import resource
+import sys
+import tempfile
+import time
+
+import numpy as np
+
+_SRC = Path(__file__).resolve().parent.parent / "src"
+if _SRC.exists():
+    sys.path.insert(0, str(_SRC))
+
+import vtk  # pylint: disable=wrong-import-position
+from vtk.util.numpy_support import numpy_to_vtk  # pylint: disable=wrong-import-position
+
+from sitk_tools import split_vtk_volume as svv  # pylint: disable=wrong-import-position
+
+
+def _make_volume(size: int):
+    """Return a ``size``³ int16 vtkImageData with a smooth ramp plus noise."""
+    # Fill plane by plane so building the volume does not inflate peak RSS.
+    rng = np.random.default_rng(0)
+    y, x = np.ogrid[:size, :size]
+    values = np.empty((size, size, size), dtype=np.int16)
+    for k in range(size):
+        values[k] = (x + 2 * y + 3 * k) % 2000
+        values[k] += rng.integers(0, 16, size=(size, size), dtype=np.int16)
+    image = vtk.vtkImageData()
+    image.SetExtent(0, size - 1, 0, size - 1, 0, size - 1)
+    array = numpy_to_vtk(values.ravel(), deep=False)
+    array.SetName("density")
+    image.GetPointData().SetScalars(array)
+    # Keep the NumPy buffer alive as long as the image.
+    image.numpy_values = values
+    return image
+
+
+def _peak_rss_mb() -> float:
+    """Return the peak resident set size of this process in MiB."""
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS reports bytes.
+    return rss / (1024.0 * 1024.0) if sys.platform == "darwin" else rss / 1024.0
+
+
+def _run_writer(writer: str, size: int, pieces: int, compressor: str, queue) -> None:  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    """Child-process body: split the volume with *writer* and report results."""
+    image = _make_volume(size)
+    options = svv.SplitOptions(pieces, pieces, pieces, writer=writer, compressor=compressor)
+    extents = svv._build_piece_extents(svv._extract_geometry(image), options)  # pylint: disable=protected-access
+    baseline = _peak_rss_mb()
+    with tempfile.TemporaryDirectory() as tmp:
+        out = Path(tmp)
+        start = time.perf_counter()
+        svv._write_piece_grid(image, out / "out.pvti", "out", extents, options)  # pylint: disable=protected-access
+        elapsed = time.perf_counter() - start
+        written = sum(p.stat().st_size for p in out.glob("*.vti"))
+    queue.put((elapsed, len(extents), written, baseline, _peak_rss_mb()))
+
+
+def bench_writers(size: int, pieces: int, compressor: str) -> None:
+    """Compare pieces/s and peak memory of the two piece writers."""
+    in_mb = size ** 3 * 2 / (1024.0 * 1024.0)
+    print(
+        f"split_vtk_volume: {size}^3 int16 ({in_mb:.0f} MiB) into {pieces}^3 pieces, "
+        f"compressor={compressor}"
+    )
+    ctx = multiprocessing.get_context("spawn")
+    for writer in svv.PIECE_WRITERS:
+        queue = ctx.Queue()
+        proc = ctx.Process(target=_run_writer, args=(writer, size, pieces, compressor, queue))
+        proc.start()
+        elapsed, count, written, baseline, peak = queue.get()
+        proc.join()
+        print(
+            f"  {writer:>6}: {elapsed:7.2f} s, {count / elapsed:7.1f} pieces/s, "
+            f"{in_mb / elapsed:7.1f} MiB/s in, {written / 1048576.0:8.1f} MiB out, "
+            f"peak RSS growth {peak - baseline:8.1f} MiB"
+        )
+
+
+def main(argv: list[str] | None = None) -> int:
+    """Parse arguments and run the benchmark."""
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--size", type=int, default=1024,
+                        help="Edge length of the cubic test volume (default: 1024).")
+    parser.add_argument("--pieces", type=int, default=4,
+                        help="Pieces per axis (default: 4).")
+    parser.add_argument("--compressor", choices=list(svv.COMPRESSORS), default="zlib",
+                        help="Piece compressor (default: zlib).")
+    args = parser.parse_args(argv)
+    bench_writers(args.size, args.pieces, args.compressor)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -26,6 +26,7 @@ def main() -> int:
         print("hdr2mhd")
         print("histo")
         print("lmreg")
+        print("merge_pvti")
         print("merge_slices")
         print("mkdicom")
         print("nifti2vti")
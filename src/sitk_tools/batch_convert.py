@@ -0,0 +1,280 @@
+"""Batch driver shared by the file-conversion tools.
+
+Inputs may be files, directories (searched recursively for the tool's
+input suffixes) or glob patterns.  Files are converted concurrently in a
+process pool.  Each output directory keeps a ``.sitk_batch.json`` record
+of the size and modification time of the inputs every output was made
+from, so a rerun skips outputs whose inputs and settings are unchanged.
+:func:`image_files` lists the files an image is read from, including the
+separate data files of detached headers.
+"""
+
+from __future__ import annotations
+
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+import glob
+import json
+import os
+from pathlib import Path
+import shutil
+import tempfile
+import time
+
+STATE_NAME = ".sitk_batch.json"
+
+_GLOB_CHARS = set("*?[")
+
+
+@dataclass(frozen=True)
+class BatchJob:
+    """One input file and the output it converts to."""
+
+    source: Path
+    output: Path
+
+
+@dataclass
+class BatchResult:
+    """Counts and byte totals of a batch run."""
+
+    converted: int = 0
+    skipped: int = 0
+    failed: list[tuple[Path, str]] = field(default_factory=list)
+    bytes_in: int = 0
+    bytes_out: int = 0
+    seconds: float = 0.0
+
+
+def plan_jobs(
+    patterns: list[str],
+    suffixes: tuple[str, ...],
+    output_name,
+    output_dir: str | Path | None = None,
+) -> list[BatchJob]:
+    """Expand *patterns* into conversion jobs.
+
+    A directory contributes every file below it whose name ends with one
+    of *suffixes* (case-insensitive).  A glob pattern contributes every
+    file it matches, and a file is taken as is.  *output_name* maps an
+    input path to its output file name.  Outputs go next to their inputs
+    or, with *output_dir*, into it.  Files found under a directory keep
+    their relative subdirectory there.  Inputs listed twice are converted
+    once; two inputs mapping to the same output raise ValueError.
+    """
+    jobs = []
+    seen = set()
+    outputs: dict[Path, Path] = {}
+    for pattern in patterns:
+        path = Path(pattern)
+        if path.is_dir():
+            matches = [
+                (p, p.parent.relative_to(path))
+                for p in sorted(path.rglob("*"))
+                if p.is_file() and p.name.lower().endswith(suffixes)
+            ]
+        elif _GLOB_CHARS & set(pattern):
+            matches = [
+                (Path(p), Path()) for p in sorted(glob.glob(pattern, recursive=True))
+                if Path(p).is_file()
+            ]
+        elif path.is_file():
+            matches = [(path, Path())]
+        else:
+            raise FileNotFoundError(f"No such file or directory: {pattern}")
+        for source, relative in matches:
+            if source.resolve() in seen:
+                continue
+            seen.add(source.resolve())
+            directory = Path(output_dir) / relative if output_dir else source.parent
+            output = directory / output_name(source)
+            if output.resolve() in outputs:
+                raise ValueError(
+                    f"{source} and {outputs[output.resolve()]} would both be written to {output}"
+                )
+            outputs[output.resolve()] = source
+            jobs.append(BatchJob(source, output))
+    return jobs
+
+
+def detached_data_files(header: Path) -> list[Path]:
+    """Return the data files named by a .mhd or .nhdr header.
+
+    Reads ``ElementDataFile`` (MetaImage) or ``data file`` (NRRD) in its
+    single-file, ``LIST`` and printf-pattern forms.  ``LOCAL`` data and
+    attached headers name none.  Only files that exist are returned;
+    missing ones make reading the image itself fail.
+    """
+    separator, keys = ("=", ("elementdatafile",)) if header.suffix.lower() == ".mhd" \
+        else (":", ("data file", "datafile"))
+    with open(header, encoding="latin-1") as f:
+        lines = f.read().splitlines()
+    names: list[str] = []
+    for number, line in enumerate(lines):
+        key, found, value = line.partition(separator)
+        if not found or key.strip().lower() not in keys:
+            continue
+        fields = value.split()
+        if not fields or fields[0] == "LOCAL":
+            break
+        if fields[0] == "LIST":
+            names = [name.strip() for name in lines[number + 1:] if name.strip()]
+        elif len(fields) >= 4:
+            first, last, step = (int(field) for field in fields[1:4])
+            names = [fields[0] % index for index in range(first, last + 1, step)]
+        else:
+            names = [value.strip()]
+        break
+    return [p for p in (header.parent / name for name in names) if p.is_file()]
+
+
+def image_files(path: Path) -> list[Path]:
+    """Return *path* and the data files of its image, if they are separate.
+
+    That is the data file(s) of a detached .mhd or .nhdr header and the
+    .img of an Analyze .hdr.
+    """
+    suffix = path.suffix.lower()
+    if suffix in (".mhd", ".nhdr"):
+        return [path] + detached_data_files(path)
+    if suffix == ".hdr":
+        return [path] + [p for p in (path.with_suffix(".img"), path.with_suffix(".img.gz"))
+                         if p.is_file()]
+    return [path]
+
+
+def _signature(files: list[Path]) -> list[list[int]]:
+    """Return ``[size, mtime_ns]`` for each of *files*."""
+    return [[stat.st_size, stat.st_mtime_ns] for stat in (f.stat() for f in files)]
+
+
+def _load_state(directory: Path) -> dict:
+    try:
+        with open(directory / STATE_NAME, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def _save_state(directory: Path, state: dict) -> None:
+    """Write *state* atomically, so an interrupted run keeps the old record."""
+    partial = directory / f"{STATE_NAME}.part"
+    with open(partial, "w", encoding="utf-8") as f:
+        json.dump(state, f, indent=1, sort_keys=True)
+    os.replace(partial, directory / STATE_NAME)
+
+
+def _convert_one(convert, source: Path, output: Path) -> tuple[float, int, str | None]:
+    """Worker entrypoint: convert one file atomically and time it.
+
+    The output is written under its own name into a private temporary
+    directory next to it, so formats that write a header and a separate
+    data file (.mhd, .nhdr, .hdr) name the data file correctly.  Every
+    file produced is then renamed into place, the named output last.
+    Returns ``(seconds, output bytes, error message or None)``.
+    """
+    start = time.perf_counter()
+    try:
+        output.parent.mkdir(parents=True, exist_ok=True)
+        scratch = Path(tempfile.mkdtemp(prefix=".part-", dir=output.parent))
+    except OSError as exc:
+        return time.perf_counter() - start, 0, str(exc)
+    try:
+        convert(str(source), str(scratch / output.name))
+        produced = sorted(scratch.iterdir(), key=lambda p: p.name == output.name)
+        if not produced or produced[-1].name != output.name:
+            raise RuntimeError(f"Nothing was written to {output.name}")
+        size = sum(p.stat().st_size for p in produced)
+        for path in produced:
+            os.replace(path, output.parent / path.name)
+    except (OSError, RuntimeError, ValueError) as exc:
+        return time.perf_counter() - start, 0, str(exc)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    return time.perf_counter() - start, size, None
+
+
+def run_batch(  # pylint: disable=too-many-arguments,too-many-locals
+    jobs: list[BatchJob],
+    convert,
+    *,
+    settings: dict | None = None,
+    workers: int = 1,
+    force: bool = False,
+    inputs_of=None,
+) -> BatchResult:
+    """Convert every job with ``convert(source, output)`` and print a summary.
+
+    *convert* must be picklable (a module-level function or a
+    ``functools.partial`` of one) when *workers* > 1.  A job is skipped
+    when its output exists and the record in the output directory shows
+    the same input sizes, modification times and *settings*, unless
+    *force*.  *inputs_of* maps a source to every file it is read from
+    (default: just the source); all of them are checked.  A file that
+    fails to convert is reported and does not stop the batch.
+    """
+    inputs_of = inputs_of or (lambda source: [source])
+    settings = settings or {}
+    states: dict[Path, dict] = {}
+    pending = []
+    result = BatchResult()
+    for job in jobs:
+        state = states.setdefault(job.output.parent, _load_state(job.output.parent))
+        try:
+            inputs = _signature(inputs_of(job.source))
+        except (OSError, ValueError) as exc:
+            print(f"Failed to convert {job.source}: {exc}")
+            result.failed.append((job.source, str(exc)))
+            continue
+        record = {"source": str(job.source.resolve()), "inputs": inputs, "settings": settings}
+        if not force and job.output.exists() and state.get(job.output.name) == record:
+            result.skipped += 1
+            continue
+        pending.append((job, record))
+
+    start = time.perf_counter()
+
+    def finish(job: BatchJob, record: dict, outcome) -> None:
+        _, size, error = outcome
+        if error is not None:
+            print(f"Failed to convert {job.source}: {error}")
+            result.failed.append((job.source, error))
+            states[job.output.parent].pop(job.output.name, None)
+            return
+        print(f"Written: {job.output}")
+        result.converted += 1
+        result.bytes_in += sum(size for size, _ in record["inputs"])
+        result.bytes_out += size
+        states[job.output.parent][job.output.name] = record
+
+    try:
+        if workers <= 1 or len(pending) <= 1:
+            for job, record in pending:
+                finish(job, record, _convert_one(convert, job.source, job.output))
+        else:
+            with ProcessPoolExecutor(max_workers=min(workers, len(pending))) as executor:
+                futures = {
+                    executor.submit(_convert_one, convert, job.source, job.output): (job, record)
+                    for job, record in pending
+                }
+                for future in as_completed(futures):
+                    finish(*futures[future], future.result())
+    finally:
+        for directory, state in states.items():
+            if directory.is_dir():
+                _save_state(directory, state)
+    result.seconds = time.perf_counter() - start
+    print_summary(result)
+    return result
+
+
+def print_summary(result: BatchResult) -> None:
+    """Print files and bytes converted per second for a batch run."""
+    seconds = max(result.seconds, 1e-9)
+    mib_in = result.bytes_in / 1048576.0
+    print(
+        f"Converted {result.converted} files ({mib_in:.1f} MiB in, "
+        f"{result.bytes_out / 1048576.0:.1f} MiB out) in {result.seconds:.2f} s: "
+        f"{result.converted / seconds:.1f} files/s, {mib_in / seconds:.1f} MiB/s; "
+        f"skipped {result.skipped} unchanged, {len(result.failed)} failed"
+    )
@@ -0,0 +1,535 @@
+#! /usr/bin/env python
+# /// script
+# dependencies = [
+#   "numpy",
+#   "SimpleITK",
+#   "vtk",
+# ]
+# ///
+
+"""Merge the pieces of a .pvti file into a single image of any SimpleITK format."""
+
+from __future__ import annotations
+
+import argparse
+import base64
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import lzma
+import os
+from pathlib import Path
+import re
+import time
+import xml.etree.ElementTree as ET
+import zlib
+
+import numpy as np
+import SimpleITK as sitk
+
+# XML type name -> NumPy type, without byte order.
+_XML_TYPES = {
+    "Int8": "i1",
+    "UInt8": "u1",
+    "Int16": "i2",
+    "UInt16": "u2",
+    "Int32": "i4",
+    "UInt32": "u4",
+    "Int64": "i8",
+    "UInt64": "u8",
+    "Float32": "f4",
+    "Float64": "f8",
+}
+
+# Name of the array VTK uses to mark ghost points and cells.
+_GHOST_ARRAY = "vtkGhostType"
+
+_APPENDED_DATA = re.compile(rb"<AppendedData[^>]*>")
+_IMAGE_DATA = re.compile(rb"<ImageData\b[^>]*>")
+
+# Bytes read at a time while looking for the <ImageData> tag of a piece.
+_PREFIX_CHUNK = 1 << 16
+
+
+@dataclass(frozen=True)
+class PvtiArray:
+    """A point-data array declared in a .pvti header."""
+
+    name: str
+    type: str
+    components: int = 1
+
+
+@dataclass(frozen=True)
+class PvtiPiece:
+    """One .vti piece of a .pvti file and the extent it covers."""
+
+    extent: list[int]
+    source: Path
+
+
+@dataclass(frozen=True)
+class PvtiHeader:  # pylint: disable=too-many-instance-attributes
+    """Geometry, arrays and pieces described by a .pvti file."""
+
+    whole_extent: list[int]
+    origin: list[float]
+    spacing: list[float]
+    direction: list[float] | None
+    ghost_level: int
+    arrays: list[PvtiArray]
+    scalars: str | None
+    pieces: list[PvtiPiece]
+
+    def array(self, name: str | None = None) -> PvtiArray:
+        """Return the array called *name*, or the active scalars by default."""
+        if not self.arrays:
+            raise ValueError("The .pvti file declares no point-data arrays.")
+        name = name or self.scalars
+        if name is None:
+            return self.arrays[0]
+        for array in self.arrays:
+            if array.name == name:
+                return array
+        names = ", ".join(array.name for array in self.arrays)
+        raise ValueError(f"No point-data array {name!r}; available: {names}.")
+
+    def dimensions(self) -> tuple[int, int, int]:
+        """Return the number of points along x, y and z."""
+        ext = self.whole_extent
+        return tuple(ext[2 * axis + 1] - ext[2 * axis] + 1 for axis in range(3))
+
+
+def _numbers(text: str | None, kind, default):
+    """Parse a whitespace-separated attribute, or return *default* if absent."""
+    if text is None:
+        return default
+    return [kind(value) for value in text.split()]
+
+
+def read_pvti_header(pvti_path: str | Path) -> PvtiHeader:
+    """Parse a .pvti file without reading any of its pieces.
+
+    Piece sources are resolved relative to the .pvti file.  Older headers
+    carry no ``Direction``; it is then taken from the ``<ImageData>`` tag
+    of the first piece, reading only as far as that tag.
+    """
+    pvti_path = Path(pvti_path)
+    root = ET.parse(pvti_path).getroot()
+    image = root.find("PImageData")
+    if root.get("type") != "PImageData" or image is None:
+        raise ValueError(f"Not a PImageData file: {pvti_path}")
+
+    point_data = image.find("PPointData")
+    arrays = []
+    scalars = None
+    if point_data is not None:
+        scalars = point_data.get("Scalars")
+        for element in point_data.findall("PDataArray"):
+            if element.get("Name") == _GHOST_ARRAY:
+                continue
+            arrays.append(PvtiArray(
+                element.get("Name", ""),
+                element.get("type", "Float32"),
+                int(element.get("NumberOfComponents", "1")),
+            ))
+    pieces = [
+        PvtiPiece(_numbers(piece.get("Extent"), int, None), pvti_path.parent / piece.get("Source"))
+        for piece in image.findall("Piece")
+    ]
+    direction = _numbers(image.get("Direction"), float, None)
+    if direction is None and pieces:
+        direction = _piece_direction(pieces[0].source)
+
+    return PvtiHeader(
+        whole_extent=_numbers(image.get("WholeExtent"), int, None),
+        origin=_numbers(image.get("Origin"), float, [0.0, 0.0, 0.0]),
+        spacing=_numbers(image.get("Spacing"), float, [1.0, 1.0, 1.0]),
+        direction=direction,
+        ghost_level=int(image.get("GhostLevel", "0")),
+        arrays=arrays,
+        scalars=scalars,
+        pieces=pieces,
+    )
+
+
+def _piece_direction(source: Path) -> list[float] | None:
+    """Return the ``Direction`` of a .vti piece without reading its data."""
+    prefix = b""
+    with open(source, "rb") as f:
+        while (match := _IMAGE_DATA.search(prefix)) is None:
+            chunk = f.read(_PREFIX_CHUNK)
+            if not chunk:
+                raise ValueError(f"Not an ImageData file: {source}")
+            prefix += chunk
+    direction = re.search(rb'\sDirection="([^"]*)"', match.group(0))
+    return _numbers(direction.group(1).decode(), float, None) if direction else None
+
+
+def _parse_piece(data: bytes):
+    """Return ``(root, payload_start, encoding)`` for the bytes of a .vti file.
+
+    The XML before ``<AppendedData>`` is parsed on its own, so the raw
+    binary section is never handed to the XML parser.  *payload_start* is
+    the offset of the first appended byte, or ``None`` without appended data.
+    """
+    match = _APPENDED_DATA.search(data)
+    if match is None:
+        return ET.fromstring(data), None, None
+    root = ET.fromstring(data[:match.start()] + b"</VTKFile>")
+    encoding = re.search(rb'encoding="(\w+)"', match.group(0))
+    encoding = encoding.group(1).decode() if encoding else "raw"
+    return root, data.index(b"_", match.end()) + 1, encoding
+
+
+def _block_decompressor(vtk_compressor: str | None, block_size: int):
+    """Return a ``bytes -> bytes`` decompressor for a VTK compressor class."""
+    if vtk_compressor is None:
+        return None
+    if vtk_compressor == "vtkZLibDataCompressor":
+        return zlib.decompress
+    if vtk_compressor == "vtkLZMADataCompressor":
+        return lzma.decompress
+    if vtk_compressor == "vtkLZ4DataCompressor":
+        try:
+            import lz4.block  # pylint: disable=import-outside-toplevel
+        except ImportError as exc:
+            raise ValueError(
+                "LZ4-compressed pieces need the 'lz4' package (pip install lz4)."
+            ) from exc
+        return lambda data: lz4.block.decompress(data, uncompressed_size=block_size)
+    raise ValueError(f"Unsupported compressor: {vtk_compressor}")
+
+
+def _decode_binary(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    data, start: int, word: np.dtype, compressor: str | None, out: memoryview, header=None
+) -> None:
+    """Decode one VTK binary data block at *data[start:]* into *out*.
+
+    *word* is the header integer type.  Compressed blocks are inflated one
+    at a time straight into their place in *out*.  *header* optionally
+    holds an already decoded header (inline data encodes it separately).
+    """
+    data = memoryview(data)
+    if compressor is None:
+        nbytes = int(np.frombuffer(data, word, 1, start)[0])
+        start += word.itemsize
+        if nbytes != len(out) or start + nbytes > len(data):
+            raise ValueError("Truncated or mismatched data block.")
+        out[:] = data[start:start + nbytes]
+        return
+    if header is None:
+        count = int(np.frombuffer(data, word, 1, start)[0])
+        header = np.frombuffer(data, word, 3 + count, start)
+        start += header.nbytes
+    count, block_size, last = (int(value) for value in header[:3])
+    expected = block_size * count - (block_size - last if last else 0)
+    if expected != len(out):
+        raise ValueError("Data block size does not match the piece extent.")
+    decompress = _block_decompressor(compressor, block_size)
+    written = 0
+    for size in header[3:3 + count]:
+        size = int(size)
+        block = decompress(data[start:start + size])
+        out[written:written + len(block)] = block
+        written += len(block)
+        start += size
+    if written != len(out):
+        raise ValueError("Truncated compressed data block.")
+
+
+def _decode_inline(text: str, word: np.dtype, compressor: str | None, out: memoryview) -> None:
+    """Decode base64 ``format="binary"`` DataArray text into *out*.
+
+    VTK encodes the header of compressed data separately from the blocks,
+    so its length is worked out from the block count first.
+    """
+    text = "".join(text.split())
+    if compressor is None:
+        _decode_binary(base64.b64decode(text), 0, word, None, out)
+        return
+    count = int(np.frombuffer(base64.b64decode(text[:4 * word.itemsize]), word, 1)[0])
+    header_chars = -(-(3 + count) * word.itemsize // 3) * 4
+    header = np.frombuffer(base64.b64decode(text[:header_chars]), word, 3 + count)
+    _decode_binary(base64.b64decode(text[header_chars:]), 0, word, compressor, out, header)
+
+
+def _read_piece_vtk(source: Path, name: str) -> np.ndarray:
+    """Read array *name* of a piece with vtkXMLImageDataReader.
+
+    Used for the layouts the direct decoder does not handle (ASCII and
+    base64-appended data).
+    """
+    import vtk  # pylint: disable=import-outside-toplevel
+    from vtk.util.numpy_support import vtk_to_numpy  # pylint: disable=import-outside-toplevel
+
+    reader = vtk.vtkXMLImageDataReader()
+    reader.SetFileName(str(source))
+    reader.Update()
+    array = reader.GetOutput().GetPointData().GetArray(name)
+    if array is None:
+        raise ValueError(f"Piece {source} has no point-data array {name!r}.")
+    return vtk_to_numpy(array)
+
+
+def _read_piece(piece: PvtiPiece, name: str, whole: np.ndarray, whole_extent: list[int]) -> int:  # pylint: disable=too-many-locals
+    """Decode array *name* of *piece* straight into its slice of *whole*.
+
+    When the destination slice is contiguous (pieces spanning whole XY
+    planes) the blocks are inflated directly into the output; otherwise
+    they go through one piece-sized scratch buffer.  Returns the number of
+    decoded bytes.
+    """
+    extent = piece.extent
+    index = tuple(
+        slice(extent[2 * axis] - whole_extent[2 * axis],
+              extent[2 * axis + 1] - whole_extent[2 * axis] + 1)
+        for axis in (2, 1, 0)
+    )
+    target = whole[index]
+    if target.shape[:3] != tuple(extent[2 * a + 1] - extent[2 * a] + 1 for a in (2, 1, 0)):
+        raise ValueError(f"Piece {piece.source} extent {extent} is outside the whole extent.")
+
+    data = piece.source.read_bytes()
+    root, payload_start, encoding = _parse_piece(data)
+    element = next(
+        (array for array in root.iterfind("ImageData/Piece/PointData/DataArray")
+         if array.get("Name") == name),
+        None,
+    )
+    if element is None:
+        raise ValueError(f"Piece {piece.source} has no point-data array {name!r}.")
+    data_format = element.get("format")
+    type_code = _XML_TYPES.get(element.get("type"))
+    if type_code is None or data_format == "ascii" or (
+        data_format == "appended" and encoding != "raw"
+    ):
+        target[...] = _read_piece_vtk(piece.source, name).reshape(target.shape)
+        return target.nbytes
+
+    order = ">" if root.get("byte_order") == "BigEndian" else "<"
+    word = np.dtype(order + ("u8" if root.get("header_type") == "UInt64" else "u4"))
+    file_dtype = np.dtype(order + type_code)
+    direct = target.flags.c_contiguous and file_dtype == target.dtype
+    scratch = target if direct else np.empty(target.shape, dtype=file_dtype)
+    out = memoryview(scratch.reshape(-1).view(np.uint8))
+    compressor = root.get("compressor")
+    if data_format == "appended":
+        _decode_binary(data, payload_start + int(element.get("offset", "0")), word,
+                       compressor, out)
+    else:
+        _decode_inline(element.text or "", word, compressor, out)
+    if not direct:
+        target[...] = scratch
+    return target.nbytes
+
+
+def read_pvti_array(
+    header: PvtiHeader, array_name: str | None = None, jobs: int = 1, fill: float = 0
+) -> np.ndarray:
+    """Assemble one point-data array of a .pvti file into a NumPy array.
+
+    The ``(z, y, x[, component])`` output is allocated once for the whole
+    extent and *jobs* threads decode pieces directly into their slices of
+    it; zlib and LZMA release the GIL while inflating.  Points covered by
+    no piece (for example skipped constant pieces) are set to *fill*.
+    Overlapping ghost layers are written by more than one piece, with the
+    same values.
+    """
+    if jobs <= 0:
+        raise ValueError("jobs must be a positive integer.")
+    array = header.array(array_name)
+    type_code = _XML_TYPES.get(array.type)
+    if type_code is None:
+        raise ValueError(f"Unsupported array type: {array.type}")
+    shape = header.dimensions()[::-1] + ((array.components,) if array.components > 1 else ())
+    whole = np.full(shape, fill, np.dtype(type_code)) if fill else np.zeros(shape, type_code)
+
+    if jobs == 1 or len(header.pieces) <= 1:
+        for piece in header.pieces:
+            _read_piece(piece, array.name, whole, header.whole_extent)
+        return whole
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        futures = [
+            executor.submit(_read_piece, piece, array.name, whole, header.whole_extent)
+            for piece in header.pieces
+        ]
+        for future in futures:
+            future.result()
+    return whole
+
+
+def _sitk_origin(header: PvtiHeader, direction: list[float]) -> list[float]:
+    """Return the physical position of the first point of the whole extent."""
+    start = np.array(header.whole_extent[0::2], dtype=float) * header.spacing
+    return list(np.asarray(header.origin) + np.reshape(direction, (3, 3)) @ start)
+
+
+def pvti_to_sitk(
+    pvti_path: str | Path,
+    array_name: str | None = None,
+    jobs: int = 1,
+    fill: float = 0,
+    header: PvtiHeader | None = None,
+) -> sitk.Image:
+    """Read a .pvti file into a SimpleITK image.
+
+    See :func:`read_pvti_array`.  Multi-component arrays become vector
+    images.  The assembled array is copied once into the SimpleITK image,
+    so peak memory is about twice the output size.  A *header* already
+    returned by :func:`read_pvti_header` is used instead of parsing the
+    file again.
+    """
+    header = header or read_pvti_header(pvti_path)
+    array = header.array(array_name)
+    values = read_pvti_array(header, array.name, jobs, fill)
+    image = sitk.GetImageFromArray(values, isVector=array.components > 1)
+    del values
+    direction = header.direction or [1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0]
+    image.SetSpacing(header.spacing)
+    image.SetOrigin(_sitk_origin(header, direction))
+    image.SetDirection(direction)
+    return image
+
+
+def merge_pvti(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    pvti_path: str | Path,
+    output: str | Path,
+    array_name: str | None = None,
+    jobs: int = 1,
+    fill: float = 0,
+    compress: bool = False,
+    header: PvtiHeader | None = None,
+) -> sitk.Image:
+    """Merge the pieces of *pvti_path* and write them to *output*.
+
+    The output format follows the file extension, as for
+    ``SimpleITK.WriteImage``.  *header* is as for :func:`pvti_to_sitk`.
+    """
+    header = header or read_pvti_header(pvti_path)
+    pieces = len(header.pieces)
+    start = time.perf_counter()
+    image = pvti_to_sitk(pvti_path, array_name, jobs, fill, header)
+    read_time = time.perf_counter() - start
+    sitk.WriteImage(image, str(output), compress)
+    elapsed = time.perf_counter() - start
+    size_mb = _image_bytes(image) / (1024.0 * 1024.0)
+    print(
+        f"Merged {pieces} pieces ({size_mb:.1f} MiB) "
+        f"in {read_time:.2f} s ({size_mb / max(read_time, 1e-9):.1f} MiB/s), "
+        f"wrote {output} in {elapsed - read_time:.2f} s"
+    )
+    return image
+
+
+def _check_fill(array: PvtiArray, fill: float) -> None:
+    """Raise ValueError if *fill* cannot be stored exactly in *array*."""
+    dtype = np.dtype(_XML_TYPES.get(array.type, "f8"))
+    if dtype.kind in "iu":
+        info = np.iinfo(dtype)
+        if not float(fill).is_integer():
+            raise ValueError(
+                f"--fill {fill:g} is not a whole number, but {array.name!r} is {array.type}."
+            )
+        if not info.min <= fill <= info.max:
+            raise ValueError(
+                f"--fill {fill:g} is outside the {array.type} range "
+                f"[{info.min}, {info.max}] of {array.name!r}."
+            )
+    elif np.isfinite(fill) and not np.isfinite(dtype.type(fill)):
+        raise ValueError(f"--fill {fill:g} overflows the {array.type} array {array.name!r}.")
+
+
+def _image_bytes(image: sitk.Image) -> int:
+    """Return the size of the pixel buffer of *image*."""
+    return sitk.GetArrayViewFromImage(image).nbytes
+
+
+def _read_pvti_vtk(pvti_path: str | Path, array_name: str) -> sitk.Image:
+    """Read *array_name* of a .pvti with vtkXMLPImageDataReader, for comparison."""
+    import vtk  # pylint: disable=import-outside-toplevel
+    from vtk.util.numpy_support import vtk_to_numpy  # pylint: disable=import-outside-toplevel
+
+    reader = vtk.vtkXMLPImageDataReader()
+    reader.SetFileName(str(pvti_path))
+    reader.UpdateInformation()
+    selection = reader.GetPointDataArraySelection()
+    selection.DisableAllArrays()
+    selection.EnableArray(array_name)
+    reader.Update()
+    output = reader.GetOutput()
+    array = output.GetPointData().GetArray(array_name)
+    nx, ny, nz = output.GetDimensions()
+    shape = (nz, ny, nx) + ((array.GetNumberOfComponents(),)
+                            if array.GetNumberOfComponents() > 1 else ())
+    return sitk.GetImageFromArray(
+        vtk_to_numpy(array).reshape(shape), isVector=array.GetNumberOfComponents() > 1
+    )
+
+
+def benchmark_readers(pvti_path: str | Path, array_name: str | None = None, jobs: int = 1) -> None:
+    """Time vtkXMLPImageDataReader against this module's reader.
+
+    Both produce a SimpleITK image of the same array; throughput is the
+    uncompressed output size over the wall time.
+    """
+    header = read_pvti_header(pvti_path)
+    name = header.array(array_name).name
+    runs = [("vtkXMLPImageDataReader", lambda: _read_pvti_vtk(pvti_path, name))]
+    for count in sorted({1, jobs}):
+        runs.append((f"merge_pvti -j {count}",
+                     lambda count=count: pvti_to_sitk(pvti_path, name, count, header=header)))
+    print(f"{'reader':>24} {'seconds':>8} {'MiB/s':>8}")
+    for label, run in runs:
+        start = time.perf_counter()
+        image = run()
+        elapsed = time.perf_counter() - start
+        size_mb = _image_bytes(image) / (1024.0 * 1024.0)
+        print(f"{label:>24} {elapsed:8.2f} {size_mb / max(elapsed, 1e-9):8.1f}")
+
+
+def main(argv=None) -> int:
+    """CLI entry point."""
+    parser = argparse.ArgumentParser(
+        description="Merge the .vti pieces of a .pvti file into one image file."
+    )
+    parser.add_argument("-i", "--input", required=True, help="Input .pvti file.")
+    parser.add_argument(
+        "-o", "--output",
+        help="Output image; any format SimpleITK writes (for example .nrrd, .mha, .nii.gz).",
+    )
+    parser.add_argument(
+        "-a", "--array", help="Point-data array to merge (default: the active scalars)."
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1,
+        help="Number of threads decoding pieces (default: number of CPUs).",
+    )
+    parser.add_argument(
+        "--fill", type=float, default=0,
+        help="Value of points covered by no piece (default: 0).",
+    )
+    parser.add_argument(
+        "--compress", action="store_true", help="Ask SimpleITK to compress the output."
+    )
+    parser.add_argument(
+        "--benchmark", action="store_true",
+        help="Write nothing; compare read throughput with vtkXMLPImageDataReader.",
+    )
+    args = parser.parse_args(argv)
+
+    if args.benchmark:
+        benchmark_readers(args.input, args.array, args.jobs)
+        return 0
+    if args.output is None:
+        parser.error("--output is required unless --benchmark is given.")
+    header = read_pvti_header(args.input)
+    try:
+        _check_fill(header.array(args.array), args.fill)
+    except ValueError as exc:
+        parser.error(str(exc))
+    merge_pvti(args.input, args.output, args.array, args.jobs, args.fill, args.compress, header)
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
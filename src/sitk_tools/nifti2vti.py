@@ -8,10 +8,16 @@
 
 """ nifti2vti.py: Convert one or more NIfTI 3D images to compressed VTI files """
 
-import sys
+import argparse
+import functools
+import os
 import pathlib
 import vtk
 
+from .batch_convert import plan_jobs, run_batch
+
+NIFTI_SUFFIXES = (".nii", ".nii.gz")
+
 
 def derive_output_path(input_path: str) -> str:
     """Return the output .vti path derived from a NIfTI input path."""
@@ -24,32 +30,69 @@ def derive_output_path(input_path: str) -> str:
     return str(p) + ".vti"
 
 
-def nifti_to_vti(input_path: str, output_path: str) -> None:
-    """Read a NIfTI file and write it as a compressed VTK XML image (.vti)."""
+def nifti_to_vti(input_path: str, output_path: str, level: int = -1) -> None:
+    """Read a NIfTI file and write it as a compressed VTK XML image (.vti).
+
+    *level* is the zlib compression level (0-9); -1 keeps VTK's default.
+    """
     reader = vtk.vtkNIFTIImageReader()
     reader.SetFileName(input_path)
     reader.Update()
+    if reader.GetErrorCode() or reader.GetOutput().GetNumberOfPoints() == 0:
+        raise RuntimeError(f"Failed to read NIfTI file: {input_path}")
 
     writer = vtk.vtkXMLImageDataWriter()
     writer.SetFileName(output_path)
     writer.SetInputConnection(reader.GetOutputPort())
     writer.SetCompressorTypeToZLib()
+    if level >= 0:
+        writer.SetCompressionLevel(level)
     writer.SetDataModeToBinary()
-    writer.Write()
+    if writer.Write() != 1:
+        raise RuntimeError(f"Failed to write VTI file: {output_path}")
 
-    print(f"Written: {output_path}")
+
+def _output_name(path: pathlib.Path) -> str:
+    return pathlib.Path(derive_output_path(path.name)).name
 
 
 def main(argv=None):
     """CLI entry point."""
-    args = argv if argv is not None else sys.argv[1:]
-    if len(args) < 1:
-        print("Usage: sitk-nifti2vti <input1.nii[.gz]> [input2.nii[.gz] ...]")
-        return 1
-
-    for src in args:
-        nifti_to_vti(src, derive_output_path(src))
-    return 0
+    parser = argparse.ArgumentParser(
+        prog="sitk-nifti2vti",
+        description="Convert NIfTI images to compressed VTI files. Inputs may be "
+                    "files, directories (searched recursively for .nii and .nii.gz) "
+                    "or glob patterns. Outputs whose inputs are unchanged since the "
+                    "last run are skipped.",
+    )
+    parser.add_argument("inputs", nargs="+", help="NIfTI files, directories or globs.")
+    parser.add_argument(
+        "-o", "--output-dir",
+        help="Directory for the .vti files (default: next to each input).",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1,
+        help="Number of worker processes converting files (default: number of CPUs).",
+    )
+    parser.add_argument(
+        "--level", type=int, default=-1, choices=range(-1, 10), metavar="{0..9}",
+        help="zlib compression level (default: VTK's default).",
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Convert every input, even if its output is up to date.",
+    )
+    args = parser.parse_args(argv)
+
+    jobs = plan_jobs(args.inputs, NIFTI_SUFFIXES, _output_name, args.output_dir)
+    result = run_batch(
+        jobs,
+        functools.partial(nifti_to_vti, level=args.level),
+        settings={"level": args.level},
+        workers=args.jobs,
+        force=args.force,
+    )
+    return 1 if result.failed else 0
 
 
 if __name__ == "__main__":
@@ -42,18 +42,41 @@ Options
     -D, --dicom-dir DIR   Directory of DICOM slices to load individually (repeatable)
     -i, --interp STR      Interpolator: linear (default), nearest, bspline, gaussian
     -p, --pad FLOAT       Padding value for voxels outside every input image (default: 0)
+    -c, --combine STR     How overlapping inputs are combined: max (default), mean,
+                          feather (edge-distance weighted mean), first, last
+    -j, --jobs N          Number of threads used to read DICOM slices and resample
+                          inputs (default: 1)
+    --slab PLANES         Build and write the output PLANES Z planes at a time to a
+                          streaming .mha/.mhd file instead of holding the whole
+                          volume in memory
+    --cache-dir DIR       Cache resampled inputs in DIR; reruns with the same input
+                          files, grid and interpolator skip resampling them
+    --cache-size MB       Cache size limit; least recently used entries are evicted
+                          (default: 2048)
     -v, --verbose         Print progress information
     -h, --help            Show this help message
 """
 
+# pylint: disable=too-many-lines
+
 import argparse
 import bisect
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+import hashlib
+import os
+from pathlib import Path
 import sys
 import logging
+import threading
+import time
 
 import numpy as np
 import SimpleITK as sitk
 
+from .batch_convert import image_files
+
 
 INTERPOLATORS = {
     "linear":   sitk.sitkLinear,
@@ -73,6 +96,15 @@ PIXEL_TYPES = {
     "float64": sitk.sitkFloat64,
 }
 
+# Voxelwise combine modes for overlapping inputs.
+REDUCERS = {
+    "max":     "largest value, with the pad value competing everywhere (default)",
+    "mean":    "mean of the inputs that cover the voxel",
+    "feather": "mean weighted by each input's distance to its own edge",
+    "first":   "first input (in command-line order) that covers the voxel",
+    "last":    "last input (in command-line order) that covers the voxel",
+}
+
 
 def load_image(path: str, thickness: float | None = None) -> sitk.Image:
     """Load an image file; promote 2-D images to 3-D single-slice volumes.
@@ -102,11 +134,132 @@ def load_image(path: str, thickness: float | None = None) -> sitk.Image:
     return img
 
 
+@dataclass(frozen=True)
+class ImageHeader:
+    """Geometry of an input file, read without decoding its pixel data.
+
+    Headers can be passed anywhere an input ``sitk.Image`` is accepted
+    (:func:`compute_reference_grid`, :func:`stack_images`, …); the pixel
+    data is only read when the image is actually resampled.
+    """
+
+    path: str
+    size: tuple[int, ...]
+    spacing: tuple[float, ...]
+    origin: tuple[float, ...]
+    direction: tuple[float, ...]
+    pixel_id: int
+    dicom: bool = False
+
+    def load(
+        self,
+        index: tuple[int, ...] | None = None,
+        size: tuple[int, ...] | None = None,
+    ) -> sitk.Image:
+        """Read the pixel data as a 3-D image carrying this header's geometry.
+
+        With *index* and *size* only that box of voxels is read; formats
+        whose ImageIO can stream (e.g. uncompressed MetaImage or NRRD) then
+        never decode the rest of the file.  The origin is moved to the
+        first voxel of the box.
+        """
+        reader = sitk.ImageFileReader()
+        reader.SetFileName(self.path)
+        if self.dicom:
+            reader.SetImageIO("GDCMImageIO")
+        origin = self.origin
+        if index is not None and tuple(size) != self.size:
+            reader.ReadImageInformation()
+            dim = reader.GetDimension()
+            reader.SetExtractIndex([int(v) for v in index[:dim]])
+            reader.SetExtractSize([int(v) for v in size[:dim]])
+            rotation = np.array(self.direction, dtype=float).reshape(3, 3)
+            origin = tuple(
+                float(v) for v in
+                np.array(self.origin) + rotation @ (np.array(index) * np.array(self.spacing))
+            )
+        img = reader.Execute()
+        if img.GetDimension() == 2:
+            img = sitk.JoinSeries(img)
+        if img.GetDimension() != 3:
+            raise ValueError(f"{self.path}: only 2-D and 3-D images are supported.")
+        img.SetSpacing(self.spacing)
+        img.SetOrigin(origin)
+        img.SetDirection(self.direction)
+        return img
+
+
+def _image_geometry(
+    image: sitk.Image | ImageHeader,
+) -> tuple[tuple[int, ...], tuple[float, ...], tuple[float, ...], tuple[float, ...]]:
+    """Return ``(size, spacing, origin, direction)`` of an image or header."""
+    if isinstance(image, ImageHeader):
+        return image.size, image.spacing, image.origin, image.direction
+    return image.GetSize(), image.GetSpacing(), image.GetOrigin(), image.GetDirection()
+
+
+def _load_pixels(
+    image: sitk.Image | ImageHeader,
+    box: tuple[tuple[int, ...], tuple[int, ...]] | None = None,
+) -> sitk.Image:
+    """Return *image* itself, or decode it if it is only a header.
+
+    *box* is an ``(index, size)`` voxel box of the input; only that part of
+    a header's file is read (see :meth:`ImageHeader.load`).
+    """
+    if isinstance(image, ImageHeader):
+        return image.load(*box) if box is not None else image.load()
+    return image
+
+
+def read_image_header(path: str, thickness: float | None = None) -> ImageHeader:
+    """Read only the image information of *path* (no pixel data).
+
+    2-D images are described as single-slice 3-D volumes exactly as
+    :func:`load_image` would promote them.
+    """
+    reader = sitk.ImageFileReader()
+    reader.SetFileName(path)
+    reader.ReadImageInformation()
+
+    size = reader.GetSize()
+    spacing = reader.GetSpacing()
+    origin = reader.GetOrigin()
+    direction = reader.GetDirection()
+    if reader.GetDimension() == 2:
+        z_sp = 1.0
+        if thickness is not None:
+            z_sp = float(thickness)
+            if z_sp <= 0:
+                raise ValueError(f"{path}: thickness must be > 0 (got {z_sp}).")
+        size = (size[0], size[1], 1)
+        spacing = (spacing[0], spacing[1], z_sp)
+        origin = (origin[0], origin[1], 0.0)
+        direction = (direction[0], direction[1], 0.0,
+                     direction[2], direction[3], 0.0,
+                     0.0, 0.0, 1.0)
+    elif reader.GetDimension() != 3:
+        raise ValueError(f"{path}: only 2-D and 3-D images are supported.")
+
+    return ImageHeader(
+        path=path,
+        size=tuple(int(v) for v in size),
+        spacing=tuple(float(v) for v in spacing),
+        origin=tuple(float(v) for v in origin),
+        direction=tuple(float(v) for v in direction),
+        pixel_id=reader.GetPixelID(),
+    )
+
+
 def _dicom_3d_geometry(
     img2d: sitk.Image,
 ) -> tuple[tuple[float, ...], tuple[float, ...]]:
     """Return ``(origin3d, direction3d)`` for a 2-D DICOM image.
 
+    *img2d* may also be an ``sitk.ImageFileReader`` on which
+    ``ReadImageInformation`` has been called; only the metadata and origin
+    accessors are used.
+
     Reads the Image Position Patient (0020|0032) and Image Orientation
     Patient (0020|0037) DICOM tags so that each slice is placed at its true
     location in 3-D space regardless of whether the series has regular spacing.
@@ -145,9 +298,162 @@ def _dicom_3d_geometry(
     return origin3d, direction3d
 
 
+def _dicom_series_files(directory: str) -> list[str]:
+    """Return the GDCM-sorted file names of the first DICOM series in *directory*."""
+    series_ids = sitk.ImageSeriesReader.GetGDCMSeriesIDs(directory)
+    if not series_ids:
+        raise ValueError(f"No DICOM series found in: {directory}")
+    if len(series_ids) > 1:
+        logging.warning(
+            "%s contains %d DICOM series; loading the first one (%s).",
+            directory, len(series_ids), series_ids[0],
+        )
+
+    return list(sitk.ImageSeriesReader.GetGDCMSeriesFileNames(
+        directory, series_ids[0]
+    ))
+
+
+def _dicom_slice_geometry(
+    source,
+    path: str,
+    thickness: float | None,
+) -> tuple[tuple[float, ...], tuple[float, ...], float]:
+    """Return ``(origin3d, direction3d, z_spacing)`` for one DICOM slice.
+
+    *source* is the decoded 2-D slice or an ``ImageFileReader`` holding its
+    image information.
+    """
+    origin3d, direction3d = _dicom_3d_geometry(source)
+
+    if thickness is not None:
+        z_sp = float(thickness)
+    else:
+        try:
+            z_sp = float(source.GetMetaData("0018|0050"))
+        except RuntimeError:
+            z_sp = 1.0
+
+    if z_sp <= 0:
+        raise ValueError(f"{path}: invalid slice thickness {z_sp}; must be > 0.")
+
+    return origin3d, direction3d, z_sp
+
+
+def _read_dicom_slice(path: str, thickness: float | None) -> sitk.Image:
+    """Decode one DICOM file as a single-slice 3-D volume at its true position."""
+    file_reader = sitk.ImageFileReader()
+    file_reader.SetImageIO("GDCMImageIO")
+    file_reader.LoadPrivateTagsOn()
+    file_reader.SetFileName(path)
+    img_read = file_reader.Execute()
+
+    # GDCM may return a 3-D single-slice image rather than a 2-D one;
+    # calling JoinSeries on a 3-D image would produce a 4-D result.
+    if img_read.GetDimension() == 2:
+        img3d = sitk.JoinSeries(img_read)
+    elif img_read.GetDimension() == 3:
+        img3d = img_read
+    else:
+        raise ValueError(
+            f"{path}: unexpected image dimension {img_read.GetDimension()}."
+        )
+
+    origin3d, direction3d, z_sp = _dicom_slice_geometry(img_read, path, thickness)
+
+    sp = list(img3d.GetSpacing())
+    sp[2] = z_sp
+    img3d.SetSpacing(tuple(sp))
+    img3d.SetOrigin(origin3d)
+    img3d.SetDirection(direction3d)
+    return img3d
+
+
+def _read_dicom_header(path: str, thickness: float | None) -> ImageHeader:
+    """Describe one DICOM file without decoding its pixel data."""
+    file_reader = sitk.ImageFileReader()
+    file_reader.SetImageIO("GDCMImageIO")
+    file_reader.LoadPrivateTagsOn()
+    file_reader.SetFileName(path)
+    file_reader.ReadImageInformation()
+
+    if file_reader.GetDimension() not in (2, 3):
+        raise ValueError(
+            f"{path}: unexpected image dimension {file_reader.GetDimension()}."
+        )
+    size = file_reader.GetSize()
+    spacing = file_reader.GetSpacing()
+    origin3d, direction3d, z_sp = _dicom_slice_geometry(file_reader, path, thickness)
+
+    return ImageHeader(
+        path=path,
+        size=(int(size[0]), int(size[1]), int(size[2]) if len(size) > 2 else 1),
+        spacing=(float(spacing[0]), float(spacing[1]), z_sp),
+        origin=origin3d,
+        direction=direction3d,
+        pixel_id=file_reader.GetPixelID(),
+        dicom=True,
+    )
+
+
+def _read_dicom_files(read, directory: str, workers: int, headers_only: bool) -> list:
+    """Apply *read* to every file of the DICOM series in *directory*.
+
+    Files are read by up to *workers* threads and returned in GDCM-sorted
+    order.  A file that cannot be read is logged and skipped rather than
+    aborting the whole series; ``ValueError`` is raised only if no file
+    could be read.  Throughput is logged at INFO level; with *headers_only*
+    it is labelled as a header scan, since no pixel data was decoded.
+    """
+    dcm_files = _dicom_series_files(directory)
+
+    def attempt(path: str):
+        try:
+            return path, read(path), None
+        except (RuntimeError, ValueError) as exc:
+            return path, None, exc
+
+    start = time.perf_counter()
+    results = []
+    failures: list[tuple[str, Exception]] = []
+    n_bytes = 0
+    for path, result, error in _ordered_map(attempt, dcm_files, workers):
+        if error is not None:
+            logging.warning("Skipping %s: %s", path, error)
+            failures.append((path, error))
+            continue
+        results.append(result)
+        n_bytes += os.path.getsize(path)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+
+    if not results:
+        raise ValueError(
+            f"Could not read any of the {len(dcm_files)} DICOM file(s) in {directory}: "
+            f"{failures[0][1]}"
+        )
+    if failures:
+        logging.warning(
+            "%d of %d DICOM file(s) in %s could not be read.",
+            len(failures), len(dcm_files), directory,
+        )
+    if headers_only:
+        logging.info(
+            "  header scan: %d slice(s) in %.2f s (%.1f slices/s); "
+            "pixel data is decoded while resampling",
+            len(results), elapsed, len(results) / elapsed,
+        )
+    else:
+        logging.info(
+            "  decoded %d slice(s) in %.2f s (%.1f slices/s, %.1f MB/s)",
+            len(results), elapsed, len(results) / elapsed, n_bytes / elapsed / 1e6,
+        )
+    return results
+
+
 def load_dicom_slices(
     directory: str,
     thickness: float | None = None,
+    workers: int = 1,
 ) -> list[sitk.Image]:
     """Read each DICOM slice in *directory* as an independent single-slice 3-D volume.
 
@@ -165,66 +471,35 @@ def load_dicom_slices(
         Through-plane voxel size (mm) for each slice.  When ``None`` the
         SliceThickness DICOM tag (0018|0050) is consulted; if that tag is
         also absent, 1.0 mm is assumed.
+    workers:
+        Number of threads decoding files concurrently.  Slices are always
+        returned in GDCM-sorted order; files that fail to decode are logged
+        and skipped.
     """
-    series_ids = sitk.ImageSeriesReader.GetGDCMSeriesIDs(directory)
-    if not series_ids:
-        raise ValueError(f"No DICOM series found in: {directory}")
-    if len(series_ids) > 1:
-        logging.warning(
-            "%s contains %d DICOM series; loading the first one (%s).",
-            directory, len(series_ids), series_ids[0],
-        )
-
-    dcm_files = sitk.ImageSeriesReader.GetGDCMSeriesFileNames(
-        directory, series_ids[0]
+    return _read_dicom_files(
+        lambda path: _read_dicom_slice(path, thickness), directory, workers, False
     )
 
-    file_reader = sitk.ImageFileReader()
-    file_reader.SetImageIO("GDCMImageIO")
-    file_reader.LoadPrivateTagsOn()
 
-    slices: list[sitk.Image] = []
-    for path in dcm_files:
-        file_reader.SetFileName(path)
-        img_read = file_reader.Execute()
-
-        # GDCM may return a 3-D single-slice image rather than a 2-D one;
-        # calling JoinSeries on a 3-D image would produce a 4-D result.
-        if img_read.GetDimension() == 2:
-            img3d = sitk.JoinSeries(img_read)
-        elif img_read.GetDimension() == 3:
-            img3d = img_read
-        else:
-            raise ValueError(
-                f"{path}: unexpected image dimension {img_read.GetDimension()}."
-            )
-
-        origin3d, direction3d = _dicom_3d_geometry(img_read)
-
-        if thickness is not None:
-            z_sp = float(thickness)
-        else:
-            try:
-                z_sp = float(img_read.GetMetaData("0018|0050"))
-            except RuntimeError:
-                z_sp = 1.0
-
-        if z_sp <= 0:
-            raise ValueError(f"{path}: invalid slice thickness {z_sp}; must be > 0.")
-
-        sp = list(img3d.GetSpacing())
-        sp[2] = z_sp
-        img3d.SetSpacing(tuple(sp))
-        img3d.SetOrigin(origin3d)
-        img3d.SetDirection(direction3d)
-
-        slices.append(img3d)
-
-    return slices
+def read_dicom_headers(
+    directory: str,
+    thickness: float | None = None,
+    workers: int = 1,
+) -> list[ImageHeader]:
+    """Describe each DICOM slice in *directory* without decoding pixel data.
+
+    This is the header-only counterpart of :func:`load_dicom_slices`: the
+    returned headers carry the same per-slice geometry (Image Position /
+    Orientation Patient and slice thickness), and each slice is decoded
+    only when :meth:`ImageHeader.load` is called.
+    """
+    return _read_dicom_files(
+        lambda path: _read_dicom_header(path, thickness), directory, workers, True
+    )
 
 
 def _covered_z_planes(
-    slices: list[sitk.Image],
+    slices: list[sitk.Image | ImageHeader],
     size: tuple[int, ...],
     spacing: tuple[float, ...],
     origin: tuple[float, ...],
@@ -235,17 +510,74 @@ def _covered_z_planes(
     Each single-slice 3-D image maps to the output Z plane whose physical
     position is closest to the slice's origin along the output Z axis.
     """
+    if not slices:
+        return []
     rot = np.array(direction).reshape(3, 3)
-    sz = spacing[2]
-    nz = size[2]
-    o_ref = np.array(origin)
-    covered: set[int] = set()
-    for img in slices:
-        local_z = float((rot.T @ (np.array(img.GetOrigin()) - o_ref))[2])
-        k = int(round(local_z / sz))
-        if 0 <= k < nz:
-            covered.add(k)
-    return sorted(covered)
+    origins = np.array([_image_geometry(img)[2] for img in slices], dtype=float)
+    local_z = ((origins - np.array(origin)) @ rot)[:, 2]
+    k = np.round(local_z / spacing[2]).astype(int)
+    k = k[(k >= 0) & (k < size[2])]
+    return sorted(set(k.tolist()))
+
+
+# Upper bound on the temporary buffers used while blending gap planes.
+_GAP_FILL_CHUNK_BYTES = 64 * 1024 * 1024
+
+
+def _fill_slice_gaps_inplace(  # pylint: disable=too-many-locals
+    arr: np.ndarray,
+    covered: list[int],
+    planes: np.ndarray | None = None,
+) -> None:
+    """Fill uncovered Z planes of the ``(Z, Y, X)`` array *arr* in place.
+
+    Neighbour indices and blend weights are computed for all uncovered planes
+    at once; planes are then blended in Z-chunks so the temporaries stay
+    bounded by ``_GAP_FILL_CHUNK_BYTES`` however large the volume is.
+    Covered planes are only read, so writing into *arr* is safe.
+
+    *planes* gives the output Z index of each row of *arr* (increasing) and
+    defaults to ``0 .. Z-1``.  Passing it lets a slab plus a few halo planes
+    from outside the slab be filled as one array.
+    """
+    if planes is None:
+        planes = np.arange(arr.shape[0], dtype=np.intp)
+    planes = np.asarray(planes, dtype=np.intp)
+    is_covered = np.isin(planes, np.asarray(covered, dtype=np.intp))
+    cov_rows = np.flatnonzero(is_covered)
+    target_rows = np.flatnonzero(~is_covered)
+    if cov_rows.size == 0 or target_rows.size == 0:
+        return
+
+    cov_planes = planes[cov_rows]
+    pos = np.searchsorted(cov_planes, planes[target_rows])
+    below = pos == 0
+    above = pos == cov_rows.size
+    inner = ~(below | above)
+
+    # Outside the covered range, copy the nearest covered plane.
+    for row in target_rows[below]:
+        arr[row] = arr[cov_rows[0]]
+    for row in target_rows[above]:
+        arr[row] = arr[cov_rows[-1]]
+
+    rows = target_rows[inner]
+    r_lo = cov_rows[pos[inner] - 1]
+    r_hi = cov_rows[pos[inner]]
+    alpha = (planes[rows] - planes[r_lo]) / (planes[r_hi] - planes[r_lo])
+    w_hi = alpha.astype(arr.dtype)
+    w_lo = (1.0 - alpha).astype(arr.dtype)
+
+    plane_bytes = max(1, arr[0].nbytes)
+    chunk = max(1, _GAP_FILL_CHUNK_BYTES // (2 * plane_bytes))
+    for start in range(0, rows.size, chunk):
+        sl = slice(start, start + chunk)
+        blended = arr[r_lo[sl]]
+        blended *= w_lo[sl][:, None, None]
+        upper = arr[r_hi[sl]]
+        upper *= w_hi[sl][:, None, None]
+        blended += upper
+        arr[rows[sl]] = blended
 
 
 def fill_slice_gaps(
@@ -273,72 +605,92 @@ def fill_slice_gaps(
     if not covered:
         return volume
 
-    arr = sitk.GetArrayFromImage(volume).astype(np.float32)  # shape: (Z, Y, X)
-    nz = arr.shape[0]
-    covered_set = set(covered)
-
-    for k in range(nz):
-        if k in covered_set:
-            continue
-        pos = bisect.bisect_left(covered, k)
-        k_lo = covered[pos - 1] if pos > 0 else None
-        k_hi = covered[pos] if pos < len(covered) else None
-
-        if k_lo is not None and k_hi is not None:
-            alpha = float(k - k_lo) / float(k_hi - k_lo)
-            arr[k] = (1.0 - alpha) * arr[k_lo] + alpha * arr[k_hi]
-        elif k_lo is not None:
-            arr[k] = arr[k_lo]
-        elif k_hi is not None:
-            arr[k] = arr[k_hi]
+    arr = sitk.GetArrayFromImage(volume)  # shape: (Z, Y, X)
+    if arr.dtype != np.float32:
+        arr = arr.astype(np.float32)
+    _fill_slice_gaps_inplace(arr, covered)
 
     result = sitk.GetImageFromArray(arr)
+    del arr
     result.CopyInformation(volume)
     return result
 
 
-def _collect_corners(images: list[sitk.Image], rotation: np.ndarray) -> np.ndarray:
-    """Return all bounding-box corner points of each image rotated into the reference frame."""
-    corners = []
-    for img in images:
-        sz = img.GetSize()
-        for ci in (
-            [i, j, k]
-            for i in (0, sz[0] - 1)
-            for j in (0, sz[1] - 1)
-            for k in (0, sz[2] - 1)
-        ):
-            phys = img.TransformIndexToPhysicalPoint(ci)
-            corners.append(rotation.T @ np.array(phys))
-    return np.array(corners)
+def _geometry_arrays(
+    images: list[sitk.Image | ImageHeader],
+) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """Stack the geometry of *images* into NumPy arrays.
+
+    Returns ``(sizes, spacings, origins, directions)`` with shapes
+    ``(N, 3)``, ``(N, 3)``, ``(N, 3)`` and ``(N, 3, 3)``.
+    """
+    flat = np.array(
+        [sum(_image_geometry(img), ()) for img in images], dtype=float
+    ).reshape((-1, 18))
+    return flat[:, 0:3], flat[:, 3:6], flat[:, 6:9], flat[:, 9:18].reshape((-1, 3, 3))
+
+
+def _edge_vectors(
+    sizes: np.ndarray,
+    spacings: np.ndarray,
+    directions: np.ndarray,
+) -> np.ndarray:
+    """Return ``(N, 3, 3)`` physical edge vectors; column *j* spans index axis *j*."""
+    return directions * ((sizes - 1.0) * spacings)[:, None, :]
+
+
+def _bounding_box(
+    sizes: np.ndarray,
+    spacings: np.ndarray,
+    origins: np.ndarray,
+    directions: np.ndarray,
+    rotation: np.ndarray,
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``(min_pt, max_pt)`` of all image corners in the *rotation* frame.
+
+    Each corner is ``origin + sum_j m_j * edge_j`` with ``m_j`` in {0, 1}, so
+    per image the extreme corners follow from the signs of the rotated edge
+    vectors; the eight corners never have to be formed.
+    """
+    # One (3N x 3) product: row (n, j) is edge j of image n in the reference frame.
+    edges = _edge_vectors(sizes, spacings, directions).transpose(0, 2, 1)
+    edges = (edges.reshape((-1, 3)) @ rotation).reshape((-1, 3, 3))
+    base = origins @ rotation
+    negative = np.minimum(edges, 0.0).sum(axis=1)
+    lo = base + negative
+    hi = base + edges.sum(axis=1) - negative
+    return lo.min(axis=0), hi.max(axis=0)
 
 
 def compute_reference_grid(
-    images: list[sitk.Image],
+    images: list[sitk.Image | ImageHeader],
     out_spacing: list[float] | None,
 ) -> tuple[tuple[int, ...], tuple[float, ...], tuple[float, ...], tuple[float, ...]]:
     """
     Compute origin, spacing, direction, and size for a grid that covers the
     physical bounding box of all input images.
 
+    Only geometry is used, so *images* may be :class:`ImageHeader` objects
+    and the grid can be computed before any pixel data is decoded.
+
     Returns
     -------
     (size, spacing, origin, direction)
     """
     # Use the direction of the first image as the reference orientation.
-    ref_direction = images[0].GetDirection()
+    ref_direction = tuple(_image_geometry(images[0])[3])
 
     # Build a 3-D rotation matrix from the direction cosines and collect
     # all physical bounding-box corners in that reference frame.
+    # The geometry of every image is stacked once so the bounding box of
+    # thousands of inputs comes out of a few batched array operations.
     rotation = np.array(ref_direction).reshape(3, 3)
-    corners = _collect_corners(images, rotation)
-    min_pt = corners.min(axis=0)
-    max_pt = corners.max(axis=0)
+    sizes, spacings, origins, directions = _geometry_arrays(images)
+    min_pt, max_pt = _bounding_box(sizes, spacings, origins, directions, rotation)
 
     # Determine output spacing.
     if out_spacing is None:
         # Use the finest spacing across all images (per axis).
-        spacings = np.array([img.GetSpacing() for img in images])
         out_spacing = spacings.min(axis=0).tolist()
     if any(s is None for s in out_spacing) or any(float(s) <= 0 for s in out_spacing):
         raise ValueError(
@@ -381,38 +733,890 @@ def resample_to_reference(  # pylint: disable=too-many-arguments,too-many-positi
     )
 
 
-def stack_images(  # pylint: disable=too-many-arguments,too-many-positional-arguments
-    images: list[sitk.Image],
+def _reference_region(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    image: sitk.Image | ImageHeader,
     size: tuple[int, ...],
     spacing: tuple[float, ...],
     origin: tuple[float, ...],
     direction: tuple[float, ...],
+) -> tuple[tuple[int, ...], tuple[int, ...]] | None:
+    """Return ``(index, size)`` of the reference-grid region *image* can touch.
+
+    The region is the bounding box, in reference-grid voxel indices, of the
+    input's physical extent.  Voxel centres up to half a voxel beyond the
+    outermost input samples still interpolate inside the input buffer, so
+    the box is taken over the voxel *edges* rather than the centres.
+    Returns ``None`` when the input lies entirely outside the grid.
+    """
+    in_size, in_spacing, in_origin, in_direction = _image_geometry(image)
+    in_size = np.array(in_size, dtype=float)
+    in_spacing = np.array(in_spacing, dtype=float)
+    in_origin = np.array(in_origin, dtype=float)
+    in_direction = np.array(in_direction, dtype=float).reshape(3, 3)
+
+    edges = np.array(
+        [[i, j, k]
+         for i in (-0.5, in_size[0] - 0.5)
+         for j in (-0.5, in_size[1] - 0.5)
+         for k in (-0.5, in_size[2] - 0.5)]
+    )
+    physical = in_origin + (edges * in_spacing) @ in_direction.T
+
+    rotation = np.array(direction, dtype=float).reshape(3, 3)
+    local = (physical - np.array(origin, dtype=float)) @ rotation / np.array(spacing)
+
+    # A small tolerance keeps voxel centres that sit exactly on an edge.
+    lo = np.maximum(np.ceil(local.min(axis=0) - 1e-6), 0).astype(int)
+    hi = np.minimum(np.floor(local.max(axis=0) + 1e-6), np.array(size) - 1).astype(int)
+    if np.any(hi < lo):
+        return None
+    return tuple(int(v) for v in lo), tuple(int(v) for v in hi - lo + 1)
+
+
+# Gaussian interpolation support in physical units: SimpleITK's default
+# sigma (0.8) times its default cut-off (4 sigma).
+_GAUSSIAN_SUPPORT = 0.8 * 4.0
+
+# Extra input planes read around a box for B-spline interpolation.  Its
+# coefficients are prefiltered over the whole buffer, but the influence of
+# a sample decays by about 0.27 per voxel, so 16 planes leave it below 1e-9.
+_BSPLINE_MARGIN = 16
+
+
+def _input_box(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    image: sitk.Image | ImageHeader,
+    index: tuple[int, ...],
+    size: tuple[int, ...],
+    grid: tuple[tuple[int, ...], tuple[float, ...], tuple[float, ...], tuple[float, ...]],
     interpolator: int,
+) -> tuple[tuple[int, ...], tuple[int, ...]]:
+    """Return the ``(index, size)`` box of *image* needed to resample a grid region.
+
+    *index* and *size* select voxels of *grid*.  Their centres are mapped
+    into the input's continuous index space and the bounding box is widened
+    by the interpolation kernel's reach, so resampling from the box alone
+    gives the same values as resampling from the whole input.
+    """
+    _, spacing, origin, direction = grid
+    in_size, in_spacing, in_origin, in_direction = (
+        np.array(v, dtype=float) for v in _image_geometry(image)
+    )
+    corners = np.array(
+        [[i, j, k]
+         for i in (index[0], index[0] + size[0] - 1)
+         for j in (index[1], index[1] + size[1] - 1)
+         for k in (index[2], index[2] + size[2] - 1)],
+        dtype=float,
+    )
+    rotation = np.array(direction, dtype=float).reshape(3, 3)
+    physical = np.array(origin) + (corners * np.array(spacing)) @ rotation.T
+    local = (physical - in_origin) @ in_direction.reshape(3, 3) / in_spacing
+
+    if interpolator == sitk.sitkBSpline:
+        margin = np.full(3, _BSPLINE_MARGIN)
+    elif interpolator == sitk.sitkGaussian:
+        margin = np.ceil(_GAUSSIAN_SUPPORT / in_spacing).astype(int) + 1
+    else:
+        margin = np.ones(3, dtype=int)
+    lo = np.floor(local.min(axis=0) + 1e-6).astype(int) - margin
+    hi = np.ceil(local.max(axis=0) - 1e-6).astype(int) + margin
+    lo = np.clip(lo, 0, in_size.astype(int) - 1)
+    hi = np.clip(hi, lo, in_size.astype(int) - 1)
+    return tuple(int(v) for v in lo), tuple(int(v) for v in hi - lo + 1)
+
+
+def _pad_outside(
+    combined: np.ndarray,
+    box: tuple[tuple[int, ...], tuple[int, ...]] | None,
     default_value: float,
-) -> sitk.Image:
+) -> None:
+    """Fold *default_value* into every voxel of *combined* outside *box*.
+
+    *combined* is indexed ``(z, y, x)``; *box* is an ``(index, size)`` pair in
+    ``(x, y, z)`` order as returned by :func:`_reference_region`.
+    """
+    if box is None:
+        np.maximum(combined, default_value, out=combined)
+        return
+    (x0, y0, z0), (sx, sy, sz) = box
+    x1, y1, z1 = x0 + sx, y0 + sy, z0 + sz
+    for part in (
+        combined[:z0],
+        combined[z1:],
+        combined[z0:z1, :y0],
+        combined[z0:z1, y1:],
+        combined[z0:z1, y0:y1, :x0],
+        combined[z0:z1, y0:y1, x1:],
+    ):
+        np.maximum(part, default_value, out=part)
+
+
+def _intersect_boxes(
+    a: tuple[tuple[int, ...], tuple[int, ...]] | None,
+    b: tuple[tuple[int, ...], tuple[int, ...]] | None,
+) -> tuple[tuple[int, ...], tuple[int, ...]] | None:
+    """Return the intersection of two ``(index, size)`` boxes, or ``None``."""
+    if a is None or b is None:
+        return None
+    lo = [max(a[0][i], b[0][i]) for i in range(3)]
+    hi = [min(a[0][i] + a[1][i], b[0][i] + b[1][i]) for i in range(3)]
+    if any(hi[i] <= lo[i] for i in range(3)):
+        return None
+    return tuple(lo), tuple(hi[i] - lo[i] for i in range(3))
+
+
+class DecodeLog:
+    """Pixel data decoded while resampling.
+
+    Counts the reads, the decoded bytes and the time spent decoding (summed
+    over worker threads) for throughput logging, and collects the DICOM
+    slices that could not be decoded and were skipped.  Safe to share
+    between the worker threads of one run.
     """
-    Resample all images onto the reference grid and combine them by taking
-    the maximum value at each voxel (foreground wins over padding).
 
-    For a single image this is a straightforward resample.
+    def __init__(self) -> None:
+        self.reads = 0
+        self.dicom_reads = 0
+        self.nbytes = 0
+        self.seconds = 0.0
+        self.failures: list[tuple[str, Exception]] = []
+        self._lock = threading.Lock()
+
+    def add(self, image: sitk.Image | ImageHeader, pixels: sitk.Image, seconds: float) -> None:
+        """Record that *pixels* of *image* were decoded in *seconds*."""
+        nbytes = sitk.GetArrayViewFromImage(pixels).nbytes
+        with self._lock:
+            self.reads += 1
+            self.dicom_reads += bool(isinstance(image, ImageHeader) and image.dicom)
+            self.nbytes += nbytes
+            self.seconds += seconds
+
+    def skip(self, path: str, error: Exception) -> None:
+        """Record and log a DICOM slice that could not be decoded."""
+        logging.warning("Skipping %s: %s", path, error)
+        with self._lock:
+            self.failures.append((path, error))
+
+    def log_throughput(self) -> None:
+        """Log decoded slices (or input reads) per second and MB/s at INFO level."""
+        if not self.reads:
+            return
+        seconds = max(self.seconds, 1e-9)
+        unit = "slice" if self.dicom_reads == self.reads else "read"
+        logging.info(
+            "  decoded %d %s(s), %.1f MB, in %.2f s (%.1f %ss/s, %.1f MB/s)",
+            self.reads, unit, self.nbytes / 1e6, self.seconds,
+            self.reads / seconds, unit, self.nbytes / seconds / 1e6,
+        )
+
+
+class ResampleCache:
+    """On-disk LRU cache of resampled inputs.
+
+    Entries are ``.npy`` files named by a hash of the input file's contents,
+    the input geometry, the target sub-grid, the interpolator and the pad
+    value, so a rerun that only changes e.g. the output type or the pad of a
+    ``max`` combine reuses every input, and a changed input misses.  Only
+    :class:`ImageHeader` inputs (i.e. ones read from a file) are cached.
+    For split header/data formats (``.mhd``, ``.nhdr``, Analyze ``.hdr``)
+    the data files are hashed along with the header, so editing either
+    misses.
+
+    When the directory grows beyond *max_bytes* the least recently used
+    entries (by modification time, which hits refresh) are deleted.  The
+    cache is safe to share between the worker threads of one run.
     """
-    resampled = [
-        resample_to_reference(
-            img, size, spacing, origin, direction, interpolator, default_value
+
+    def __init__(self, directory: str, max_bytes: int) -> None:
+        if max_bytes <= 0:
+            raise ValueError(f"Cache size must be positive, got {max_bytes} bytes.")
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._digests: dict[tuple, bytes] = {}
+        self._total = sum(
+            entry.stat().st_size for entry in os.scandir(directory)
+            if entry.name.endswith(".npy")
+        )
+
+    def _file_digest(self, path: str) -> bytes:
+        """Return a content hash of *path*, memoised on its size and mtime."""
+        stat = os.stat(path)
+        memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+        with self._lock:
+            digest = self._digests.get(memo_key)
+        if digest is None:
+            h = hashlib.blake2b(digest_size=16)
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+            digest = h.digest()
+            with self._lock:
+                self._digests[memo_key] = digest
+        return digest
+
+    def key(
+        self,
+        image: sitk.Image | ImageHeader,
+        grid: tuple[tuple[int, ...], tuple[float, ...], tuple[float, ...], tuple[float, ...]],
+        interpolator: int,
+        default_value: float,
+    ) -> str | None:
+        """Return the cache key for resampling *image* onto *grid*, or ``None``."""
+        if not isinstance(image, ImageHeader):
+            return None
+        h = hashlib.blake2b(digest_size=20)
+        for path in image_files(Path(image.path)):
+            h.update(self._file_digest(str(path)))
+        h.update(repr((
+            _image_geometry(image), image.pixel_id, image.dicom,
+            grid, interpolator, float(default_value),
+        )).encode())
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, key + ".npy")
+
+    def get(self, key: str) -> np.ndarray | None:
+        """Return the cached array for *key*, or ``None`` on a miss."""
+        path = self._path(key)
+        try:
+            arr = np.load(path)
+            os.utime(path)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return arr
+
+    def put(self, key: str, arr: np.ndarray) -> None:
+        """Store *arr* under *key*, then evict old entries over the size limit."""
+        path = self._path(key)
+        # Unique per process and thread, as several runs may share the cache.
+        tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp, "wb") as f:
+            np.save(f, arr)
+        size = os.path.getsize(tmp)
+        with self._lock:
+            # An entry being overwritten no longer counts towards the total.
+            try:
+                size -= os.path.getsize(path)
+            except OSError:
+                pass
+            os.replace(tmp, path)
+            self._total += size
+            if self._total > self.max_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        """Delete least recently used entries until under the size limit."""
+        entries = sorted(
+            (entry.stat().st_mtime_ns, entry.stat().st_size, entry.path)
+            for entry in os.scandir(self.directory)
+            if entry.name.endswith(".npy")
         )
-        for img in images
-    ]
+        self._total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            self._total -= size
+            logging.info("  cache: evicted %s", os.path.basename(path))
+
 
-    if len(resampled) == 1:
-        return resampled[0]
+def _resample_footprint(  # pylint: disable=too-many-locals,too-many-arguments,too-many-positional-arguments
+    image: sitk.Image | ImageHeader,
+    grid: tuple[tuple[int, ...], tuple[float, ...], tuple[float, ...], tuple[float, ...]],
+    interpolator: int,
+    default_value: float,
+    cache: ResampleCache | None = None,
+    decoded: DecodeLog | None = None,
+) -> tuple[tuple[tuple[int, ...], tuple[int, ...]] | None, sitk.Image | None]:
+    """Resample *image* over its footprint in *grid*.
+
+    Headers are decoded here, so with a thread pool the decode of one input
+    overlaps the resampling of others and only in-flight inputs are held in
+    memory.  Only the part of a header's file that *grid* needs is read,
+    so rendering a slab decodes a slab-sized piece of each input.  Returns
+    ``(region, resampled)`` where *region* is the ``(index, size)`` box from
+    :func:`_reference_region`; both are ``None`` when the image lies outside
+    the grid.  With a *cache*, a previously resampled footprint is read back
+    instead of decoding and resampling the input.
+
+    With a *decoded* log, every decode is timed and counted in it, and a
+    DICOM slice whose pixel data cannot be decoded is logged, recorded and
+    skipped like a slice outside the grid, as :func:`read_dicom_headers`
+    does for unreadable headers.
+    """
+    size, spacing, origin, direction = grid
+    region = _reference_region(image, size, spacing, origin, direction)
+    if region is None:
+        return None, None
+    index, sub_size = region
+    rotation = np.array(direction, dtype=float).reshape(3, 3)
+    sub_origin = tuple(
+        float(v)
+        for v in np.array(origin) + rotation @ (np.array(index) * np.array(spacing))
+    )
+
+    key = None
+    if cache is not None:
+        key = cache.key(
+            image, (sub_size, spacing, sub_origin, direction), interpolator, default_value
+        )
+        cached = cache.get(key) if key is not None else None
+        if cached is not None:
+            return region, _array_to_image(cached, spacing, sub_origin, direction)
+
+    start = time.perf_counter()
+    try:
+        # Read only the part of the input this region interpolates from.
+        pixels = _load_pixels(image, _input_box(image, index, sub_size, grid, interpolator))
+    except (RuntimeError, ValueError) as exc:
+        if decoded is None or not (isinstance(image, ImageHeader) and image.dicom):
+            raise
+        decoded.skip(image.path, exc)
+        return None, None
+    if decoded is not None and isinstance(image, ImageHeader):
+        decoded.add(image, pixels, time.perf_counter() - start)
+    resampled = resample_to_reference(
+        pixels, sub_size, spacing, sub_origin, direction, interpolator, default_value,
+    )
+    del pixels
+    if key is not None:
+        cache.put(key, sitk.GetArrayViewFromImage(resampled))
+    return region, resampled
+
+
+def _feather_weights(  # pylint: disable=too-many-locals
+    image: sitk.Image | ImageHeader,
+    grid: tuple[tuple[int, ...], tuple[float, ...], tuple[float, ...], tuple[float, ...]],
+    region: tuple[tuple[int, ...], tuple[int, ...]],
+) -> np.ndarray:
+    """Return ``(Z, Y, X)`` feathering weights for *image* over *region*.
+
+    The weight of a grid voxel is its physical distance to the nearest edge
+    of *image*, taken over the axes along which the input has more than one
+    voxel (so single-slice inputs feather in-plane only).  The mapping from
+    grid to input index is affine, so each axis is built by broadcasting
+    three 1-D ramps rather than transforming every voxel.
+    """
+    _, spacing, origin, direction = grid
+    in_size, in_spacing, in_origin, in_direction = _image_geometry(image)
+    index, sub_size = region
+
+    out_matrix = np.array(direction, dtype=float).reshape(3, 3) * np.array(spacing)
+    in_matrix = np.array(in_direction, dtype=float).reshape(3, 3) * np.array(in_spacing)
+    # Continuous input index = affine @ grid index + offset.
+    affine = np.linalg.solve(in_matrix, out_matrix)
+    offset = np.linalg.solve(
+        in_matrix,
+        np.array(origin) + out_matrix @ np.array(index) - np.array(in_origin),
+    )
+    ramps = [np.arange(n, dtype=float) for n in sub_size]
+
+    weights = None
+    for axis in range(3):
+        if in_size[axis] <= 1:
+            continue
+        coord = (
+            offset[axis]
+            + (affine[axis, 2] * ramps[2])[:, None, None]
+            + (affine[axis, 1] * ramps[1])[None, :, None]
+            + (affine[axis, 0] * ramps[0])[None, None, :]
+        )
+        dist = np.minimum(coord + 0.5, in_size[axis] - 0.5 - coord) * in_spacing[axis]
+        weights = dist if weights is None else np.minimum(weights, dist)
+    if weights is None:
+        return np.ones(tuple(reversed(sub_size)), dtype=np.float32)
+    # Keep voxels right on the edge (which still sample the input) positive.
+    return np.maximum(weights, 1e-6).astype(np.float32)
+
+
+def _accumulate(
+    reducer: str,
+    total: np.ndarray,
+    weight: np.ndarray,
+    values: np.ndarray,
+    feather: np.ndarray | None = None,
+) -> None:
+    """Fold one resampled input into the running ``total`` / ``weight`` buffers.
+
+    *values* is NaN wherever the input does not cover the voxel and may be
+    modified.  Every reducer except ``max`` is a single pass over these two
+    buffers; :func:`_finish_weighted` turns them into the result.
+    """
+    covered = ~np.isnan(values)
+    if reducer == "mean":
+        np.add(total, values, out=total, where=covered)
+        np.add(weight, 1.0, out=weight, where=covered)
+    elif reducer == "feather":
+        feather[~covered] = 0.0
+        values[~covered] = 0.0
+        total += values * feather
+        weight += feather
+    elif reducer == "first":
+        take = covered & (weight == 0)
+        total[take] = values[take]
+        weight[take] = 1.0
+    elif reducer == "last":
+        total[covered] = values[covered]
+        weight[covered] = 1.0
+    else:
+        raise ValueError(f"Unknown reducer: {reducer!r}")
+
+
+def _finish_weighted(total: np.ndarray, weight: np.ndarray, default_value: float) -> None:
+    """Divide *total* by *weight* in place; voxels nothing covered get *default_value*."""
+    covered = weight > 0
+    np.divide(total, weight, out=total, where=covered)
+    total[~covered] = default_value
+
+
+def _ordered_map(func, items, jobs: int):
+    """Yield ``func(item)`` for each item, in order, using up to *jobs* threads.
+
+    At most ``2 * jobs`` results are in flight at once, so memory stays
+    bounded by the window rather than by the number of items.  With
+    ``jobs <= 1`` this is a plain lazy ``map``.
+    """
+    if jobs <= 1:
+        yield from map(func, items)
+        return
+
+    window = 2 * jobs
+    with ThreadPoolExecutor(max_workers=jobs) as executor:
+        pending: deque = deque()
+        for item in items:
+            pending.append(executor.submit(func, item))
+            if len(pending) >= window:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def _stack_array(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    images: list[sitk.Image | ImageHeader],
+    size: tuple[int, ...],
+    spacing: tuple[float, ...],
+    origin: tuple[float, ...],
+    direction: tuple[float, ...],
+    interpolator: int,
+    default_value: float,
+    jobs: int = 1,
+    reducer: str = "max",
+    cache: ResampleCache | None = None,
+    decoded: DecodeLog | None = None,
+) -> np.ndarray:
+    """Combine *images* into a ``(Z, Y, X)`` float32 array on the grid.
+
+    This is the array-level core of :func:`stack_images`; returning the
+    accumulator itself lets callers post-process it in place (e.g. gap
+    filling) before paying for the conversion to an image.  *decoded*
+    counts decode throughput and skipped DICOM slices (see
+    :func:`_resample_footprint`).
+    """
+    if not images:
+        raise ValueError("stack_images requires at least one input image.")
+    if jobs <= 0:
+        raise ValueError(f"jobs must be a positive integer, got {jobs}.")
+    if reducer not in REDUCERS:
+        raise ValueError(
+            f"Unknown reducer {reducer!r}; choose from {', '.join(REDUCERS)}."
+        )
+
+    grid = (tuple(size), tuple(spacing), tuple(origin), tuple(direction))
+    shape = tuple(reversed(size))
+
+    if reducer != "max":
+        # Resample with a NaN pad so each input's coverage is known exactly.
+        total = np.zeros(shape, dtype=np.float32)
+        weight = np.zeros(shape, dtype=np.float32)
+
+        def resample_weighted(img: sitk.Image | ImageHeader):
+            region, resampled = _resample_footprint(
+                img, grid, interpolator, np.nan, cache, decoded
+            )
+            feather = None
+            if region is not None and reducer == "feather":
+                feather = _feather_weights(img, grid, region)
+            return region, resampled, feather
+
+        for region, resampled, feather in _ordered_map(resample_weighted, images, jobs):
+            if region is None:
+                continue
+            view = tuple(
+                slice(region[0][axis], region[0][axis] + region[1][axis])
+                for axis in (2, 1, 0)
+            )
+            _accumulate(
+                reducer, total[view], weight[view],
+                sitk.GetArrayFromImage(resampled), feather,
+            )
+            del resampled, feather
+
+        _finish_weighted(total, weight, default_value)
+        return total
 
     # Combine with max in float32 to avoid precision loss, and keep float output.
-    combined = sitk.Cast(resampled[0], sitk.sitkFloat32)
-    for r in resampled[1:]:
-        combined = sitk.Maximum(combined, sitk.Cast(r, sitk.sitkFloat32))
+    combined = np.full(shape, -np.inf, dtype=np.float32)
+    common: tuple[tuple[int, ...], tuple[int, ...]] | None = (
+        (0, 0, 0), tuple(size)
+    )
+
+    def resample(img: sitk.Image | ImageHeader):
+        return _resample_footprint(img, grid, interpolator, default_value, cache, decoded)
+
+    for region, resampled in _ordered_map(resample, images, jobs):
+        common = _intersect_boxes(common, region)
+        if region is None:
+            continue
+        index, sub_size = region
+        target = combined[
+            index[2]:index[2] + sub_size[2],
+            index[1]:index[1] + sub_size[1],
+            index[0]:index[0] + sub_size[0],
+        ]
+        np.maximum(target, sitk.GetArrayViewFromImage(resampled), out=target)
+        del resampled
+
+    _pad_outside(combined, common, default_value)
     return combined
 
 
+def _array_to_image(
+    arr: np.ndarray,
+    spacing: tuple[float, ...],
+    origin: tuple[float, ...],
+    direction: tuple[float, ...],
+) -> sitk.Image:
+    """Wrap a ``(Z, Y, X)`` array as an image on the given grid."""
+    result = sitk.GetImageFromArray(arr)
+    result.SetSpacing(spacing)
+    result.SetOrigin(origin)
+    result.SetDirection(direction)
+    return result
+
+
+def stack_images(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+    images: list[sitk.Image | ImageHeader],
+    size: tuple[int, ...],
+    spacing: tuple[float, ...],
+    origin: tuple[float, ...],
+    direction: tuple[float, ...],
+    interpolator: int,
+    default_value: float,
+    jobs: int = 1,
+    reducer: str = "max",
+    cache: ResampleCache | None = None,
+) -> sitk.Image:
+    """
+    Resample all images onto the reference grid and combine them voxelwise.
+
+    By default (``reducer="max"``) the combined value is the maximum at each
+    voxel, with *default_value* competing everywhere (foreground wins over
+    padding).  The other reducers in :data:`REDUCERS` only combine inputs
+    that actually cover a voxel and give *default_value* where none do:
+    ``"mean"`` averages them, ``"feather"`` weights each by its distance to
+    its own edge (see :func:`_feather_weights`) so seams blend smoothly, and
+    ``"first"``/``"last"`` take the first or last covering input in list
+    order.  These are single-pass running sums: one float32 total and one
+    float32 weight buffer, so they cost one extra output-sized buffer
+    compared with ``"max"`` and no extra passes.
+
+    Inputs are resampled one at a time and folded into a single float32
+    accumulator, so peak memory is about twice the output volume no matter
+    how many inputs there are.  Each input is only resampled over the
+    sub-region of the grid its bounding box intersects (see
+    :func:`_reference_region`); everywhere else it would contribute nothing
+    but *default_value*, which is folded in once at the end.
+
+    With ``jobs > 1`` inputs are resampled concurrently in a thread pool
+    (SimpleITK releases the GIL inside filters).  Results are still folded
+    in input order, so the output is identical to the serial path.
+
+    *images* may mix decoded images and :class:`ImageHeader` objects; headers
+    are read one at a time while resampling.  Pass a :class:`ResampleCache`
+    to reuse resampled headers from earlier runs.
+    """
+    combined = _stack_array(
+        images, size, spacing, origin, direction, interpolator, default_value, jobs,
+        reducer, cache,
+    )
+    return _array_to_image(combined, spacing, origin, direction)
+
+
+_METAIMAGE_ELEMENT_TYPES = {
+    np.dtype(np.uint8):   "MET_UCHAR",
+    np.dtype(np.int8):    "MET_CHAR",
+    np.dtype(np.uint16):  "MET_USHORT",
+    np.dtype(np.int16):   "MET_SHORT",
+    np.dtype(np.uint32):  "MET_UINT",
+    np.dtype(np.int32):   "MET_INT",
+    np.dtype(np.uint64):  "MET_ULONG_LONG",
+    np.dtype(np.int64):   "MET_LONG_LONG",
+    np.dtype(np.float32): "MET_FLOAT",
+    np.dtype(np.float64): "MET_DOUBLE",
+}
+
+
+def _pixel_dtype(pixel_id: int) -> np.dtype:
+    """Return the NumPy dtype SimpleITK uses for the scalar *pixel_id*."""
+    probe = sitk.Image([1, 1, 1], pixel_id)
+    if probe.GetNumberOfComponentsPerPixel() != 1:
+        raise ValueError(
+            f"Pixel type {probe.GetPixelIDTypeAsString()} is not a scalar type."
+        )
+    return sitk.GetArrayViewFromImage(probe).dtype
+
+
+class MetaImageSlabWriter:
+    """Write a 3-D MetaImage (``.mha`` or ``.mhd`` + ``.raw``) one Z slab at a time.
+
+    The header is written up front from the known grid, and pixel data is
+    appended as slabs arrive, so the whole volume never has to be in memory.
+    Data is written uncompressed.  Use as a context manager; leaving the
+    block checks that every plane was written.
+    """
+
+    def __init__(  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        self,
+        path: str,
+        size: tuple[int, ...],
+        spacing: tuple[float, ...],
+        origin: tuple[float, ...],
+        direction: tuple[float, ...],
+        dtype: np.dtype,
+    ) -> None:
+        dtype = np.dtype(dtype)
+        if dtype not in _METAIMAGE_ELEMENT_TYPES:
+            raise ValueError(f"Unsupported MetaImage element type: {dtype}")
+        suffix = os.path.splitext(path)[1].lower()
+        if suffix not in (".mha", ".mhd"):
+            raise ValueError(f"{path}: slab output must be a .mha or .mhd file.")
+
+        self.size = tuple(int(v) for v in size)
+        self.dtype = dtype
+        self.planes_written = 0
+
+        if suffix == ".mhd":
+            data_path = os.path.splitext(path)[0] + ".raw"
+            data_file = os.path.basename(data_path)
+        else:
+            data_path = path
+            data_file = "LOCAL"
+
+        # MetaIO stores the direction matrix column-major.
+        transform = np.array(direction, dtype=float).reshape(3, 3).T.flatten()
+        header = "".join(
+            f"{key} = {value}\n"
+            for key, value in (
+                ("ObjectType", "Image"),
+                ("NDims", "3"),
+                ("BinaryData", "True"),
+                ("BinaryDataByteOrderMSB", "False"),
+                ("CompressedData", "False"),
+                ("TransformMatrix", " ".join(repr(float(v)) for v in transform)),
+                ("Offset", " ".join(repr(float(v)) for v in origin)),
+                ("CenterOfRotation", "0 0 0"),
+                ("ElementSpacing", " ".join(repr(float(v)) for v in spacing)),
+                ("DimSize", " ".join(str(v) for v in self.size)),
+                ("ElementType", _METAIMAGE_ELEMENT_TYPES[dtype]),
+                ("ElementDataFile", data_file),
+            )
+        )
+
+        if data_path == path:
+            self._data = open(path, "wb")  # pylint: disable=consider-using-with
+            self._data.write(header.encode("ascii"))
+        else:
+            with open(path, "w", encoding="ascii") as f:
+                f.write(header)
+            self._data = open(data_path, "wb")  # pylint: disable=consider-using-with
+
+    def write(self, slab: np.ndarray) -> None:
+        """Append a ``(Z, Y, X)`` slab of planes, casting to the output type."""
+        if slab.shape[1:] != (self.size[1], self.size[0]):
+            raise ValueError(
+                f"Slab shape {slab.shape} does not match output size {self.size}."
+            )
+        if self.planes_written + slab.shape[0] > self.size[2]:
+            raise ValueError("More planes written than the output size allows.")
+        # Little-endian, as declared in the header.
+        out = slab.astype(self.dtype.newbyteorder("<"), copy=False)
+        self._data.write(np.ascontiguousarray(out).tobytes())
+        self.planes_written += slab.shape[0]
+
+    def close(self) -> None:
+        """Close the data file; raise if the volume is incomplete."""
+        if self._data.closed:
+            return
+        self._data.close()
+        if self.planes_written != self.size[2]:
+            raise RuntimeError(
+                f"Only {self.planes_written} of {self.size[2]} planes were written."
+            )
+
+    def __enter__(self) -> "MetaImageSlabWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self._data.close()
+
+
+def _slab_grid(
+    grid: tuple[tuple[int, ...], tuple[float, ...], tuple[float, ...], tuple[float, ...]],
+    z0: int,
+    z1: int,
+) -> tuple[tuple[int, ...], tuple[float, ...], tuple[float, ...], tuple[float, ...]]:
+    """Return the sub-grid of *grid* covering output planes ``z0 .. z1-1``."""
+    size, spacing, origin, direction = grid
+    rotation = np.array(direction, dtype=float).reshape(3, 3)
+    sub_origin = np.array(origin) + rotation[:, 2] * (z0 * spacing[2])
+    return (
+        (size[0], size[1], z1 - z0),
+        spacing,
+        tuple(float(v) for v in sub_origin),
+        direction,
+    )
+
+
+def write_slabs(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals,too-many-statements
+    images: list[sitk.Image | ImageHeader],
+    grid: tuple[tuple[int, ...], tuple[float, ...], tuple[float, ...], tuple[float, ...]],
+    output_path: str,
+    slab_planes: int,
+    interpolator: int,
+    default_value: float,
+    *,
+    pixel_id: int = sitk.sitkFloat32,
+    covered: list[int] | None = None,
+    jobs: int = 1,
+    reducer: str = "max",
+    cache: ResampleCache | None = None,
+    decoded: DecodeLog | None = None,
+) -> None:
+    """Resample, combine and write the output volume slab by slab.
+
+    The reference grid is processed in slabs of *slab_planes* Z planes.  For
+    each slab only the inputs whose footprint intersects it are resampled and
+    combined, the slab is gap-filled (when *covered* is given) and then
+    appended to a streaming MetaImage file, so memory is bounded by the slab
+    size plus the inputs in flight rather than by the whole output.
+
+    Gap filling only ever blends the nearest covered planes, so a slab needs
+    at most two halo planes from outside it: the last covered plane below
+    and the first covered plane above.  These are rendered alongside the
+    slab, except that a covered plane already rendered (the last one of the
+    previous slab, or a halo still ahead) is reused.  The result matches
+    :func:`stack_images` + :func:`fill_slice_gaps`.
+
+    With a *decoded* log, DICOM slices whose pixel data cannot be decoded
+    are skipped (see :func:`_resample_footprint`) and not retried in later
+    slabs; a plane left without any decoded slice is dropped from *covered*
+    and gap-filled instead.
+    """
+    if slab_planes <= 0:
+        raise ValueError(f"slab_planes must be a positive integer, got {slab_planes}.")
+    if not images:
+        raise ValueError("write_slabs requires at least one input image.")
+
+    size, spacing, origin, direction = grid
+    regions = [_reference_region(img, size, spacing, origin, direction) for img in images]
+    covered = sorted(covered) if covered else []
+    covered_set = set(covered)
+    # Output plane of each DICOM slice and number of slices per covered plane,
+    # so a plane can be uncovered once all of its slices failed to decode.
+    plane_of = {}
+    if covered and decoded is not None:
+        for img in images:
+            if isinstance(img, ImageHeader) and img.dicom:
+                plane_of[img.path] = _covered_z_planes([img], *grid)
+    slices_on = Counter(z for planes in plane_of.values() for z in planes)
+    failed: set[str] = set()
+    # Rendered covered planes kept for reuse as halo planes.
+    kept: dict[int, np.ndarray] = {}
+
+    def render(z0: int, z1: int) -> np.ndarray:
+        candidates = [
+            img for img, region in zip(images, regions)
+            if region is not None
+            and region[0][2] < z1 and region[0][2] + region[1][2] > z0
+            and not (isinstance(img, ImageHeader) and img.path in failed)
+        ]
+        if not candidates:
+            return np.full((z1 - z0, size[1], size[0]), default_value, dtype=np.float32)
+        sub_size, _, sub_origin, _ = _slab_grid(grid, z0, z1)
+        seen = len(decoded.failures) if decoded is not None else 0
+        arr = _stack_array(
+            candidates, sub_size, spacing, sub_origin, direction,
+            interpolator, default_value, jobs, reducer, cache, decoded,
+        )
+        for path, _ in decoded.failures[seen:] if decoded is not None else ():
+            failed.add(path)
+            for z in plane_of.get(path, ()):
+                slices_on[z] -= 1
+                if slices_on[z] == 0 and z in covered_set:
+                    covered.remove(z)
+                    covered_set.discard(z)
+        if reducer == "max" and len(candidates) < len(images):
+            # Inputs that miss this slab contribute padding everywhere in it.
+            np.maximum(arr, default_value, out=arr)
+        return arr
+
+    def covered_plane(z: int) -> np.ndarray:
+        if z not in kept:
+            kept[z] = render(z, z + 1)
+        return kept[z]
+
+    def fill_gaps(slab: np.ndarray, z0: int, z1: int) -> np.ndarray:
+        # A halo plane whose slices fail to decode is uncovered by render(),
+        # so pick the halos again until both render cleanly.
+        while covered and not covered_set.issuperset(range(z0, z1)):
+            seen = len(covered)
+            pos_lo = bisect.bisect_left(covered, z0)
+            pos_hi = bisect.bisect_left(covered, z1)
+            below = covered[pos_lo - 1:pos_lo] if pos_lo > 0 else []
+            above = covered[pos_hi:pos_hi + 1]
+            parts = [covered_plane(z) for z in below] + [slab]
+            parts += [covered_plane(z) for z in above]
+            planes = below + list(range(z0, z1)) + above
+            if len(covered) < seen:
+                continue
+            halo = np.concatenate(parts) if len(parts) > 1 else slab
+            _fill_slice_gaps_inplace(halo, covered, np.array(planes))
+            return halo[len(below):len(below) + (z1 - z0)]
+        return slab
+
+    with MetaImageSlabWriter(
+        output_path, size, spacing, origin, direction, _pixel_dtype(pixel_id)
+    ) as writer:
+        for z0 in range(0, size[2], slab_planes):
+            z1 = min(size[2], z0 + slab_planes)
+            slab = fill_gaps(render(z0, z1), z0, z1)
+            logging.info("  wrote planes %d-%d of %d", z0, z1 - 1, size[2])
+            writer.write(slab)
+            # Gap filling leaves covered planes untouched, so the slab's last
+            # one is the next slab's lower halo; older planes are not needed.
+            pos = bisect.bisect_left(covered, z1)
+            if pos > 0 and covered[pos - 1] >= z0:
+                kept[covered[pos - 1]] = slab[covered[pos - 1] - z0:][:1].copy()
+            lowest = covered[pos - 1] if pos > 0 else z1
+            for z in [z for z in kept if z < lowest]:
+                del kept[z]
+
+
 def parse_args(argv: list[str]) -> argparse.Namespace:
     """Parse command-line arguments and return the populated Namespace."""
     parser = argparse.ArgumentParser(
@@ -443,9 +1647,23 @@ def parse_args(argv: list[str]) -> argparse.Namespace:
                              "(may be repeated for multiple series).")
     parser.add_argument("-p", "--pad", type=float, default=0.0, metavar="VALUE",
                         help="Fill value for voxels outside all inputs (default: 0).")
+    parser.add_argument("-c", "--combine", default="max", choices=list(REDUCERS),
+                        help="How overlapping inputs are combined (default: max).")
     parser.add_argument("-T", "--type", default=None, dest="pixel_type",
                         choices=list(PIXEL_TYPES),
                         help="Output pixel type (default: same as first input).")
+    parser.add_argument("-j", "--jobs", type=int, default=1, metavar="N",
+                        help="Number of threads used to read DICOM slices and "
+                             "resample inputs (default: 1).")
+    parser.add_argument("--slab", type=int, default=None, metavar="PLANES",
+                        help="Build and write the output PLANES Z planes at a time "
+                             "(out-of-core; output must be .mha or .mhd).")
+    parser.add_argument("--cache-dir", default=None, metavar="DIR",
+                        help="Cache resampled inputs in DIR and reuse them on "
+                             "later runs with the same input, grid and interpolator.")
+    parser.add_argument("--cache-size", type=float, default=2048.0, metavar="MB",
+                        help="Evict least recently used cache entries beyond "
+                             "this many MiB (default: 2048).")
     parser.add_argument("-v", "--verbose", action="store_true",
                         help="Print progress information.")
     return parser.parse_args(argv)
@@ -462,7 +1680,27 @@ def build_spacing(args: argparse.Namespace) -> list[float] | None:
     return None
 
 
-def main(argv: list[str] | None = None) -> int:  # pylint: disable=too-many-locals
+def _log_cache_stats(cache: ResampleCache | None) -> None:
+    """Log how many resampled inputs came from the cache."""
+    if cache is not None:
+        logging.info("  cache: %d hit(s), %d miss(es)", cache.hits, cache.misses)
+
+
+def _report_decoding(decoded: DecodeLog, images: list) -> bool:
+    """Log decode throughput and skipped DICOM slices; return True if every input failed."""
+    decoded.log_throughput()
+    failures = decoded.failures
+    if not failures:
+        return False
+    n_dicom = sum(isinstance(img, ImageHeader) and img.dicom for img in images)
+    logging.warning("%d of %d DICOM slice(s) could not be decoded.", len(failures), n_dicom)
+    if len(failures) < len(images):
+        return False
+    print(f"Error: could not decode any DICOM slice: {failures[0][1]}")
+    return True
+
+
+def main(argv: list[str] | None = None) -> int:  # pylint: disable=too-many-locals,too-many-statements,too-many-branches,too-many-return-statements
     """Entry point: parse arguments, resample inputs, write output."""
     args = parse_args(sys.argv[1:] if argv is None else argv)
 
@@ -477,32 +1715,49 @@ def main(argv: list[str] | None = None) -> int:  # pylint: disable=too-many-loca
 
     *input_paths, output_path = args.inputs
 
+    if args.jobs <= 0:
+        print("Error: --jobs must be a positive integer.")
+        return 1
+    if args.cache_size <= 0:
+        print("Error: --cache-size must be positive.")
+        return 1
+    if args.slab is not None:
+        if args.slab <= 0:
+            print("Error: --slab must be a positive integer.")
+            return 1
+        if os.path.splitext(output_path)[1].lower() not in (".mha", ".mhd"):
+            print("Error: --slab requires a .mha or .mhd output file.")
+            return 1
+
     logging.basicConfig(
         level=logging.INFO if args.verbose else logging.WARNING,
         format="%(message)s",
     )
 
-    # Load images.
-    dicom_slices: list[sitk.Image] = []
+    # Read image information only; pixel data is decoded one input at a
+    # time while resampling.
+    dicom_slices: list[ImageHeader] = []
 
-    # Per-slice DICOM loading (handles irregular spacing / gaps).
+    # Per-slice DICOM headers (handles irregular spacing / gaps).
     for dicom_dir in (args.dicom_dirs or []):
-        logging.info("Loading DICOM series from %s (per-slice)", dicom_dir)
-        slices = load_dicom_slices(dicom_dir, thickness=args.thickness)
+        logging.info("Reading DICOM series information from %s (per-slice)", dicom_dir)
+        slices = read_dicom_headers(
+            dicom_dir, thickness=args.thickness, workers=args.jobs
+        )
         logging.info("  found %d slice(s)", len(slices))
         dicom_slices.extend(slices)
 
-    images: list[sitk.Image] = list(dicom_slices)
+    images: list[ImageHeader] = list(dicom_slices)
     for p in input_paths:
-        logging.info("Loading %s", p)
-        images.append(load_image(p, thickness=args.thickness))
+        logging.info("Reading image information from %s", p)
+        images.append(read_image_header(p, thickness=args.thickness))
 
     # Resolve spacing.
     requested_spacing = build_spacing(args)
 
     # If per-axis spacing has None entries, fill from finest input spacing.
     if requested_spacing is not None and any(v is None for v in requested_spacing):
-        finest = [min(img.GetSpacing()[i] for img in images) for i in range(3)]
+        finest = [min(img.spacing[i] for img in images) for i in range(3)]
         requested_spacing = [
             requested_spacing[i] if requested_spacing[i] is not None else finest[i]
             for i in range(3)
@@ -511,39 +1766,87 @@ def main(argv: list[str] | None = None) -> int:  # pylint: disable=too-many-loca
     # Remember the pixel type of the first *positional* input if provided; otherwise
     # fall back to the first DICOM slice.
     first_input_img = images[len(dicom_slices)] if input_paths else images[0]
-    input_pixel_type = first_input_img.GetPixelID()
+    input_pixel_type = first_input_img.pixel_id
 
     # Compute the reference grid.
+    # This only needs geometry, so bad spacing fails before any decode.
     logging.info("Computing reference grid …")
-    size, spacing, origin, direction = compute_reference_grid(images, requested_spacing)
+    try:
+        size, spacing, origin, direction = compute_reference_grid(images, requested_spacing)
+    except ValueError as exc:
+        print(f"Error: {exc}")
+        return 1
     logging.info("  output size:    %s", size)
     logging.info("  output spacing: %s mm", spacing)
     logging.info("  output origin:  %s", origin)
 
     interpolator = INTERPOLATORS[args.interp]
 
-    # Resample and combine.
-    logging.info("Resampling %d image(s) …", len(images))
-    volume = stack_images(
-        images, size, spacing, origin, direction, interpolator, args.pad
-    )
-
     # Fill gaps between irregularly-spaced DICOM slices by linear interpolation.
     # Only do this in DICOM-only mode; otherwise it can overwrite data coming
     # from non-DICOM inputs that happen to lie on uncovered Z planes.
+    covered = None
     if dicom_slices and not input_paths:
-        logging.info("Filling gaps between DICOM slices …")
         covered = _covered_z_planes(dicom_slices, size, spacing, origin, direction)
         logging.info(
             "  %d / %d Z planes covered by input slices", len(covered), size[2]
         )
-        volume = fill_slice_gaps(volume, covered, args.pad)
     elif dicom_slices:
         logging.warning(
             "Skipping DICOM gap filling because non-DICOM inputs are also provided."
         )
+
     # Cast to the requested output type, or fall back to the first input's type.
     out_pixel_type = PIXEL_TYPES[args.pixel_type] if args.pixel_type else input_pixel_type
+
+    cache = None
+    if args.cache_dir:
+        cache = ResampleCache(args.cache_dir, int(args.cache_size * 1024 * 1024))
+
+    # DICOM slices whose pixel data fails to decode are skipped, like
+    # slices whose header could not be read.
+    decoded = DecodeLog()
+
+    if args.slab is not None:
+        logging.info(
+            "Resampling %d image(s) in slabs of %d plane(s) into %s …",
+            len(images), args.slab, output_path,
+        )
+        write_slabs(
+            images, (size, spacing, origin, direction), output_path, args.slab,
+            interpolator, args.pad,
+            pixel_id=out_pixel_type, covered=covered, jobs=args.jobs,
+            reducer=args.combine, cache=cache, decoded=decoded,
+        )
+        _log_cache_stats(cache)
+        if _report_decoding(decoded, images):
+            os.remove(output_path)
+            if output_path.lower().endswith(".mhd"):
+                os.remove(os.path.splitext(output_path)[0] + ".raw")
+            return 1
+        return 0
+
+    # Resample and combine.
+    logging.info("Resampling %d image(s) …", len(images))
+    combined = _stack_array(
+        images, size, spacing, origin, direction, interpolator, args.pad,
+        jobs=args.jobs, reducer=args.combine, cache=cache, decoded=decoded,
+    )
+    _log_cache_stats(cache)
+    if _report_decoding(decoded, images):
+        return 1
+    if covered is not None:
+        if decoded.failures:
+            failed = {path for path, _ in decoded.failures}
+            covered = _covered_z_planes(
+                [img for img in dicom_slices if img.path not in failed],
+                size, spacing, origin, direction,
+            )
+        logging.info("Filling gaps between DICOM slices …")
+        _fill_slice_gaps_inplace(combined, covered)
+    volume = _array_to_image(combined, spacing, origin, direction)
+    del combined
+
     if volume.GetPixelID() != out_pixel_type:
         volume = sitk.Cast(volume, out_pixel_type)
 
@@ -1,22 +1,39 @@
 #! /usr/bin/env python
 # /// script
 # dependencies = [
+#   "numpy",
 #   "vtk",
 # ]
 # ///
 
 """Split a 3D image into a grid of .vti pieces and a matching .pvti master."""
 
+# pylint: disable=too-many-lines
+
 from __future__ import annotations
 
+from abc import ABC, abstractmethod
 import argparse
-from concurrent.futures import ProcessPoolExecutor
-from dataclasses import dataclass
+import base64
+import hashlib
+import heapq
+import json
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, replace
+import lzma
+from multiprocessing import shared_memory
 import os
 from pathlib import Path
+import tempfile
+import threading
+import time
+from xml.sax.saxutils import quoteattr
 import xml.etree.ElementTree as ET
+import zlib
 
+import numpy as np
 import vtk
+from vtk.util.numpy_support import numpy_to_vtk, vtk_to_numpy
 
 
 @dataclass(frozen=True)
@@ -30,21 +47,147 @@ class ImageGeometry:
     cell_data: object
 
 
+# Piece writers: "direct" encodes VTI files straight from NumPy views of the
+# source, "vtk" runs vtkExtractVOI + vtkXMLImageDataWriter per piece.
+PIECE_WRITERS = ("direct", "vtk")
+
+# Compressor name -> VTK compressor class written in the VTI header.
+COMPRESSORS = {
+    "none": None,
+    "zlib": "vtkZLibDataCompressor",
+    "lz4": "vtkLZ4DataCompressor",
+    "lzma": "vtkLZMADataCompressor",
+}
+
+# Binary layouts: "appended" raw data after the XML, or base64 "inline"
+# inside each DataArray element.
+ENCODINGS = ("appended", "inline")
+
+# Handling of constant-valued pieces: "write" them like any other, "skip"
+# them (no file, no .pvti entry) or write a compressed "stub".
+EMPTY_PIECES = ("write", "skip", "stub")
+
+# Piece layouts: a uniform nx x ny x nz "grid", or an adaptive "octree" whose
+# pieces are balanced by non-background payload.
+SPLIT_MODES = ("grid", "octree")
+
+# How ``jobs > 1`` workers run: separate "process"es sharing the decoded
+# source through shared memory, or "thread"s writing from the one in-memory
+# source (VTK writers and zlib release the GIL while encoding).
+PARALLEL_MODES = ("process", "thread")
+
+_BLOCK_SIZE = 32768
+
+# Width reserved for an appended ``offset="N"`` attribute: a UInt64 offset
+# has at most 20 digits.
+_OFFSET_WIDTH = len('offset=""') + 20
+
+# XML description of the ghost cell/point array added by ``--ghost``.
+_GHOST_METADATA = {
+    "type": "UInt8",
+    "Name": vtk.vtkDataSetAttributes.GhostArrayName(),
+}
+
+
 @dataclass(frozen=True)
-class SplitOptions:
-    """Grid and parallelism options used by split_vti."""
+class SplitOptions:  # pylint: disable=too-many-instance-attributes
+    """Grid, parallelism and piece-encoding options used by split_vti."""
 
     nx: int
     ny: int
     nz: int
     jobs: int = 1
-
-    def validate(self) -> None:
+    writer: str = "direct"
+    compressor: str = "zlib"
+    level: int = -1
+    block_size: int = _BLOCK_SIZE
+    encoding: str = "appended"
+    ghost: int = 0
+    empty: str = "write"
+    split: str = "grid"
+    target_bytes: int = 0
+    background: float | None = 0.0
+    resume: bool = False
+    stream: bool = False
+    parallel: str = "process"
+    arrays: tuple[str, ...] | None = None
+
+    def validate(self) -> None:  # pylint: disable=too-many-branches
         """Validate split and parallelism settings."""
         if self.nx <= 0 or self.ny <= 0 or self.nz <= 0:
             raise ValueError("nx, ny, and nz must all be positive integers.")
         if self.jobs <= 0:
             raise ValueError("jobs must be a positive integer.")
+        if self.writer not in PIECE_WRITERS:
+            raise ValueError(
+                f"writer must be one of {', '.join(PIECE_WRITERS)}, got {self.writer!r}."
+            )
+        if self.compressor not in COMPRESSORS:
+            raise ValueError(
+                f"compressor must be one of {', '.join(COMPRESSORS)}, "
+                f"got {self.compressor!r}."
+            )
+        if not -1 <= self.level <= 9:
+            raise ValueError(f"level must be between -1 and 9, got {self.level}.")
+        if self.block_size <= 0:
+            raise ValueError("block_size must be a positive integer.")
+        if self.encoding not in ENCODINGS:
+            raise ValueError(
+                f"encoding must be one of {', '.join(ENCODINGS)}, got {self.encoding!r}."
+            )
+        if self.ghost < 0:
+            raise ValueError("ghost must be a non-negative integer.")
+        if self.empty not in EMPTY_PIECES:
+            raise ValueError(
+                f"empty must be one of {', '.join(EMPTY_PIECES)}, got {self.empty!r}."
+            )
+        if self.split not in SPLIT_MODES:
+            raise ValueError(
+                f"split must be one of {', '.join(SPLIT_MODES)}, got {self.split!r}."
+            )
+        if self.target_bytes < 0:
+            raise ValueError("target_bytes must be a non-negative integer.")
+        if self.stream and self.split == "octree":
+            raise ValueError(
+                "octree splitting scans the whole volume and cannot be streamed."
+            )
+        if self.arrays is not None and not self.arrays:
+            raise ValueError("arrays must name at least one array.")
+        if self.parallel not in PARALLEL_MODES:
+            raise ValueError(
+                f"parallel must be one of {', '.join(PARALLEL_MODES)}, "
+                f"got {self.parallel!r}."
+            )
+        _block_compressor(self.compressor, self.level)
+
+
+@dataclass(frozen=True)
+class SharedArray:
+    """Layout of one data array inside a shared source buffer."""
+
+    name: str
+    association: str
+    dtype: str
+    shape: tuple[int, ...]
+    offset: int
+    active_scalars: bool = False
+
+
+@dataclass(frozen=True)
+class SharedVolume:
+    """Picklable description of a source image held in shared memory.
+
+    Worker processes attach to the block by name and wrap the arrays as
+    ``vtkImageData`` without copying, so the volume is decoded once and
+    held in memory once no matter how many workers there are.
+    """
+
+    shm_name: str
+    extent: tuple[int, ...]
+    origin: tuple[float, ...]
+    spacing: tuple[float, ...]
+    arrays: tuple[SharedArray, ...]
+    direction: tuple[float, ...] = (1.0, 0.0, 0.0, 0.0, 1.0, 0.0, 0.0, 0.0, 1.0)
 
 
 def calculate_splits(min_val: int, max_val: int, num_splits: int) -> list[tuple[int, int]]:
@@ -117,7 +260,9 @@ def _array_metadata(array) -> dict[str, str]:
     return metadata
 
 
-def _build_data_section(parent, data_obj, section_tag: str) -> None:
+def _build_data_section(
+    parent, data_obj, section_tag: str, ghost_array: bool = False
+) -> None:
     """Populate a PPointData/PCellData section with array descriptors."""
     section = ET.SubElement(parent, section_tag)
     arrays = data_obj.GetNumberOfArrays()
@@ -126,15 +271,26 @@ def _build_data_section(parent, data_obj, section_tag: str) -> None:
         if array is None:
             continue
         ET.SubElement(section, "PDataArray", _array_metadata(array))
+    if ghost_array:
+        ET.SubElement(section, "PDataArray", _GHOST_METADATA)
 
 
-def write_pvti_header(
+def write_pvti_header(  # pylint: disable=too-many-arguments,too-many-positional-arguments
     pvti_filename: str,
     geometry: ImageGeometry,
     piece_extents: list[list[int]],
     base_name: str,
+    ghost_level: int = 0,
+    skipped: list[int] | None = None,
 ) -> None:
-    """Create the master .pvti file that references each .vti piece."""
+    """Create the master .pvti file that references each .vti piece.
+
+    With ``ghost_level > 0`` the piece extents are expected to include their
+    ghost layers, and a ``vtkGhostType`` array is declared for both points
+    and cells.  Piece IDs in *skipped* have no file and are left out, so the
+    pieces no longer cover the whole extent; vtkXMLPImageDataReader only
+    reads update extents inside the remaining pieces.
+    """
     root = ET.Element(
         "VTKFile",
         {
@@ -152,14 +308,17 @@ def write_pvti_header(
             "WholeExtent": " ".join(map(str, geometry.global_extent)),
             "Origin": " ".join(map(str, geometry.origin)),
             "Spacing": " ".join(map(str, geometry.spacing)),
-            "GhostLevel": "0",
+            "GhostLevel": str(ghost_level),
         },
     )
 
-    _build_data_section(p_image, geometry.point_data, "PPointData")
-    _build_data_section(p_image, geometry.cell_data, "PCellData")
+    _build_data_section(p_image, geometry.point_data, "PPointData", ghost_level > 0)
+    _build_data_section(p_image, geometry.cell_data, "PCellData", ghost_level > 0)
 
+    skipped = set(skipped or ())
     for i, extent in enumerate(piece_extents):
+        if i in skipped:
+            continue
         ET.SubElement(
             p_image,
             "Piece",
@@ -171,7 +330,9 @@ def write_pvti_header(
 
     tree = ET.ElementTree(root)
     ET.indent(tree, space="  ")
-    tree.write(pvti_filename, encoding="utf-8", xml_declaration=True)
+    partial = f"{pvti_filename}.part"
+    tree.write(partial, encoding="utf-8", xml_declaration=True)
+    os.replace(partial, pvti_filename)
 
 
 def _validate_source_data(source_data, input_file: str) -> None:
@@ -181,7 +342,10 @@ def _validate_source_data(source_data, input_file: str) -> None:
     if source_data.GetDataDimension() != 3:
         raise ValueError("This script expects a 3D vtkImageData dataset.")
 
-    extent = source_data.GetExtent()
+    _validate_extent(source_data.GetExtent())
+
+
+def _validate_extent(extent) -> None:
     if extent[1] <= extent[0] or extent[3] <= extent[2] or extent[5] <= extent[4]:
         raise ValueError(f"Invalid image extent: {extent}")
 
@@ -258,6 +422,168 @@ def _build_image_reader(input_file: str):
     )
 
 
+class _StreamingReader(ABC):  # pylint: disable=too-few-public-methods
+    """Reads sub-extents of an image file without loading the whole volume."""
+
+    whole_extent: list[int]
+
+    @abstractmethod
+    def read(self, extent: list[int]):
+        """Return vtkImageData covering at least *extent*."""
+
+
+class _VTKStreamingReader(_StreamingReader):  # pylint: disable=too-few-public-methods
+    """Streams through a VTK reader by requesting one update extent at a time.
+
+    Readers that cannot read sub-extents still produce correct data, but
+    load the whole volume.
+    """
+
+    def __init__(self, reader) -> None:
+        reader.UpdateInformation()
+        self.reader = reader
+        self.whole_extent = list(reader.GetOutputInformation(0).Get(
+            vtk.vtkStreamingDemandDrivenPipeline.WHOLE_EXTENT()
+        ))
+
+    def read(self, extent: list[int]):
+        self.reader.UpdateExtent(extent)
+        return self.reader.GetOutput()
+
+
+def _metaimage_is_compressed(input_file: str) -> bool:
+    """Return True if a MetaImage header declares ``CompressedData = True``."""
+    with open(input_file, "rb") as f:
+        for line in f:
+            key, _, value = line.decode("latin-1").partition("=")
+            if key.strip() == "CompressedData":
+                return value.strip().lower() == "true"
+            if key.strip() == "ElementDataFile":
+                return False
+    return False
+
+
+class _MetaImageStreamingReader(_StreamingReader):  # pylint: disable=too-few-public-methods
+    """Streams MetaImage (.mha/.mhd) files with SimpleITK region extraction.
+
+    vtkMetaImageReader fails on sub-extents, while ITK's MetaImage reader
+    reads just the requested region.  Scalars are named ``MetaImage``, as
+    vtkMetaImageReader names them, so streamed pieces match a normal split.
+    """
+
+    def __init__(self, input_file: str) -> None:
+        import SimpleITK as sitk  # pylint: disable=import-outside-toplevel
+
+        self._sitk = sitk
+        self.reader = sitk.ImageFileReader()
+        self.reader.SetFileName(input_file)
+        self.reader.ReadImageInformation()
+        size = self.reader.GetSize()
+        if len(size) != 3:
+            raise ValueError("This script expects a 3D image.")
+        self.whole_extent = [0, size[0] - 1, 0, size[1] - 1, 0, size[2] - 1]
+        self.compressed = _metaimage_is_compressed(input_file)
+
+    def read(self, extent: list[int]):
+        self.reader.SetExtractIndex(extent[0::2])
+        self.reader.SetExtractSize(
+            [extent[2 * axis + 1] - extent[2 * axis] + 1 for axis in range(3)]
+        )
+        image = self.reader.Execute()
+        values = self._sitk.GetArrayViewFromImage(image)
+        data = vtk.vtkImageData()
+        data.SetExtent(extent)
+        data.SetOrigin(self.reader.GetOrigin())
+        data.SetSpacing(self.reader.GetSpacing())
+        data.SetDirectionMatrix(self.reader.GetDirection())
+        components = image.GetNumberOfComponentsPerPixel()
+        array = numpy_to_vtk(
+            values.reshape(-1, components) if components > 1 else values.ravel(),
+            deep=False,
+        )
+        array.SetName("MetaImage")
+        data.GetPointData().SetScalars(array)
+        # The VTK array borrows SimpleITK's buffer; keep it alive with the data.
+        data.sitk_image = (image, values)
+        return data
+
+
+# VTK readers that read update extents correctly.  Others either load the
+# whole volume anyway or, like vtkNIFTIImageReader for flipped volumes,
+# return the wrong slab.
+_STREAMING_VTK_READERS = ("vtkNrrdReader", "vtkXMLImageDataReader")
+
+
+def _open_streaming_reader(input_file: str) -> _StreamingReader:
+    """Return a streaming reader for *input_file*.
+
+    MetaImage is streamed with SimpleITK; NRRD and VTI files with VTK.
+    """
+    reader = _build_image_reader(input_file)
+    if reader.IsA("vtkMetaImageReader"):
+        return _MetaImageStreamingReader(input_file)
+    if reader.GetClassName() in _STREAMING_VTK_READERS:
+        return _VTKStreamingReader(reader)
+    raise ValueError(
+        f"Streaming is not supported for {reader.GetClassName()} input; use a "
+        ".mha/.mhd, .nrrd/.nhdr or .vti file, or split without streaming."
+    )
+
+
+def _stream_geometry(
+    source: _StreamingReader, arrays: tuple[str, ...] | None = None
+) -> ImageGeometry:
+    """Describe a streamed image, limited to *arrays*, from its first point alone."""
+    _validate_extent(source.whole_extent)
+    whole = source.whole_extent
+    probe = vtk.vtkImageData()
+    probe.DeepCopy(source.read([whole[0], whole[0], whole[2], whole[2], whole[4], whole[4]]))
+    return replace(_extract_geometry(_select_arrays(probe, arrays)), global_extent=list(whole))
+
+
+def _piece_source(source, extent: list[int], options: SplitOptions):
+    """Return image data holding piece *extent* and its ghost layers.
+
+    *source* is either the loaded volume, returned as is, or a
+    :class:`_StreamingReader` that is asked for just this piece and whose
+    output is limited to ``options.arrays``.
+    """
+    if isinstance(source, _StreamingReader):
+        return _select_arrays(
+            source.read(_ghost_extent(extent, options.ghost, source.whole_extent)),
+            options.arrays,
+        )
+    return source
+
+
+def _select_arrays(source_data, names: tuple[str, ...] | None):
+    """Return *source_data* with only the point and cell arrays in *names*.
+
+    The result is a shallow copy sharing the kept arrays with the source,
+    so nothing is copied; ``None`` keeps every array and returns
+    *source_data* itself.  A name may refer to a point or a cell array.
+    """
+    if names is None:
+        return source_data
+    selected = vtk.vtkImageData()
+    selected.ShallowCopy(source_data)
+    available = []
+    for data in (selected.GetPointData(), selected.GetCellData()):
+        for idx in reversed(range(data.GetNumberOfArrays())):
+            available.append(data.GetArrayName(idx))
+            if data.GetArrayName(idx) not in names:
+                data.RemoveArray(idx)
+    missing = [name for name in names if name not in available]
+    if missing:
+        raise ValueError(
+            f"No point or cell array named {', '.join(map(repr, missing))}; "
+            f"available: {', '.join(sorted(set(map(str, available))))}."
+        )
+    # Keep the source, and any buffers it pins, alive with the selection.
+    selected.selected_from = source_data
+    return selected
+
+
 def _extract_geometry(source_data) -> ImageGeometry:
     """Collect source image geometry and data-array metadata handles."""
     return ImageGeometry(
@@ -283,6 +609,42 @@ def _calculate_axis_intervals(
     )
 
 
+def _ghost_extent(extent: list[int], ghost: int, whole_extent) -> list[int]:
+    """Grow *extent* by *ghost* layers on every side, clamped to *whole_extent*."""
+    return [
+        max(extent[i] - ghost, whole_extent[i]) if i % 2 == 0
+        else min(extent[i] + ghost, whole_extent[i])
+        for i in range(6)
+    ]
+
+
+def _ghost_type_arrays(
+    extent: list[int], owned: list[int]
+) -> tuple[np.ndarray, np.ndarray]:
+    """Return ``vtkGhostType`` point and cell arrays for a ghosted piece.
+
+    *extent* is the piece extent including ghost layers and *owned* the
+    extent the piece is responsible for.  Points and cells outside *owned*
+    are flagged as duplicates; arrays are ``(z, y, x, 1)`` uint8.
+    """
+    masks = []
+    for cells in (0, 1):
+        axes = []
+        for axis in (2, 1, 0):
+            lo, hi = extent[2 * axis], extent[2 * axis + 1]
+            index = np.arange(lo, hi + 1 - cells)
+            axes.append(
+                (index < owned[2 * axis]) | (index > owned[2 * axis + 1] - cells)
+            )
+        ghost = axes[0][:, None, None] | axes[1][None, :, None] | axes[2][None, None, :]
+        flag = (
+            vtk.vtkDataSetAttributes.DUPLICATECELL if cells
+            else vtk.vtkDataSetAttributes.DUPLICATEPOINT
+        )
+        masks.append((ghost * np.uint8(flag))[..., None])
+    return masks[0], masks[1]
+
+
 def _piece_extent_grid(
     x_intervals: list[tuple[int, int]],
     y_intervals: list[tuple[int, int]],
@@ -305,8 +667,652 @@ def _build_piece_extents(geometry: ImageGeometry, options: SplitOptions) -> list
     return _piece_extent_grid(x_intervals, y_intervals, z_intervals)
 
 
-def _write_piece(source_data, extent: list[int], piece_filename: Path) -> None:
-    """Extract and write a single VTI sub-volume for the given extent."""
+def _content_points(source_data, extent: list[int], background: float | None) -> int:
+    """Count the points in *extent* whose value differs from *background*.
+
+    The active point scalars (or the first point array) decide; a
+    multi-component point counts if any component differs.  With
+    ``background=None``, or without point arrays, every point counts.
+    """
+    if background is not None:
+        for section, scalars_name, arrays in _piece_views(source_data, extent):
+            if section != "PointData" or not arrays:
+                continue
+            view = next(
+                (view for metadata, view in arrays if metadata["Name"] == scalars_name),
+                arrays[0][1],
+            )
+            count = 0
+            for plane in view:
+                differs = plane != background
+                if differs.ndim == 3:
+                    differs = differs.any(axis=-1)
+                count += int(np.count_nonzero(differs))
+            return count
+    return _piece_points(extent)
+
+
+def _owned_points_extent(extent: list[int], whole_extent: list[int]) -> list[int]:
+    """Return the points of *extent* that no later neighbouring piece owns.
+
+    Neighbouring pieces share a boundary plane; it is counted for the piece
+    below it only at the upper edge of the volume, so payloads add up.
+    """
+    return [
+        extent[i] if i % 2 == 0 or extent[i] == whole_extent[i] else extent[i] - 1
+        for i in range(6)
+    ]
+
+
+def _octree_children(extent: list[int], whole_extent: list[int]) -> list[list[int]]:
+    """Bisect every axis of *extent* that has at least two cells.
+
+    Each axis is cut so the halves own (see :func:`_owned_points_extent`)
+    as equal a number of points as possible.  Children share their boundary
+    planes, like grid pieces.  A single child means *extent* cannot be split.
+    """
+    halves = []
+    for axis in range(3):
+        lo, hi = extent[2 * axis], extent[2 * axis + 1]
+        if hi - lo >= 2:
+            owned = hi - lo + (1 if hi == whole_extent[2 * axis + 1] else 0)
+            mid = lo + (owned + 1) // 2
+            halves.append([(lo, mid), (mid, hi)])
+        else:
+            halves.append([(lo, hi)])
+    return [
+        [x_start, x_end, y_start, y_end, z_start, z_end]
+        for z_start, z_end in halves[2]
+        for y_start, y_end in halves[1]
+        for x_start, x_end in halves[0]
+    ]
+
+
+def _build_octree_extents(source_data, options: SplitOptions) -> list[list[int]]:
+    """Recursively bisect the volume into pieces of balanced payload.
+
+    A piece's payload is the number of non-background points it owns (see
+    :func:`_content_points`) times the bytes per point of all point arrays.
+    The piece with the largest payload is split into octants until every
+    payload is at most ``options.target_bytes`` or, when that is 0, until
+    there are at least ``nx * ny * nz`` pieces.  Background regions thus
+    stay as a few large pieces (pair with ``empty="skip"`` or ``"stub"``)
+    while dense regions are cut finely.  Extents are returned in z, y, x
+    order of their lower corner.
+    """
+    whole = list(source_data.GetExtent())
+    corner = [whole[0], whole[0], whole[2], whole[2], whole[4], whole[4]]
+    point_bytes = sum(
+        view.nbytes
+        for section, _, arrays in _piece_views(source_data, corner)
+        if section == "PointData"
+        for _, view in arrays
+    ) or 1
+    wanted = options.nx * options.ny * options.nz
+
+    def payload(extent):
+        owned = _owned_points_extent(extent, whole)
+        return _content_points(source_data, owned, options.background) * point_bytes
+
+    done: list[list[int]] = []
+    heap = [(-payload(whole), whole)]
+    while heap:
+        largest = -heap[0][0]
+        if options.target_bytes:
+            if largest <= options.target_bytes:
+                break
+        elif largest == 0 or len(heap) + len(done) >= wanted:
+            break
+        _, extent = heapq.heappop(heap)
+        children = _octree_children(extent, whole)
+        if len(children) == 1:
+            done.append(extent)
+            continue
+        for child in children:
+            heapq.heappush(heap, (-payload(child), child))
+    return sorted(done + [extent for _, extent in heap],
+                  key=lambda extent: (extent[4], extent[2], extent[0]))
+
+
+def _plan_piece_extents(source_data, geometry: ImageGeometry, options: SplitOptions):
+    """Return the piece extents for ``options.split``."""
+    if options.split == "octree":
+        return _build_octree_extents(source_data, options)
+    return _build_piece_extents(geometry, options)
+
+
+_SHARED_ALIGNMENT = 64
+
+# Bytes read per slab when decoding a streamable input into shared memory.
+_SHARED_SLAB_BYTES = 64 << 20
+
+
+def _source_arrays(source_data):
+    """Yield ``(association, array, active_scalars)`` for every point/cell array."""
+    for association, data in (("point", source_data.GetPointData()),
+                              ("cell", source_data.GetCellData())):
+        scalars = data.GetScalars()
+        for idx in range(data.GetNumberOfArrays()):
+            array = data.GetArray(idx)
+            if array is not None:
+                yield association, array, array is scalars
+
+
+def _shared_layout(template, extent) -> tuple[int, tuple[SharedArray, ...]]:
+    """Lay out every point/cell array of *template* in one block, sized for *extent*.
+
+    *template* supplies names, types and component counts and may cover
+    less than *extent*.  Returns the total byte size and the layout.
+    """
+    point_dims = [extent[2 * axis + 1] - extent[2 * axis] + 1 for axis in range(3)]
+    layout = []
+    offset = 0
+    for association, array, active in _source_arrays(template):
+        cells = association == "cell"
+        tuples = int(np.prod([max(n - cells, 1) for n in point_dims]))
+        dtype = vtk_to_numpy(array).dtype
+        components = array.GetNumberOfComponents()
+        layout.append(SharedArray(
+            name=array.GetName() or "Array",
+            association=association,
+            dtype=dtype.str,
+            shape=(tuples, components) if components > 1 else (tuples,),
+            offset=offset,
+            active_scalars=active,
+        ))
+        nbytes = tuples * components * dtype.itemsize
+        offset += -(-nbytes // _SHARED_ALIGNMENT) * _SHARED_ALIGNMENT
+    return offset, tuple(layout)
+
+
+def _create_shared(template, extent) -> tuple[shared_memory.SharedMemory, SharedVolume]:
+    """Allocate a shared-memory block for *template*'s arrays over *extent*."""
+    size, layout = _shared_layout(template, extent)
+    shm = shared_memory.SharedMemory(create=True, size=max(size, 1))
+    direction = template.GetDirectionMatrix()
+    volume = SharedVolume(
+        shm_name=shm.name,
+        extent=tuple(extent),
+        origin=tuple(template.GetOrigin()),
+        spacing=tuple(template.GetSpacing()),
+        arrays=layout,
+        direction=tuple(
+            direction.GetElement(row, col) for row in range(3) for col in range(3)
+        ),
+    )
+    return shm, volume
+
+
+def _share_source(source_data) -> tuple[shared_memory.SharedMemory, SharedVolume]:
+    """Copy every point/cell array of *source_data* into one shared-memory block.
+
+    *source_data* stays alive while it is copied, so memory peaks at about
+    twice the volume until the caller drops it; see
+    :func:`_share_streamed_source` for inputs that can be decoded straight
+    into the block.  The caller owns the returned block and must
+    ``close()`` and ``unlink()`` it once the workers are done.
+    """
+    shm, volume = _create_shared(source_data, source_data.GetExtent())
+    for (_, array, _), entry in zip(_source_arrays(source_data), volume.arrays):
+        target = np.ndarray(
+            entry.shape, dtype=np.dtype(entry.dtype), buffer=shm.buf, offset=entry.offset
+        )
+        target[...] = vtk_to_numpy(array).reshape(entry.shape)
+        del target
+    return shm, volume
+
+
+def _copy_extent(source, target, extent: list[int]) -> None:
+    """Copy *extent* of every array of *target* from the same-named array of *source*."""
+    for (_, _, parts), (_, _, targets) in zip(
+        _piece_views(source, extent), _piece_views(target, extent)
+    ):
+        values = {metadata["Name"]: view for metadata, view in parts}
+        for metadata, view in targets:
+            view[...] = values[metadata["Name"]]
+
+
+def _share_streamed_source(
+    input_file: str, arrays: tuple[str, ...] | None = None
+) -> tuple[shared_memory.SharedMemory | None, SharedVolume | None]:
+    """Decode *input_file* slab by slab straight into a shared-memory block.
+
+    Unlike :func:`_share_source` the volume is never held twice: memory
+    peaks at the block plus one slab of about ``_SHARED_SLAB_BYTES``.
+    Only the arrays in *arrays* (default: all) are kept.  Returns
+    ``(None, None)`` if the format cannot be streamed (see
+    :func:`_open_streaming_reader`) or is compressed MetaImage, which
+    would be inflated again for every slab.
+    """
+    try:
+        reader = _open_streaming_reader(input_file)
+    except ValueError:
+        return None, None
+    if getattr(reader, "compressed", False):
+        # Every region read inflates the data from the start of the file.
+        return None, None
+    whole = reader.whole_extent
+    _validate_extent(whole)
+    plane = [whole[0], whole[1], whole[2], whole[3], whole[4], whole[4]]
+    template = vtk.vtkImageData()
+    template.DeepCopy(_select_arrays(reader.read(plane), arrays))
+    plane_bytes = _shared_layout(template, plane)[0]
+    step = max(1, _SHARED_SLAB_BYTES // max(plane_bytes, 1))
+
+    shm, volume = _create_shared(template, whole)
+    del template
+    target = _wrap_shared_source(shm, volume)
+    try:
+        # Slabs overlap by one point plane so that every cell layer is read.
+        for z0 in range(whole[4], whole[5], step):
+            slab = [*whole[:4], z0, min(z0 + step, whole[5])]
+            _copy_extent(_select_arrays(reader.read(slab), arrays), target, slab)
+    except BaseException:
+        del target
+        _release_shared(shm)
+        raise
+    return shm, volume
+
+
+def _release_shared(shm: shared_memory.SharedMemory) -> None:
+    """Close and unlink a shared source block."""
+    try:
+        shm.close()
+    except BufferError:
+        # A view is still alive; unlinking below frees it at exit.
+        pass
+    shm.unlink()
+
+
+def _wrap_shared_source(shm: shared_memory.SharedMemory, volume: SharedVolume):
+    """Return a ``vtkImageData`` whose arrays are views into *shm* (no copy)."""
+    image = vtk.vtkImageData()
+    image.SetExtent(*volume.extent)
+    image.SetOrigin(*volume.origin)
+    image.SetSpacing(*volume.spacing)
+    image.SetDirectionMatrix(volume.direction)
+    for entry in volume.arrays:
+        values = np.ndarray(
+            entry.shape, dtype=np.dtype(entry.dtype), buffer=shm.buf, offset=entry.offset
+        )
+        array = numpy_to_vtk(values, deep=False)
+        array.SetName(entry.name)
+        data = image.GetPointData() if entry.association == "point" else image.GetCellData()
+        data.AddArray(array)
+        if entry.active_scalars:
+            data.SetActiveScalars(entry.name)
+    return image
+
+
+# Per-worker view of the shared source, set once by _attach_shared_source.
+_WORKER_SOURCE = None
+
+
+def _attach_shared_source(volume: SharedVolume) -> None:
+    """Worker initializer: map the parent's shared source into this process."""
+    global _WORKER_SOURCE  # pylint: disable=global-statement
+    shm = shared_memory.SharedMemory(name=volume.shm_name)
+    _WORKER_SOURCE = (shm, _wrap_shared_source(shm, volume))
+
+
+def _open_worker_stream(input_file: str) -> None:
+    """Worker initializer: open a streaming reader of its own on *input_file*."""
+    global _WORKER_SOURCE  # pylint: disable=global-statement
+    _WORKER_SOURCE = (None, _open_streaming_reader(input_file))
+
+
+# Per-thread source of thread-mode workers; see _attach_thread_source.
+_THREAD_SOURCE = threading.local()
+
+
+def _attach_thread_source(source, lock: threading.Lock) -> None:
+    """Thread initializer: give this worker thread a source of its own.
+
+    *source* is the in-memory volume, of which the thread takes a shallow
+    copy (the arrays are shared, not copied), so no two threads connect
+    pipelines to the same data object.  In streaming mode it is the input
+    file name and the thread opens its own streaming reader.
+    """
+    with lock:
+        if isinstance(source, str):
+            _THREAD_SOURCE.source = _open_streaming_reader(source)
+        else:
+            _THREAD_SOURCE.source = vtk.vtkImageData()
+            _THREAD_SOURCE.source.ShallowCopy(source)
+
+
+def _worker_source():
+    """Return the source of the current worker thread or process."""
+    source = getattr(_THREAD_SOURCE, "source", None)
+    return source if source is not None else _WORKER_SOURCE[1]
+
+
+def _block_compressor(name: str, level: int = -1):
+    """Return a ``bytes -> bytes`` compressor for *name*, or ``None`` for raw.
+
+    *level* is 0-9 (higher compresses harder) or -1 for the library default;
+    each function produces what the matching VTK decompressor expects.
+    """
+    if name == "none":
+        return None
+    if name == "zlib":
+        return lambda data: zlib.compress(data, level)
+    if name == "lzma":
+        preset = 6 if level < 0 else level
+        return lambda data: lzma.compress(
+            data, format=lzma.FORMAT_XZ, check=lzma.CHECK_CRC32, preset=preset
+        )
+    if name == "lz4":
+        try:
+            import lz4.block  # pylint: disable=import-outside-toplevel
+        except ImportError as exc:
+            raise ValueError(
+                "The lz4 compressor needs the 'lz4' package (pip install lz4)."
+            ) from exc
+        # LZ4 trades ratio for speed through its acceleration factor.
+        acceleration = 1 if level < 0 else max(1, 10 - level)
+        return lambda data: lz4.block.compress(
+            data, store_size=False, mode="fast", acceleration=acceleration
+        )
+    raise ValueError(f"Unknown compressor: {name!r}")
+
+
+def _iter_blocks(view: np.ndarray, block_size: int):
+    """Yield the bytes of *view* (C order) in chunks of *block_size*.
+
+    *view* may be a strided slice of a larger array; only one Z plane is
+    made contiguous at a time, so the piece is never copied as a whole.
+    """
+    pending = bytearray()
+    for plane in view:
+        pending += np.ascontiguousarray(plane).data.cast("B")
+        while len(pending) >= block_size:
+            yield bytes(pending[:block_size])
+            del pending[:block_size]
+    if pending:
+        yield bytes(pending)
+
+
+class _EncodedArray:
+    """A VTK binary data block: a UInt64 header followed by the data blocks.
+
+    A compressed header lists the size of every compressed block, which is
+    known only once that block has been compressed.  So :meth:`chunks` is
+    written first, behind a placeholder of :attr:`header_size` bytes, and
+    :meth:`header` is patched in afterwards.  Only one block is held in
+    memory at a time.
+    """
+
+    def __init__(self, nbytes: int, blocks, compressed: bool, block_size: int) -> None:
+        self.nbytes = nbytes
+        self.block_size = block_size
+        self.compressed = compressed
+        self.count = -(-nbytes // block_size)
+        self._blocks = blocks
+        self._sizes: list[int] = []
+
+    @property
+    def header_size(self) -> int:
+        """Byte length of :meth:`header`, known before any block is encoded."""
+        return 8 * (3 + self.count) if self.compressed else 8
+
+    def chunks(self):
+        """Yield the (compressed) blocks, recording their sizes for the header."""
+        for block in self._blocks:
+            self._sizes.append(len(block))
+            yield block
+
+    def header(self) -> bytes:
+        """Return the header; for compressed data, only after :meth:`chunks` is consumed."""
+        if not self.compressed:
+            return np.uint64(self.nbytes).tobytes()
+        if len(self._sizes) != self.count:
+            raise RuntimeError("The compressed header is known only after every block.")
+        words = [self.count, self.block_size, self.nbytes % self.block_size, *self._sizes]
+        return np.array(words, dtype="<u8").tobytes()
+
+
+def _encode_array(view: np.ndarray, compress, block_size: int = _BLOCK_SIZE) -> _EncodedArray:
+    """Encode *view* as a VTK binary data block, lazily, block by block."""
+    blocks = _iter_blocks(view, block_size)
+    if compress is not None:
+        blocks = (compress(block) for block in blocks)
+    return _EncodedArray(view.size * view.itemsize, blocks, compress is not None, block_size)
+
+
+def _encode_constant(view: np.ndarray, compress, block_size: int = _BLOCK_SIZE) -> _EncodedArray:
+    """Encode a constant-valued *view* like :func:`_encode_array`, but cheaply.
+
+    Every block holds the same repeating tuple, so only the few distinct
+    block phases are compressed and the results are reused for the rest;
+    the source is never read beyond its first tuple.
+    """
+    pattern = np.ascontiguousarray(view[0, 0, 0]).tobytes()
+    period = len(pattern)
+    repeated = pattern * (block_size // period + 2)
+    nbytes = view.size * view.itemsize
+
+    def blocks():
+        encoded: dict[tuple[int, int], bytes] = {}
+        for start in range(0, nbytes, block_size):
+            key = (start % period, min(block_size, nbytes - start))
+            if key not in encoded:
+                encoded[key] = compress(repeated[key[0]:key[0] + key[1]])
+            yield encoded[key]
+
+    return _EncodedArray(nbytes, blocks(), True, block_size)
+
+
+def _base64_chunks(chunks):
+    """Base64-encode a stream of byte chunks as one continuous encoding."""
+    pending = b""
+    for chunk in chunks:
+        pending += chunk
+        cut = len(pending) - len(pending) % 3
+        if cut:
+            yield base64.b64encode(pending[:cut])
+            pending = pending[cut:]
+    if pending:
+        yield base64.b64encode(pending)
+
+
+def _piece_views(source_data, extent: list[int]):
+    """Yield ``(section, scalars_name, [(metadata, view), ...])`` for each data section.
+
+    *metadata* is the array's XML description (see :func:`_array_metadata`)
+    and the views are NumPy slices of the source arrays covering *extent*,
+    in ``(z, y, x[, component])`` order; no data is copied.
+    """
+    src = source_data.GetExtent()
+    point_dims = [src[1] - src[0] + 1, src[3] - src[2] + 1, src[5] - src[4] + 1]
+    for section, data, cells in (("PointData", source_data.GetPointData(), 0),
+                                 ("CellData", source_data.GetCellData(), 1)):
+        dims = [max(n - cells, 1) for n in point_dims]
+        index = tuple(
+            slice(extent[2 * axis] - src[2 * axis],
+                  extent[2 * axis + 1] - src[2 * axis] + 1 - cells)
+            for axis in (2, 1, 0)
+        )
+        arrays = []
+        for idx in range(data.GetNumberOfArrays()):
+            array = data.GetArray(idx)
+            if array is None:
+                continue
+            values = vtk_to_numpy(array).reshape(
+                dims[2], dims[1], dims[0], array.GetNumberOfComponents()
+            )
+            view = values[index]
+            if view.dtype.byteorder == ">":
+                view = view.astype(view.dtype.newbyteorder("<"))
+            arrays.append((_array_metadata(array), view))
+        scalars = data.GetScalars()
+        yield section, scalars.GetName() if scalars is not None else None, arrays
+
+
+def _is_constant_piece(source_data, extent: list[int]) -> bool:
+    """Return True if every source array is constant over *extent*.
+
+    Arrays are compared by min/max against the piece's first value, on the
+    first Z plane and then the whole view, so a piece with varying content
+    is usually rejected after reading one plane.
+    """
+    for _, _, arrays in _piece_views(source_data, extent):
+        for _, view in arrays:
+            if view.size == 0:
+                continue
+            first = view[0, 0, 0]
+            for part, axes in ((view[0], (0, 1)), (view, (0, 1, 2))):
+                if (
+                    np.any(part.min(axis=axes) != first)
+                    or np.any(part.max(axis=axes) != first)
+                ):
+                    return False
+    return True
+
+
+def _offset_attribute(offset: int) -> bytes:
+    """Return ``offset="N"`` padded to a fixed width, so it can be patched."""
+    return f'offset="{offset}"'.ljust(_OFFSET_WIDTH).encode("ascii")
+
+
+def _patch(f, position: int, data: bytes) -> None:
+    """Overwrite *data* at *position* of *f* and return to the end of the file."""
+    end = f.tell()
+    f.seek(position)
+    f.write(data)
+    f.seek(end)
+
+
+def _write_piece_direct(  # pylint: disable=too-many-locals,too-many-arguments,too-many-positional-arguments,too-many-statements
+    source_data,
+    extent: list[int],
+    piece_filename: Path,
+    options: SplitOptions | None = None,
+    constant: bool = False,
+) -> None:
+    """Write a VTI piece straight from NumPy views of *source_data*.
+
+    The XML header and binary blocks are emitted directly, so each
+    sub-volume is read from the source exactly once (plane by plane)
+    instead of being copied by vtkExtractVOI and again by the writer.
+    With ``encoding="appended"`` the data follows the XML as raw bytes;
+    with ``"inline"`` it is base64 text inside each ``DataArray``, encoded
+    the way VTK does (compressed data has a separately encoded header).
+    Blocks are compressed and written one at a time; the block-size header
+    and the appended offsets are patched in once the sizes are known.
+    With ``options.ghost > 0`` the piece is grown by that many ghost
+    layers and a ``vtkGhostType`` array marks them.  A *constant* piece
+    (see :func:`_is_constant_piece`) is written as a stub whose arrays are
+    always compressed (with zlib if ``options.compressor`` is ``"none"``).
+    """
+    options = options or SplitOptions(1, 1, 1)
+    if constant and options.compressor == "none":
+        options = replace(options, compressor="zlib")
+    owned = extent
+    extent = _ghost_extent(owned, options.ghost, source_data.GetExtent())
+    ghosts = _ghost_type_arrays(extent, owned) if options.ghost else None
+    compress = _block_compressor(options.compressor, options.level)
+    inline = options.encoding == "inline"
+    vtk_compressor = COMPRESSORS[options.compressor]
+    compressor_attr = f' compressor="{vtk_compressor}"' if vtk_compressor else ""
+    extent_text = " ".join(map(str, extent))
+    direction = source_data.GetDirectionMatrix()
+    direction_text = " ".join(
+        str(direction.GetElement(row, col)) for row in range(3) for col in range(3)
+    )
+
+    lines = [
+        '<?xml version="1.0"?>',
+        '<VTKFile type="ImageData" version="1.0" byte_order="LittleEndian" '
+        f'header_type="UInt64"{compressor_attr}>',
+        f'  <ImageData WholeExtent="{extent_text}" '
+        f'Origin="{" ".join(map(str, source_data.GetOrigin()))}" '
+        f'Spacing="{" ".join(map(str, source_data.GetSpacing()))}" '
+        f'Direction="{direction_text}">',
+        f'    <Piece Extent="{extent_text}">',
+    ]
+    with open(piece_filename, "wb") as f:
+        f.write("\n".join(lines + [""]).encode("utf-8"))
+        appended = []
+        for section, scalars_name, arrays in _piece_views(source_data, extent):
+            encoders = [_encode_constant if constant else _encode_array] * len(arrays)
+            if ghosts is not None:
+                arrays.append((_GHOST_METADATA, ghosts[section == "CellData"]))
+                encoders.append(_encode_array)
+            scalars_attr = f" Scalars={quoteattr(scalars_name)}" if scalars_name else ""
+            f.write(f"      <{section}{scalars_attr}>\n".encode("utf-8"))
+            for (metadata, view), encode in zip(arrays, encoders):
+                components = (
+                    f' NumberOfComponents="{metadata["NumberOfComponents"]}"'
+                    if "NumberOfComponents" in metadata else ""
+                )
+                tag = (
+                    f'        <DataArray type="{metadata["type"]}" '
+                    f'Name={quoteattr(metadata["Name"])}{components}'
+                )
+                encoded = encode(view, compress, options.block_size)
+                if not inline:
+                    # The offset depends on the compressed size of the
+                    # arrays before it, so it is patched in later.
+                    f.write(f"{tag} format=\"appended\" ".encode("utf-8"))
+                    appended.append((f.tell(), encoded))
+                    f.write(_offset_attribute(0) + b"/>\n")
+                    continue
+                f.write(f'{tag} format="binary">\n          '.encode("utf-8"))
+                if compress is None:
+                    f.writelines(_base64_chunks([encoded.header(), *encoded.chunks()]))
+                else:
+                    # VTK encodes the compressed header separately, so its
+                    # base64 length is fixed and it can be patched in place.
+                    header_at = f.tell()
+                    f.write(base64.b64encode(bytes(encoded.header_size)))
+                    f.writelines(_base64_chunks(encoded.chunks()))
+                    _patch(f, header_at, base64.b64encode(encoded.header()))
+                f.write(b"\n        </DataArray>\n")
+            f.write(f"      </{section}>\n".encode("utf-8"))
+        f.write(b"    </Piece>\n  </ImageData>\n")
+        if inline:
+            f.write(b"</VTKFile>\n")
+            return
+        f.write(b'  <AppendedData encoding="raw">\n   _')
+        start = f.tell()
+        for attribute_at, encoded in appended:
+            header_at = f.tell()
+            _patch(f, attribute_at, _offset_attribute(header_at - start))
+            f.write(bytes(encoded.header_size))
+            f.writelines(encoded.chunks())
+            _patch(f, header_at, encoded.header())
+        f.write(b"\n  </AppendedData>\n</VTKFile>\n")
+
+
+def _write_piece(  # pylint: disable=too-many-branches
+    source_data,
+    extent: list[int],
+    piece_filename: Path,
+    options: SplitOptions | None = None,
+) -> bool:
+    """Extract and write a single VTI sub-volume for the given extent.
+
+    *extent* is the extent the piece owns; ghost layers requested in
+    *options* are added around it here.  Constant pieces are skipped or
+    written as stubs (always by the direct writer) according to
+    ``options.empty``.  Returns False if the piece was skipped.
+    """
+    options = options or SplitOptions(1, 1, 1)
+    if options.empty != "write" and _is_constant_piece(
+        source_data, _ghost_extent(extent, options.ghost, source_data.GetExtent())
+    ):
+        if options.empty == "skip":
+            return False
+        _write_piece_direct(source_data, extent, piece_filename, options, constant=True)
+        return True
+    if options.writer == "direct":
+        _write_piece_direct(source_data, extent, piece_filename, options)
+        return True
+
+    owned = extent
+    extent = _ghost_extent(owned, options.ghost, source_data.GetExtent())
+
     extract = vtk.vtkExtractVOI()
     extract.SetInputData(source_data)
     extract.SetVOI(extent)
@@ -319,9 +1325,37 @@ def _write_piece(source_data, extent: list[int], piece_filename: Path) -> None:
 
     vti_writer = vtk.vtkXMLImageDataWriter()
     vti_writer.SetFileName(str(piece_filename))
-    vti_writer.SetInputConnection(change_info.GetOutputPort())
+    if options.ghost:
+        piece = vtk.vtkImageData()
+        piece.ShallowCopy(change_info.GetOutput())
+        for data, ghosts in zip((piece.GetPointData(), piece.GetCellData()),
+                                _ghost_type_arrays(extent, owned)):
+            array = numpy_to_vtk(ghosts.ravel(), deep=True)
+            array.SetName(_GHOST_METADATA["Name"])
+            data.AddArray(array)
+        vti_writer.SetInputData(piece)
+    else:
+        vti_writer.SetInputConnection(change_info.GetOutputPort())
+    vti_writer.SetHeaderTypeToUInt64()
+    if options.compressor == "none":
+        vti_writer.SetCompressorTypeToNone()
+    elif options.compressor == "lz4":
+        vti_writer.SetCompressorTypeToLZ4()
+    elif options.compressor == "lzma":
+        vti_writer.SetCompressorTypeToLZMA()
+    else:
+        vti_writer.SetCompressorTypeToZLib()
+    if options.level >= 0:
+        vti_writer.SetCompressionLevel(options.level)
+    vti_writer.SetBlockSize(options.block_size)
+    if options.encoding == "inline":
+        vti_writer.SetDataModeToBinary()
+    else:
+        vti_writer.SetDataModeToAppended()
+        vti_writer.EncodeAppendedDataOff()
     if vti_writer.Write() != 1:
         raise RuntimeError(f"Failed to write piece file: {piece_filename}")
+    return True
 
 
 def _prepare_output(output_pvti: str) -> tuple[Path, str]:
@@ -331,110 +1365,525 @@ def _prepare_output(output_pvti: str) -> tuple[Path, str]:
     return output_path, output_path.stem
 
 
-def _write_piece_grid(
+class PieceManifest:
+    """Record of the pieces written for one .pvti, used to resume a split.
+
+    The manifest is a JSON-lines file next to the .pvti with one record per
+    piece: its file extent, a hash of the source data and settings it was
+    written from, and the size and checksum of the piece file (``None`` for
+    skipped constant pieces).  Records are appended as pieces complete, so
+    an interrupted run leaves a usable manifest; a torn last line is
+    ignored.  With *resume*, an earlier manifest is loaded and pieces whose
+    record still matches the source and the file on disk are reused.
+    """
+
+    def __init__(self, path: Path, resume: bool = False) -> None:
+        self.path = path
+        self.previous: dict[int, dict] = self._load(path) if resume else {}
+        self.records: dict[int, dict] = {}
+        self.reused = 0
+        if not resume:
+            path.unlink(missing_ok=True)
+
+    @staticmethod
+    def _load(path: Path) -> dict[int, dict]:
+        """Return the last record for each piece in *path*."""
+        records: dict[int, dict] = {}
+        try:
+            with open(path, encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except json.JSONDecodeError:
+                        continue
+                    records[record["piece"]] = record
+        except FileNotFoundError:
+            pass
+        return records
+
+    def add(self, piece_id: int, record: dict) -> None:
+        """Store the record returned by :func:`_write_tracked_piece`."""
+        record = dict(record, piece=piece_id)
+        if record.pop("reused"):
+            self.reused += 1
+        else:
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+        self.records[piece_id] = record
+
+    def compact(self) -> None:
+        """Rewrite the manifest with just this run's records, in piece order."""
+        partial = self.path.with_name(self.path.name + ".part")
+        with open(partial, "w", encoding="utf-8") as f:
+            for piece_id in sorted(self.records):
+                f.write(json.dumps(self.records[piece_id]) + "\n")
+        os.replace(partial, self.path)
+
+
+def _file_checksum(path: Path) -> str:
+    """Return the CRC-32 of *path* as hex.
+
+    This guards against truncated or damaged pieces, not tampering, and is
+    several times faster to compute than a cryptographic hash.
+    """
+    crc = 0
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            crc = zlib.crc32(chunk, crc)
+    return f"{crc:08x}"
+
+
+def _piece_source_hash(source_data, extent: list[int], options: SplitOptions) -> str:
+    """Hash everything a piece file is written from.
+
+    That is the source geometry and the arrays over *extent* (including
+    ghost layers), plus the options that change the bytes of the file.
+    SHA-256 is used as it is the fastest collision-resistant hash here
+    (hardware accelerated on common CPUs).
+    """
+    h = hashlib.sha256()
+    direction = source_data.GetDirectionMatrix()
+    h.update(repr((
+        extent, source_data.GetOrigin(), source_data.GetSpacing(),
+        [direction.GetElement(row, col) for row in range(3) for col in range(3)],
+        options.writer, options.compressor, options.level, options.block_size,
+        options.encoding, options.ghost, options.empty,
+    )).encode())
+    for section, scalars_name, arrays in _piece_views(source_data, extent):
+        h.update(repr((section, scalars_name)).encode())
+        for metadata, view in arrays:
+            h.update(repr(sorted(metadata.items())).encode())
+            for plane in view:
+                h.update(np.ascontiguousarray(plane).data.cast("B"))
+    return h.hexdigest()
+
+
+def _record_is_current(
+    record: dict, piece_filename: Path, extent: list[int], source: str
+) -> bool:
+    """Return True if *record* describes *extent* and *source* and its file is intact."""
+    if record.get("extent") != extent or record.get("source") != source:
+        return False
+    if record.get("bytes") is None:
+        return True
+    try:
+        size = piece_filename.stat().st_size
+    except FileNotFoundError:
+        return False
+    return size == record["bytes"] and _file_checksum(piece_filename) == record["checksum"]
+
+
+def _write_tracked_piece(
+    source_data,
+    extent: list[int],
+    piece_filename: Path,
+    options: SplitOptions,
+    previous: dict | None = None,
+) -> dict:
+    """Write one piece atomically and return its manifest record.
+
+    The piece is written to a ``.part`` file and renamed into place, so an
+    interrupted write never leaves a complete-looking piece.  If *previous*,
+    the piece's record from an earlier run, still matches the source and
+    the file, nothing is written and the record is returned as reused.
+    """
+    file_extent = _ghost_extent(extent, options.ghost, source_data.GetExtent())
+    source = _piece_source_hash(source_data, file_extent, options)
+    if previous is not None and _record_is_current(
+        previous, piece_filename, file_extent, source
+    ):
+        return {
+            "extent": file_extent, "source": source, "bytes": previous["bytes"],
+            "checksum": previous["checksum"], "reused": True,
+        }
+    partial = piece_filename.with_name(piece_filename.name + ".part")
+    if _write_piece(source_data, extent, partial, options):
+        os.replace(partial, piece_filename)
+        size = piece_filename.stat().st_size
+        checksum = _file_checksum(piece_filename)
+    else:
+        piece_filename.unlink(missing_ok=True)
+        size = checksum = None
+    return {
+        "extent": file_extent, "source": source, "bytes": size,
+        "checksum": checksum, "reused": False,
+    }
+
+
+def _write_piece_grid(  # pylint: disable=too-many-arguments,too-many-positional-arguments
     source_data,
     output_path: Path,
     base_name: str,
     piece_extents: list[list[int]],
-) -> None:
-    """Write all VTI piece files from precomputed extents."""
+    options: SplitOptions | None = None,
+    manifest: PieceManifest | None = None,
+) -> tuple[dict[int, float], list[int]]:
+    """Write all VTI piece files from precomputed extents.
+
+    *source_data* is the loaded volume or, in streaming mode, a
+    :class:`_StreamingReader`.  With a *manifest*, pieces are written
+    atomically and recorded in it,
+    and pieces it lists as current are reused.  Returns the time in seconds
+    spent on each piece, keyed by piece ID, and the sorted IDs of constant
+    pieces that were skipped.
+    """
+    options = options or SplitOptions(1, 1, 1)
+    timings: dict[int, float] = {}
+    skipped = []
     for piece_id, extent in enumerate(piece_extents):
         piece_filename = output_path.with_name(f"{base_name}_{piece_id}.vti")
-        _write_piece(source_data, extent, piece_filename)
+        start = time.perf_counter()
+        piece_source = _piece_source(source_data, extent, options)
+        if manifest is None:
+            written = _write_piece(piece_source, extent, piece_filename, options)
+        else:
+            record = _write_tracked_piece(
+                piece_source, extent, piece_filename, options,
+                manifest.previous.get(piece_id),
+            )
+            manifest.add(piece_id, record)
+            written = record["bytes"] is not None
+        if not written:
+            skipped.append(piece_id)
+        timings[piece_id] = time.perf_counter() - start
+    return timings, skipped
 
 
-def _partition_piece_jobs(
-    piece_extents: list[list[int]], workers: int
-) -> list[list[tuple[int, list[int]]]]:
-    """Partition piece IDs/extents into batches for parallel workers."""
-    batches: list[list[tuple[int, list[int]]]] = [[] for _ in range(workers)]
-    for piece_id, extent in enumerate(piece_extents):
-        batches[piece_id % workers].append((piece_id, extent))
-    return [batch for batch in batches if batch]
+def _piece_points(extent: list[int]) -> int:
+    """Return the number of points in an inclusive VTK extent."""
+    return (
+        (extent[1] - extent[0] + 1)
+        * (extent[3] - extent[2] + 1)
+        * (extent[5] - extent[4] + 1)
+    )
 
 
-def _write_piece_batch(
-    input_file: str,
+def _schedule_piece_jobs(piece_extents: list[list[int]]) -> list[tuple[int, list[int]]]:
+    """Order piece IDs/extents largest first for dynamic scheduling.
+
+    Starting the biggest pieces first keeps a large piece from being the
+    last job left while the other workers sit idle.
+    """
+    return sorted(
+        enumerate(piece_extents),
+        key=lambda job: (-_piece_points(job[1]), job[0]),
+    )
+
+
+def _write_shared_piece(  # pylint: disable=too-many-arguments,too-many-positional-arguments
     output_pvti: str,
     base_name: str,
-    jobs: list[tuple[int, list[int]]],
-) -> None:
-    """Worker entrypoint: read input once and write a batch of piece files."""
-    reader = _build_image_reader(input_file)
-    reader.Update()
-    source_data = reader.GetOutput()
-    _validate_source_data(source_data, input_file)
-
+    piece_id: int,
+    extent: list[int],
+    options: SplitOptions,
+    track: bool = False,
+    previous: dict | None = None,
+) -> tuple[int, float, bool, dict | None]:
+    """Worker entrypoint: write one piece from the worker's source and time it.
+
+    With *track*, the piece goes through :func:`_write_tracked_piece` and
+    its manifest record is returned for the parent to store.
+    """
+    start = time.perf_counter()
     output_path = Path(output_pvti).resolve()
-    for piece_id, extent in jobs:
-        piece_filename = output_path.with_name(f"{base_name}_{piece_id}.vti")
-        _write_piece(source_data, extent, piece_filename)
+    piece_filename = output_path.with_name(f"{base_name}_{piece_id}.vti")
+    source = _piece_source(_worker_source(), extent, options)
+    record = None
+    if track:
+        record = _write_tracked_piece(source, extent, piece_filename, options, previous)
+        written = record["bytes"] is not None
+    else:
+        written = _write_piece(source, extent, piece_filename, options)
+    return piece_id, time.perf_counter() - start, written, record
 
 
-def _write_piece_grid_parallel(
-    input_file: str,
+def _write_piece_grid_parallel(  # pylint: disable=too-many-arguments,too-many-positional-arguments,too-many-locals
+    shared,
     output_pvti: str,
     base_name: str,
     piece_extents: list[list[int]],
-    jobs: int,
-) -> None:
-    """Write piece files in parallel using multiple processes."""
-    workers = min(jobs, len(piece_extents))
-    if workers <= 1:
-        return
-
-    job_batches = _partition_piece_jobs(piece_extents, workers)
-    with ProcessPoolExecutor(max_workers=workers) as executor:
+    options: SplitOptions,
+    manifest: PieceManifest | None = None,
+) -> tuple[dict[int, float], list[int]]:
+    """Write piece files in parallel using multiple processes or threads.
+
+    Worker processes map the already-decoded source (a
+    :class:`SharedVolume`) from shared memory once, at start-up, instead of
+    each re-reading the input file.  With ``options.parallel == "thread"``
+    *shared* is the in-memory ``vtkImageData`` itself and worker threads
+    write from shallow copies of it.  In streaming mode *shared* is the
+    input file name instead, and each worker opens its own streaming
+    reader and reads just the pieces it writes.  Pieces are
+    submitted one at a time, largest first, and each idle worker pulls the
+    next one from the pool's queue, so uneven pieces do not leave workers
+    waiting on a fixed batch.  Workers report manifest records back and
+    the parent appends them to *manifest*.  Returns per-piece write times
+    in seconds and the sorted IDs of skipped pieces, as
+    :func:`_write_piece_grid` does.
+    """
+    workers = min(options.jobs, len(piece_extents))
+    timings: dict[int, float] = {}
+    skipped = []
+    if options.parallel == "thread":
+        executor = ThreadPoolExecutor(
+            max_workers=workers,
+            initializer=_attach_thread_source,
+            initargs=(shared, threading.Lock()),
+        )
+    else:
+        executor = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=(
+                _attach_shared_source if isinstance(shared, SharedVolume)
+                else _open_worker_stream
+            ),
+            initargs=(shared,),
+        )
+    with executor:
         futures = [
-            executor.submit(_write_piece_batch, input_file, output_pvti, base_name, batch)
-            for batch in job_batches
+            executor.submit(
+                _write_shared_piece, output_pvti, base_name, piece_id, extent, options,
+                manifest is not None,
+                manifest.previous.get(piece_id) if manifest is not None else None,
+            )
+            for piece_id, extent in _schedule_piece_jobs(piece_extents)
         ]
-        for future in futures:
-            future.result()
+        for future in as_completed(futures):
+            piece_id, elapsed, written, record = future.result()
+            if record is not None:
+                manifest.add(piece_id, record)
+            timings[piece_id] = elapsed
+            if not written:
+                skipped.append(piece_id)
+    return timings, sorted(skipped)
+
+
+def _print_piece_timings(
+    timings: dict[int, float], wall: float, skipped: list[int] | None = None
+) -> None:
+    """Print a summary of per-piece write times.
+
+    Skipped pieces are left out of the statistics, so their near-zero
+    times do not drag the mean, median and p95 down.
+    """
+    if skipped:
+        print(f"Skipped {len(skipped)} constant pieces")
+        dropped = set(skipped)
+        timings = {piece: t for piece, t in timings.items() if piece not in dropped}
+    if not timings:
+        return
+    ordered = sorted(timings.values())
+    count = len(ordered)
+    slowest = max(timings, key=timings.get)
+    print(
+        f"Wrote {count} pieces in {wall:.2f} s "
+        f"(piece time: mean {sum(ordered) / count:.3f} s, "
+        f"median {ordered[count // 2]:.3f} s, "
+        f"p95 {ordered[min(count - 1, int(0.95 * count))]:.3f} s, "
+        f"max {ordered[-1]:.3f} s for piece {slowest})"
+    )
 
 
 def split_vti(input_file: str, output_pvti: str, options: SplitOptions) -> None:
-    """Split a 3D image into a grid of sub-volumes and write a matching PVTI."""
+    """Split a 3D image into a grid of sub-volumes and write a matching PVTI.
+
+    With ``options.stream`` the input is never loaded as a whole: each
+    piece (with its ghost layers) is read from the file on its own, so
+    memory is bounded by the largest piece per process.  Process workers
+    share one decoded copy of the volume.  A streamable input is decoded
+    straight into it; any other input is loaded first and copied in,
+    peaking at about twice the volume until the loaded copy is dropped.
+    """
     options.validate()
 
-    reader = _build_image_reader(input_file)
-    reader.Update()
+    shm = shared = None
+    if not options.stream and options.jobs > 1 and options.parallel == "process":
+        # Decode straight into the block the workers will share.
+        shm, shared = _share_streamed_source(input_file, options.arrays)
+    try:
+        _split_source(input_file, output_pvti, options, shm, shared)
+    finally:
+        if shm is not None:
+            _release_shared(shm)
 
-    source_data = reader.GetOutput()
-    _validate_source_data(source_data, input_file)
 
-    geometry = _extract_geometry(source_data)
-    piece_extents = _build_piece_extents(geometry, options)
+def _split_source(  # pylint: disable=too-many-locals,too-many-branches,too-many-statements
+    input_file: str,
+    output_pvti: str,
+    options: SplitOptions,
+    shm: shared_memory.SharedMemory | None = None,
+    shared: SharedVolume | None = None,
+) -> None:
+    """Open the source, then plan and write its pieces; see :func:`split_vti`.
 
-    print(
-        f"Splitting grid into {options.nx}x{options.ny}x{options.nz} "
-        f"({options.nx * options.ny * options.nz} total pieces)..."
-    )
+    *shm* and *shared* describe a volume already decoded into shared
+    memory, which the caller releases.
+    """
+    if options.stream:
+        reader = source_data = _open_streaming_reader(input_file)
+        geometry = _stream_geometry(source_data, options.arrays)
+    else:
+        if shm is not None:
+            reader = source_data = _wrap_shared_source(shm, shared)
+        else:
+            reader = _build_image_reader(input_file)
+            reader.Update()
+
+            source_data = reader.GetOutput()
+            _validate_source_data(source_data, input_file)
+            source_data = _select_arrays(source_data, options.arrays)
+
+        geometry = _extract_geometry(source_data)
+    piece_extents = _plan_piece_extents(source_data, geometry, options)
+
+    if options.split == "octree":
+        print(f"Splitting octree into {len(piece_extents)} pieces...")
+    else:
+        print(
+            f"Splitting grid into {options.nx}x{options.ny}x{options.nz} "
+            f"({options.nx * options.ny * options.nz} total pieces)..."
+        )
     print(f"Source global extent: {geometry.global_extent}")
+    if options.stream:
+        print("Streaming each piece from the input file")
+
+    # Pieces are scheduled by the extent they own; files (and the header)
+    # carry the ghost layers too.
+    file_extents = [
+        _ghost_extent(extent, options.ghost, geometry.global_extent)
+        for extent in piece_extents
+    ]
+    if options.ghost:
+        print(f"Adding {options.ghost} ghost layer(s) around each piece")
 
     output_path, base_name = _prepare_output(output_pvti)
-    if options.jobs == 1:
-        _write_piece_grid(source_data, output_path, base_name, piece_extents)
-    else:
+    manifest = PieceManifest(
+        output_path.with_name(f"{base_name}.manifest.jsonl"), options.resume
+    )
+    start = time.perf_counter()
+    parallel = options.jobs > 1 and len(piece_extents) > 1
+    workers = min(options.jobs, len(piece_extents))
+    if parallel and not options.stream and options.parallel == "process":
         print(
-            "Writing pieces with "
-            f"{min(options.jobs, len(piece_extents))} worker processes..."
+            f"Writing pieces with {workers} worker processes..."
         )
-        _write_piece_grid_parallel(
-            input_file,
-            str(output_path),
-            base_name,
-            piece_extents,
-            options.jobs,
+        owned = shm is None
+        if owned:
+            # The input cannot be streamed into shared memory, so the
+            # reader's copy is held while it is copied in: a 2x peak until
+            # it is dropped below.
+            shm, shared = _share_source(source_data)
+        try:
+            # Drop the reader's copy; the header only needs array metadata,
+            # which the zero-copy wrapper provides.
+            del reader, source_data
+            source_view = _wrap_shared_source(shm, shared)
+            geometry = _extract_geometry(source_view)
+            timings, skipped = _write_piece_grid_parallel(
+                shared,
+                str(output_path),
+                base_name,
+                piece_extents,
+                options,
+                manifest,
+            )
+            _print_piece_timings(timings, time.perf_counter() - start, skipped)
+            write_pvti_header(
+                str(output_path), geometry, file_extents, base_name, options.ghost,
+                skipped,
+            )
+            del geometry, source_view
+        finally:
+            if owned:
+                _release_shared(shm)
+    else:
+        if parallel:
+            print(
+                f"{'Streaming' if options.stream else 'Writing'} pieces with "
+                f"{workers} worker {options.parallel}s..."
+            )
+            timings, skipped = _write_piece_grid_parallel(
+                input_file if options.stream else source_data,
+                str(output_path), base_name, piece_extents, options, manifest,
+            )
+        else:
+            timings, skipped = _write_piece_grid(
+                source_data, output_path, base_name, piece_extents, options, manifest
+            )
+        _print_piece_timings(timings, time.perf_counter() - start, skipped)
+        write_pvti_header(
+            str(output_path), geometry, file_extents, base_name, options.ghost, skipped
         )
+    manifest.compact()
+    if manifest.reused:
+        print(f"Reused {manifest.reused} unchanged pieces listed in {manifest.path.name}")
+    print(f"Successfully generated master file: {output_path}")
+
+
+def benchmark_encodings(  # pylint: disable=too-many-locals
+    input_file: str, options: SplitOptions
+) -> list[dict]:
+    """Write the split once per compressor/encoding and report the cost of each.
 
-    write_pvti_header(
-        str(output_path),
-        geometry,
-        piece_extents,
-        base_name,
+    Pieces go to a temporary directory that is removed afterwards.  The
+    grid, writer, level and block size come from *options*; the compressor
+    and encoding are varied.  Compressors whose library is missing are
+    skipped.  Returns one dict per setting with ``seconds``, ``bytes`` and
+    ``input_bytes``.
+    """
+    options.validate()
+    reader = _build_image_reader(input_file)
+    reader.Update()
+    source_data = reader.GetOutput()
+    _validate_source_data(source_data, input_file)
+    source_data = _select_arrays(source_data, options.arrays)
+    piece_extents = _plan_piece_extents(
+        source_data, _extract_geometry(source_data), options
+    )
+    input_bytes = sum(
+        view.nbytes
+        for extent in piece_extents
+        for _, _, arrays in _piece_views(source_data, extent)
+        for _, view in arrays
     )
-    print(f"Successfully generated master file: {output_path}")
+
+    print(
+        f"Benchmarking {len(piece_extents)} pieces "
+        f"({input_bytes / 1048576.0:.1f} MiB of array data) with the "
+        f"{options.writer} writer, level {options.level}, "
+        f"block size {options.block_size}:"
+    )
+    results = []
+    for compressor in COMPRESSORS:
+        for encoding in ENCODINGS:
+            setting = replace(options, compressor=compressor, encoding=encoding, jobs=1)
+            try:
+                setting.validate()
+            except ValueError as exc:
+                print(f"  {compressor:>5}: skipped ({exc})")
+                break
+            with tempfile.TemporaryDirectory() as tmp:
+                out = Path(tmp)
+                start = time.perf_counter()
+                _write_piece_grid(
+                    source_data, out / "piece.pvti", "piece", piece_extents, setting
+                )
+                seconds = time.perf_counter() - start
+                written = sum(p.stat().st_size for p in out.glob("*.vti"))
+            results.append({
+                "compressor": compressor,
+                "encoding": encoding,
+                "seconds": seconds,
+                "bytes": written,
+                "input_bytes": input_bytes,
+            })
+            print(
+                f"  {compressor:>5} {encoding:>8}: {seconds:7.2f} s, "
+                f"{input_bytes / 1048576.0 / seconds:8.1f} MiB/s, "
+                f"{written / 1048576.0:9.1f} MiB written "
+                f"({written / input_bytes:6.1%} of input)"
+            )
+    return results
 
 
 def create_dummy_vti(filename: str) -> None:
@@ -459,6 +1908,11 @@ def create_dummy_vti(filename: str) -> None:
     print(f"Created sample mock file: {filename}")
 
 
+def _background_value(text: str) -> float | None:
+    """argparse type for --background: a number or ``none``."""
+    return None if text.lower() == "none" else float(text)
+
+
 def main(argv=None) -> int:
     """Parse CLI arguments and split the requested 3D volume."""
     parser = argparse.ArgumentParser(
@@ -502,7 +1956,110 @@ def main(argv=None) -> int:
         "--jobs",
         type=int,
         default=1,
-        help="Number of worker processes used to write output pieces (default: 1).",
+        help="Number of workers used to write output pieces (default: 1).",
+    )
+    parser.add_argument(
+        "--arrays",
+        nargs="+",
+        metavar="NAME",
+        help="Write only these point or cell arrays to each piece (default: all).",
+    )
+    parser.add_argument(
+        "--parallel",
+        choices=PARALLEL_MODES,
+        default="process",
+        help="How -j workers run: 'process' workers share the decoded volume "
+             "through shared memory, 'thread' workers write from the one "
+             "in-memory volume without copying it (default: process).",
+    )
+    parser.add_argument(
+        "--writer",
+        choices=PIECE_WRITERS,
+        default="direct",
+        help="Piece writer: 'direct' encodes pieces straight from the source arrays, "
+             "'vtk' uses a vtkExtractVOI + vtkXMLImageDataWriter pipeline "
+             "(default: direct).",
+    )
+    parser.add_argument(
+        "--compressor",
+        choices=list(COMPRESSORS),
+        default="zlib",
+        help="Compression for piece data; lz4 needs the 'lz4' package (default: zlib).",
+    )
+    parser.add_argument(
+        "--level",
+        type=int,
+        default=-1,
+        help="Compression level 0-9, or -1 for the compressor's default (default: -1).",
+    )
+    parser.add_argument(
+        "--block-size",
+        type=int,
+        default=_BLOCK_SIZE,
+        help=f"Uncompressed bytes per compressed block (default: {_BLOCK_SIZE}).",
+    )
+    parser.add_argument(
+        "--encoding",
+        choices=ENCODINGS,
+        default="appended",
+        help="Write binary data as raw appended data after the XML, or base64 "
+             "inline in each DataArray (default: appended).",
+    )
+    parser.add_argument(
+        "--ghost",
+        type=int,
+        default=0,
+        metavar="N",
+        help="Grow each piece by N ghost layers (clamped to the volume), record "
+             "GhostLevel in the .pvti and mark ghosts with vtkGhostType (default: 0).",
+    )
+    parser.add_argument(
+        "--empty",
+        choices=EMPTY_PIECES,
+        default="write",
+        help="Constant-valued pieces: write them normally, skip them (no file or "
+             ".pvti entry) or write a small compressed stub (default: write).",
+    )
+    parser.add_argument(
+        "--split",
+        choices=SPLIT_MODES,
+        default="grid",
+        help="Piece layout: a uniform nx x ny x nz grid, or an adaptive octree "
+             "balanced by non-background payload (default: grid).",
+    )
+    parser.add_argument(
+        "--target-bytes",
+        type=int,
+        default=0,
+        metavar="BYTES",
+        help="Octree mode: split pieces until their payload is at most BYTES "
+             "(default: 0, which splits the largest piece until there are "
+             "nx * ny * nz pieces).",
+    )
+    parser.add_argument(
+        "--background",
+        type=_background_value,
+        default=0.0,
+        help="Octree mode: value of background points, or 'none' to balance by "
+             "raw size (default: 0).",
+    )
+    parser.add_argument(
+        "--stream",
+        action="store_true",
+        help="Read each piece from the input file on its own instead of loading "
+             "the whole volume, so memory is bounded by the largest piece.",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse pieces that the manifest of an earlier (possibly interrupted) "
+             "run lists as written from the same data and settings.",
+    )
+    parser.add_argument(
+        "--benchmark",
+        action="store_true",
+        help="Instead of writing the output, time every compressor and encoding "
+             "on this input and report throughput and total bytes.",
     )
 
     args = parser.parse_args(argv)
@@ -513,7 +2070,29 @@ def main(argv=None) -> int:
         else:
             raise FileNotFoundError(f"Input file does not exist: {args.input}")
 
-    split_options = SplitOptions(args.nx, args.ny, args.nz, args.jobs)
+    split_options = SplitOptions(
+        args.nx,
+        args.ny,
+        args.nz,
+        args.jobs,
+        args.writer,
+        args.compressor,
+        args.level,
+        args.block_size,
+        args.encoding,
+        args.ghost,
+        args.empty,
+        args.split,
+        args.target_bytes,
+        args.background,
+        args.resume,
+        args.stream,
+        args.parallel,
+        tuple(args.arrays) if args.arrays else None,
+    )
+    if args.benchmark:
+        benchmark_encodings(args.input, split_options)
+        return 0
     split_vti(args.input, args.output, split_options)
     return 0
 
@@ -4,32 +4,58 @@
 #   "vtk",
 #   "numpy",
 #   "SimpleITK",
-#   "SimpleITKUtilities",
 # ]
 # ///
 
-"""Convert between VTI and SimpleITK images using VTK and SimpleITK utilities."""
-
-import sys
+"""Convert between VTI and SimpleITK images using VTK and SimpleITK.
+
+Buffer ownership
+----------------
+:func:`sitk_to_vtk_image` does not copy pixels.  The returned
+``vtkImageData`` reads the SimpleITK image's own buffer, and the image is
+pinned to the VTK array (and to the ``vtkImageData``) so it lives at least
+as long as they do.  Writes through either object are seen by the other.
+Do not modify the SimpleITK image (``SetPixel``, in-place filters,
+``image[...] = ...``) while the VTK image is in use: SimpleITK copies on
+write, so the image may move to a new buffer that VTK no longer sees.  Pass
+``copy=True`` for an independent VTK image.
+
+:func:`vtk_image_to_sitk` copies the VTK array once into a new SimpleITK
+image, which then owns its buffer.  SimpleITK cannot wrap a foreign
+buffer.  The VTK side is read as a view, so that is the only copy.
+"""
+
+import argparse
+import functools
+import os
+from pathlib import Path
+import numpy as np
 import vtk
 import SimpleITK as sitk
-from SimpleITK.utilities import vtk as sitk_vtk
 from vtk.util.numpy_support import vtk_to_numpy, numpy_to_vtk
 
+from .batch_convert import image_files, plan_jobs, run_batch
+from .merge_pvti import pvti_to_sitk, read_pvti_header
 
-def vti_to_sitk(vti_path: str) -> sitk.Image:
-    """Read a VTI image and convert it to a SimpleITK image."""
-    reader = vtk.vtkXMLImageDataReader()
-    reader.SetFileName(vti_path)
-    reader.Update()
+VTI_SUFFIXES = (".vti", ".pvti")
+# Inputs searched for in directories when converting to .vti in batch mode.
+SITK_SUFFIXES = (".nii", ".nii.gz", ".nrrd", ".nhdr", ".mha", ".mhd")
 
-    image_data = reader.GetOutput()
 
-    dims = image_data.GetDimensions()
-    spacing = image_data.GetSpacing()
-    origin = image_data.GetOrigin()
-    direction = image_data.GetDirectionMatrix()
+def _direction_matrix(direction) -> vtk.vtkMatrix3x3:
+    """Return a row-major 9-tuple direction as a vtkMatrix3x3."""
+    matrix = vtk.vtkMatrix3x3()
+    matrix.DeepCopy(tuple(direction))
+    return matrix
+
 
+def vtk_image_to_sitk(image_data: vtk.vtkImageData) -> sitk.Image:
+    """Convert vtkImageData to a SimpleITK image.
+
+    The active point scalars (or the first point array) become the pixels;
+    multi-component arrays become vector images.  The VTK array is read
+    through a NumPy view and copied once into the SimpleITK image.
+    """
     point_data = image_data.GetPointData()
     vtk_array = point_data.GetScalars()
     if vtk_array is None and point_data.GetNumberOfArrays() > 0:
@@ -38,91 +64,109 @@ def vti_to_sitk(vti_path: str) -> sitk.Image:
     if vtk_array is None:
         raise ValueError("No point-data array found in the VTI file.")
 
-    np_array = vtk_to_numpy(vtk_array)
+    dims = image_data.GetDimensions()
     num_components = vtk_array.GetNumberOfComponents()
-
-    if num_components == 1:
-        np_array = np_array.reshape(dims[2], dims[1], dims[0])  # z, y, x
-        sitk_image = sitk.GetImageFromArray(np_array)
-    else:
-        np_array = np_array.reshape(dims[2], dims[1], dims[0], num_components)
-        sitk_image = sitk.GetImageFromArray(np_array, isVector=True)
-
-    sitk_image.SetSpacing(spacing)
+    shape = (dims[2], dims[1], dims[0])  # z, y, x
+    if num_components > 1:
+        shape += (num_components,)
+    np_array = vtk_to_numpy(vtk_array).reshape(shape)
+    sitk_image = sitk.GetImageFromArray(np_array, isVector=num_components > 1)
+
+    # The first point of the extent may not be index 0.
+    origin = [0.0, 0.0, 0.0]
+    image_data.TransformIndexToPhysicalPoint(image_data.GetExtent()[0::2], origin)
+    direction = image_data.GetDirectionMatrix()
+    sitk_image.SetSpacing(image_data.GetSpacing())
     sitk_image.SetOrigin(origin)
     sitk_image.SetDirection(
-        (
-            direction.GetElement(0, 0), direction.GetElement(0, 1), direction.GetElement(0, 2),
-            direction.GetElement(1, 0), direction.GetElement(1, 1), direction.GetElement(1, 2),
-            direction.GetElement(2, 0), direction.GetElement(2, 1), direction.GetElement(2, 2),
-        )
+        tuple(direction.GetElement(row, col) for row in range(3) for col in range(3))
     )
-
     return sitk_image
 
 
-def sitk_to_vti(image: sitk.Image, vti_path: str, array_name: str = "ImageScalars") -> None:
-    """Convert a SimpleITK image to VTI and write it to disk."""
-    # Convert SimpleITK -> NumPy
-    arr = sitk.GetArrayFromImage(image)
+def vti_to_sitk(vti_path: str, jobs: int = 1) -> sitk.Image:
+    """Read a VTI image and convert it to a SimpleITK image.
 
-    # SimpleITK uses (z, y, x) for scalar images and (z, y, x, c) for vector images
-    is_vector = image.GetNumberOfComponentsPerPixel() > 1
+    A ``.pvti`` file is assembled by :func:`merge_pvti.pvti_to_sitk`: its
+    pieces are decoded by *jobs* threads straight into one preallocated
+    buffer, and the header supplies origin, spacing and direction.
+    """
+    if str(vti_path).endswith(".pvti"):
+        return pvti_to_sitk(vti_path, jobs=jobs)
+    reader = vtk.vtkXMLImageDataReader()
+    reader.SetFileName(vti_path)
+    reader.Update()
+    return vtk_image_to_sitk(reader.GetOutput())
 
-    vtk_array = numpy_to_vtk(
-        num_array=arr.reshape(-1, arr.shape[-1] if is_vector else 1),
-        deep=True,
-    )
 
-    if is_vector:
-        vtk_array.SetNumberOfComponents(image.GetNumberOfComponentsPerPixel())
-    else:
-        vtk_array.SetNumberOfComponents(1)
+def sitk_to_vtk_image(
+    image: sitk.Image, array_name: str = "ImageScalars", copy: bool = False
+) -> vtk.vtkImageData:
+    """Convert a SimpleITK image to vtkImageData that shares its pixel buffer.
 
+    See the module docstring for the ownership contract.  With *copy* the
+    pixels are copied and the result is independent of *image*.
+    """
+    if image.GetDimension() not in (2, 3):
+        raise ValueError(f"Expected a 2D or 3D image, got {image.GetDimension()}D.")
+    # SimpleITK uses (z, y, x) for scalar images and (z, y, x, c) for vector images
+    num_components = image.GetNumberOfComponentsPerPixel()
+    view = sitk.GetArrayViewFromImage(image).reshape(-1, num_components)
+    vtk_array = numpy_to_vtk(view, deep=copy)
     vtk_array.SetName(array_name)
 
     # Build vtkImageData
-    vti = vtk.vtkImageData()
-    vti.SetDimensions(image.GetSize())  # (x, y, z)
-    vti.SetSpacing(image.GetSpacing())
-    vti.SetOrigin(image.GetOrigin())
-
-    # Direction matrix
-    d = image.GetDirection()
-    direction = vtk.vtkMatrix3x3()
-    direction.DeepCopy(
-        (
-            d[0], d[1], d[2],
-            d[3], d[4], d[5],
-            d[6], d[7], d[8],
-        )
-    )
-    vti.SetDirectionMatrix(direction)
+    size = list(image.GetSize()) + [1] * (3 - image.GetDimension())
+    spacing = list(image.GetSpacing()) + [1.0] * (3 - image.GetDimension())
+    origin = list(image.GetOrigin()) + [0.0] * (3 - image.GetDimension())
+    direction = np.eye(3)
+    dim = image.GetDimension()
+    direction[:dim, :dim] = np.reshape(image.GetDirection(), (dim, dim))
 
-    # VTK expects point data in a flat array
+    vti = vtk.vtkImageData()
+    vti.SetDimensions(size)  # (x, y, z)
+    vti.SetSpacing(spacing)
+    vti.SetOrigin(origin)
+    vti.SetDirectionMatrix(_direction_matrix(direction.ravel()))
     vti.GetPointData().SetScalars(vtk_array)
+    if not copy:
+        # Pin the SimpleITK image, the owner of the buffer, to both objects.
+        vtk_array.sitk_image = image
+        vti.sitk_image = image
+    return vti
 
+
+def sitk_to_vti(image: sitk.Image, vti_path: str, array_name: str = "ImageScalars") -> None:
+    """Convert a SimpleITK image to VTI and write it to disk, without copying it."""
     writer = vtk.vtkXMLImageDataWriter()
     writer.SetFileName(vti_path)
-    writer.SetInputData(vti)
+    writer.SetInputData(sitk_to_vtk_image(image, array_name))
     if writer.Write() != 1:
         raise IOError(f"Failed to write VTI file: {vti_path}")
 
 
-def read_vti_image(file_path: str) -> vtk.vtkImageData:
+def read_vti_image(file_path: str, jobs: int = 1) -> vtk.vtkImageData:
     """
     Read a VTI (VTK XML ImageData) file and return vtkImageData.
 
     Parameters
     ----------
     file_path : str
-        Path to the .vti file.
+        Path to the .vti file, or to a .pvti file whose pieces are decoded
+        concurrently (see :func:`vti_to_sitk`).
+    jobs : int
+        Number of threads decoding .pvti pieces.
 
     Returns
     -------
     vtk.vtkImageData
-        The loaded image data.
+        The loaded image data.  For a .pvti file it holds only the active
+        point scalars and shares the buffer of the assembled image.
     """
+    if str(file_path).endswith(".pvti"):
+        header = read_pvti_header(file_path)
+        name = header.array().name
+        return sitk_to_vtk_image(pvti_to_sitk(file_path, name, jobs, header=header), name)
     reader = vtk.vtkXMLImageDataReader()
     reader.SetFileName(file_path)
     reader.Update()
@@ -133,7 +177,7 @@ def read_vti_image(file_path: str) -> vtk.vtkImageData:
 
     return image
 
-def write_vti_image(image: vtk.vtkImageData, file_path: str) -> None:
+def write_vti_image(image: vtk.vtkImageData, file_path: str, level: int = -1) -> None:
     """
     Write a vtkImageData object to a VTI (VTK XML ImageData) file.
 
@@ -143,6 +187,8 @@ def write_vti_image(image: vtk.vtkImageData, file_path: str) -> None:
         The image data to write.
     file_path : str
         Output path ending in .vti.
+    level : int
+        zlib compression level (0-9); -1 keeps VTK's default.
     """
     if image is None:
         raise ValueError("image must not be None")
@@ -150,6 +196,9 @@ def write_vti_image(image: vtk.vtkImageData, file_path: str) -> None:
     writer = vtk.vtkXMLImageDataWriter()
     writer.SetFileName(file_path)
     writer.SetInputData(image)
+    writer.SetCompressorTypeToZLib()
+    if level >= 0:
+        writer.SetCompressionLevel(level)
 
     # Optional: use binary or ASCII
     writer.SetDataModeToBinary()
@@ -158,28 +207,136 @@ def write_vti_image(image: vtk.vtkImageData, file_path: str) -> None:
         raise RuntimeError(f"Failed to write VTI file: {file_path}")
 
 
-# Example usage
+def convert_file(input_path: str, output_path: str, level: int = -1) -> None:
+    """Convert one file between VTI and a SimpleITK format.
+
+    A .vti or .pvti input is written with SimpleITK, compressed at zlib
+    *level* (0 disables compression, -1 uses the writer's default).  Any
+    other input is read with SimpleITK and written as .vti.
+    """
+    if input_path.endswith(VTI_SUFFIXES):
+        sitk.WriteImage(vti_to_sitk(input_path), output_path, level != 0, level)
+    else:
+        write_vti_image(sitk_to_vtk_image(sitk.ReadImage(input_path)), output_path, level)
+
+
+def _source_files(path: Path) -> list[Path]:
+    """Return *path* and every other file its image is read from.
+
+    That is every piece of a .pvti file, or the files listed by
+    :func:`batch_convert.image_files` for anything else.
+    """
+    if path.suffix.lower() == ".pvti":
+        return [path] + [piece.source for piece in read_pvti_header(path).pieces]
+    return image_files(path)
+
+
+def _output_name(path: Path, suffix: str) -> str:
+    name = path.name
+    for known in VTI_SUFFIXES + SITK_SUFFIXES:
+        if name.lower().endswith(known):
+            return name[:-len(known)] + suffix
+    return path.stem + suffix
+
+
+def convert_batch(  # pylint: disable=too-many-arguments
+    inputs: list[str],
+    suffix: str,
+    *,
+    output_dir: str | None = None,
+    workers: int = 1,
+    level: int = -1,
+    force: bool = False,
+):
+    """Convert files, directories or globs to *suffix* in a process pool.
+
+    With ``suffix=".vti"`` directories are searched for SimpleITK images,
+    otherwise for .vti and .pvti files.  The pieces of a .pvti found
+    alongside it are not converted on their own.  Returns the
+    :class:`batch_convert.BatchResult`.
+    """
+    suffixes = SITK_SUFFIXES if suffix == ".vti" else VTI_SUFFIXES
+    jobs = plan_jobs(inputs, suffixes, functools.partial(_output_name, suffix=suffix),
+                     output_dir)
+    pieces = {
+        piece.resolve()
+        for job in jobs if job.source.suffix == ".pvti"
+        for piece in _source_files(job.source)[1:]
+    }
+    jobs = [job for job in jobs if job.source.resolve() not in pieces]
+    return run_batch(
+        jobs,
+        functools.partial(convert_file, level=level),
+        settings={"level": level},
+        workers=workers,
+        force=force,
+        inputs_of=_source_files,
+    )
+
+
 def main(argv=None):
     """CLI entry point."""
-    args = argv if argv is not None else sys.argv[1:]
-    if len(args) < 2:
-        print("Usage: sitk-vti-sitk <input_image> <output_image>")
-        return 1
-
-    inname = args[0]
-    outname = args[1]
+    parser = argparse.ArgumentParser(
+        prog="sitk-vti-sitk",
+        usage="%(prog)s <input_image> <output_image>\n"
+              "       %(prog)s --batch INPUT [INPUT ...] [-o DIR] [--to SUFFIX] "
+              "[-j N] [--level L] [--force]",
+        description="Convert between VTI and SimpleITK image formats.",
+    )
+    parser.add_argument("paths", nargs="+", help=argparse.SUPPRESS)
+    parser.add_argument(
+        "--batch", action="store_true",
+        help="Convert every input (files, directories or globs) in a process pool, "
+             "skipping outputs whose inputs are unchanged since the last run.",
+    )
+    parser.add_argument(
+        "-o", "--output-dir",
+        help="Batch output directory (default: next to each input).",
+    )
+    parser.add_argument(
+        "--to", default=".nrrd",
+        help="Batch output suffix. '.vti' converts SimpleITK images to VTI, anything "
+             "else converts .vti/.pvti files to that format (default: .nrrd).",
+    )
+    parser.add_argument(
+        "-j", "--jobs", type=int, default=os.cpu_count() or 1,
+        help="Number of batch worker processes (default: number of CPUs).",
+    )
+    parser.add_argument(
+        "--level", type=int, default=-1, choices=range(-1, 10), metavar="{0..9}",
+        help="Batch zlib compression level; 0 writes uncompressed (default: the "
+             "writer's default).",
+    )
+    parser.add_argument(
+        "--force", action="store_true",
+        help="Batch: convert every input, even if its output is up to date.",
+    )
+    args = parser.parse_args(argv)
+
+    if args.batch:
+        result = convert_batch(
+            args.paths,
+            args.to if args.to.startswith(".") else f".{args.to}",
+            output_dir=args.output_dir,
+            workers=args.jobs,
+            level=args.level,
+            force=args.force,
+        )
+        return 1 if result.failed else 0
+    if len(args.paths) != 2:
+        parser.error("expected <input_image> <output_image>, or --batch")
+    inname, outname = args.paths
 
-    if inname.endswith("vti"):
+    if inname.endswith((".vti", ".pvti")):
         print("Reading VTI image", inname)
-        vti_img = read_vti_image(inname)
-        sitk_img = sitk_vtk.vtk2sitk(vti_img)
+        sitk_img = vti_to_sitk(inname, jobs=os.cpu_count() or 1)
         print("Writing SimpleITK image", outname)
         sitk.WriteImage(sitk_img, outname)
     else:
         print("Reading SimpleITK image", inname)
         sitk_img = sitk.ReadImage(inname)
         print("Writing VTI image", outname)
-        vti_img = sitk_vtk.sitk2vtk(sitk_img)
+        vti_img = sitk_to_vtk_image(sitk_img)
         write_vti_image(vti_img, outname)
     return 0
 
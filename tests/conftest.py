@@ -1,7 +1,45 @@
-"""pytest configuration: make the src package importable for all tests."""
+"""pytest configuration: make the src package importable for all tests.
+
+Also holds the helpers shared by several test modules; import them with
+``from conftest import ...``.
+"""
 
 import sys
 from pathlib import Path
 
+import numpy as np
+import SimpleITK as sitk
+
 repo_root = Path(__file__).resolve().parent.parent
 sys.path.insert(0, str(repo_root / "src"))
+
+
+def make_image(shape=(4, 5, 6), dtype=np.float32, components=1):
+    """Return an oriented SimpleITK image of *shape* (z, y, x) with distinct values."""
+    shape = tuple(shape) + ((components,) if components > 1 else ())
+    values = np.arange(np.prod(shape), dtype=dtype).reshape(shape)
+    image = sitk.GetImageFromArray(values, isVector=components > 1)
+    image.SetOrigin((1.0, -2.0, 0.5))
+    image.SetSpacing((0.5, 1.0, 2.0))
+    image.SetDirection((0.0, 1.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, -1.0))
+    return image
+
+
+def assert_same_image(actual, expected):
+    """Assert two SimpleITK images have the same pixels and geometry."""
+    np.testing.assert_array_equal(
+        sitk.GetArrayFromImage(actual), sitk.GetArrayFromImage(expected)
+    )
+    np.testing.assert_allclose(actual.GetOrigin(), expected.GetOrigin())
+    np.testing.assert_allclose(actual.GetSpacing(), expected.GetSpacing())
+    np.testing.assert_allclose(actual.GetDirection(), expected.GetDirection())
+
+
+def read_pvti(path):
+    """Read a .pvti file with VTK's own parallel reader."""
+    import vtk  # pylint: disable=import-outside-toplevel
+
+    reader = vtk.vtkXMLPImageDataReader()
+    reader.SetFileName(str(path))
+    reader.Update()
+    return reader.GetOutput()
@@ -0,0 +1,116 @@
+"""
+Tests for batch_convert.py
+"""
+# pylint: disable=missing-function-docstring,missing-class-docstring
+
+import functools
+import os
+from pathlib import Path
+
+import pytest
+
+from sitk_tools import batch_convert as bc
+
+
+def copy_upper(source: str, output: str, fail_on: str = "") -> None:
+    """Picklable stand-in converter."""
+    if fail_on and source.endswith(fail_on):
+        raise RuntimeError("cannot convert")
+    Path(output).write_text(Path(source).read_text(encoding="utf-8").upper(), encoding="utf-8")
+
+
+def output_name(path: Path) -> str:
+    return path.stem + ".out"
+
+
+@pytest.fixture(name="tree")
+def fixture_tree(tmp_path):
+    (tmp_path / "in" / "sub").mkdir(parents=True)
+    for name in ["a.txt", "b.txt", "sub/c.txt", "skip.dat"]:
+        (tmp_path / "in" / name).write_text(name, encoding="utf-8")
+    return tmp_path
+
+
+class TestPlanJobs:
+    def test_directory_keeps_subdirectories(self, tree):
+        jobs = bc.plan_jobs([str(tree / "in")], (".txt",), output_name, tree / "out")
+        assert [(j.source.name, j.output.relative_to(tree)) for j in jobs] == [
+            ("a.txt", Path("out/a.out")),
+            ("b.txt", Path("out/b.out")),
+            ("c.txt", Path("out/sub/c.out")),
+        ]
+
+    def test_glob_file_and_duplicates(self, tree):
+        jobs = bc.plan_jobs(
+            [str(tree / "in" / "*.txt"), str(tree / "in" / "a.txt"), str(tree / "in" / "skip.dat")],
+            (".txt",), output_name,
+        )
+        assert [j.output for j in jobs] == [
+            tree / "in" / "a.out", tree / "in" / "b.out", tree / "in" / "skip.out"
+        ]
+
+    def test_rejects_missing_input(self, tree):
+        with pytest.raises(FileNotFoundError):
+            bc.plan_jobs([str(tree / "missing.txt")], (".txt",), output_name)
+
+    def test_rejects_output_collisions(self, tree):
+        (tree / "in" / "sub" / "a.txt").write_text("x", encoding="utf-8")
+        with pytest.raises(ValueError, match="both be written"):
+            bc.plan_jobs([str(tree / "in" / "**" / "a.txt")], (".txt",), output_name,
+                         tree / "out")
+
+
+class TestRunBatch:
+    def run(self, tree, capsys, **kwargs):
+        jobs = bc.plan_jobs([str(tree / "in")], (".txt",), output_name, tree / "out")
+        result = bc.run_batch(jobs, kwargs.pop("convert", copy_upper), **kwargs)
+        return result, capsys.readouterr().out
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_converts_and_summarises(self, tree, capsys, workers):
+        result, out = self.run(tree, capsys, workers=workers)
+        assert (result.converted, result.skipped, result.failed) == (3, 0, [])
+        assert (tree / "out" / "sub" / "c.out").read_text(encoding="utf-8") == "SUB/C.TXT"
+        assert result.bytes_in == len("a.txt") + len("b.txt") + len("sub/c.txt")
+        assert "Converted 3 files" in out and "files/s" in out and "MiB/s" in out
+        assert not list(tree.glob("out/**/.part-*"))
+
+    def test_skips_unchanged_inputs(self, tree, capsys):
+        self.run(tree, capsys)
+        result, out = self.run(tree, capsys)
+        assert (result.converted, result.skipped) == (0, 3)
+        assert "skipped 3 unchanged" in out
+
+    def test_reconverts_changed_inputs(self, tree, capsys):
+        self.run(tree, capsys)
+        (tree / "in" / "a.txt").write_text("longer a", encoding="utf-8")
+        stat = (tree / "in" / "b.txt").stat()
+        os.utime(tree / "in" / "b.txt", ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        (tree / "out" / "sub" / "c.out").unlink()
+        result, _ = self.run(tree, capsys)
+        assert (result.converted, result.skipped) == (3, 0)
+        assert (tree / "out" / "a.out").read_text(encoding="utf-8") == "LONGER A"
+
+    def test_reconverts_on_new_settings_or_force(self, tree, capsys):
+        self.run(tree, capsys, settings={"level": 1})
+        assert self.run(tree, capsys, settings={"level": 9})[0].converted == 3
+        assert self.run(tree, capsys, settings={"level": 9}, force=True)[0].converted == 3
+
+    def test_checks_every_input_file(self, tree, capsys):
+        extra = tree / "in" / "skip.dat"
+        inputs_of = lambda source: [source, extra]  # pylint: disable=unnecessary-lambda-assignment
+        self.run(tree, capsys, inputs_of=inputs_of)
+        extra.write_text("changed", encoding="utf-8")
+        assert self.run(tree, capsys, inputs_of=inputs_of)[0].converted == 3
+
+    @pytest.mark.parametrize("workers", [1, 2])
+    def test_failures_do_not_stop_the_batch(self, tree, capsys, workers):
+        convert = functools.partial(copy_upper, fail_on="b.txt")
+        result, out = self.run(tree, capsys, convert=convert, workers=workers)
+        assert result.converted == 2
+        assert [path.name for path, _ in result.failed] == ["b.txt"]
+        assert "Failed to convert" in out and "cannot convert" in out
+        assert not (tree / "out" / "b.out").exists()
+        # The failed file is retried, the others are skipped.
+        result, _ = self.run(tree, capsys)
+        assert (result.converted, result.skipped) == (1, 2)
@@ -0,0 +1,151 @@
+"""
+Tests for merge_pvti.py
+"""
+# pylint: disable=missing-function-docstring,missing-class-docstring
+
+import numpy as np
+import pytest
+
+vtk = pytest.importorskip("vtk")
+import SimpleITK as sitk  # pylint: disable=wrong-import-position,wrong-import-order
+from vtk.util.numpy_support import numpy_to_vtk  # pylint: disable=wrong-import-position,wrong-import-order
+
+from conftest import assert_same_image, make_image  # pylint: disable=wrong-import-position
+from sitk_tools import merge_pvti as mp  # pylint: disable=wrong-import-position
+from sitk_tools import split_vtk_volume as svv  # pylint: disable=wrong-import-position
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def split_image(tmp_path, image, *options):
+    source = tmp_path / "source.mha"
+    sitk.WriteImage(image, str(source))
+    output = tmp_path / "out.pvti"
+    svv.main(["-i", str(source), "-o", str(output), "-nx", "2", "-ny", "3", "-nz", "2",
+              *options])
+    return output
+
+
+# ---------------------------------------------------------------------------
+# Reading
+# ---------------------------------------------------------------------------
+
+class TestReadPvti:
+    @pytest.mark.parametrize("options", [
+        [],
+        ["--compressor", "none"],
+        ["--compressor", "lzma", "--encoding", "inline"],
+        ["--compressor", "none", "--encoding", "inline"],
+        ["--writer", "vtk"],
+        ["--ghost", "1"],
+    ])
+    @pytest.mark.parametrize("jobs", [1, 3])
+    def test_round_trips_split_output(self, tmp_path, options, jobs):
+        image = make_image((9, 10, 13), np.int16)
+        output = split_image(tmp_path, image, *options)
+        assert_same_image(mp.pvti_to_sitk(output, jobs=jobs), image)
+
+    def test_matches_vtk_reader(self, tmp_path):
+        output = split_image(tmp_path, make_image((9, 10, 13), np.int16))
+        name = mp.read_pvti_header(output).array().name
+        np.testing.assert_array_equal(
+            sitk.GetArrayFromImage(mp.pvti_to_sitk(output, jobs=2)),
+            sitk.GetArrayFromImage(mp._read_pvti_vtk(output, name)),  # pylint: disable=protected-access
+        )
+
+    def test_fills_skipped_pieces(self, tmp_path):
+        values = np.zeros((9, 10, 13), dtype=np.uint8)
+        values[6:, 7:, 9:] = 3
+        output = split_image(tmp_path, sitk.GetImageFromArray(values), "--empty", "skip")
+        assert len(mp.read_pvti_header(output).pieces) < 12
+
+        merged = sitk.GetArrayFromImage(mp.pvti_to_sitk(output, fill=7))
+        np.testing.assert_array_equal(merged[6:, 7:, 9:], 3)
+        assert merged[0, 0, 0] == 7
+
+    @pytest.mark.parametrize("mode", ["Binary", "Ascii"])
+    def test_reads_vector_arrays_written_by_vtk(self, tmp_path, mode):
+        values = np.random.default_rng(0).random((4, 5, 6, 3)).astype(np.float32)
+        image = vtk.vtkImageData()
+        image.SetExtent(0, 5, 0, 4, 0, 3)
+        array = numpy_to_vtk(values.reshape(-1, 3), deep=True)
+        array.SetName("velocity")
+        image.GetPointData().SetVectors(array)
+        writer = vtk.vtkXMLPImageDataWriter()
+        writer.SetFileName(str(tmp_path / "vec.pvti"))
+        writer.SetInputData(image)
+        writer.SetNumberOfPieces(2)
+        writer.SetEndPiece(1)
+        getattr(writer, f"SetDataModeTo{mode}")()
+        assert writer.Write() == 1
+
+        merged = mp.pvti_to_sitk(tmp_path / "vec.pvti", "velocity", jobs=2)
+        assert merged.GetNumberOfComponentsPerPixel() == 3
+        np.testing.assert_array_equal(sitk.GetArrayFromImage(merged), values)
+
+    def test_direction_from_first_piece_reads_only_its_xml(self, tmp_path):
+        output = split_image(tmp_path, make_image((9, 10, 13), np.int16))
+        assert b"Direction" not in output.read_bytes()
+        # Nothing after the piece's <ImageData> tag is needed for its direction.
+        piece = mp.read_pvti_header(output).pieces[0].source
+        data = piece.read_bytes()
+        piece.write_bytes(data[:data.index(b">", data.index(b"<ImageData")) + 1] + b"\0" * 4096)
+        assert mp.read_pvti_header(output).direction == pytest.approx(
+            make_image((9, 10, 13), np.int16).GetDirection()
+        )
+
+    def test_uses_a_parsed_header(self, tmp_path, monkeypatch):
+        image = make_image((9, 10, 13), np.int16)
+        output = split_image(tmp_path, image)
+        header = mp.read_pvti_header(output)
+        monkeypatch.setattr(mp, "read_pvti_header", pytest.fail)
+        assert_same_image(mp.pvti_to_sitk(output, header=header), image)
+        mp.merge_pvti(output, tmp_path / "merged.mha", header=header)
+
+    def test_rejects_unknown_array(self, tmp_path):
+        output = split_image(tmp_path, make_image((9, 10, 13), np.int16))
+        with pytest.raises(ValueError, match="No point-data array"):
+            mp.pvti_to_sitk(output, "missing")
+
+
+class TestMain:
+    @pytest.mark.parametrize("suffix", [".nrrd", ".nii.gz"])
+    def test_writes_simpleitk_formats(self, tmp_path, suffix):
+        image = make_image((9, 10, 13), np.int16)
+        output = split_image(tmp_path, image, "--ghost", "1")
+        merged = tmp_path / f"merged{suffix}"
+        assert mp.main(["-i", str(output), "-o", str(merged), "-j", "2"]) == 0
+        result = sitk.ReadImage(str(merged))
+        np.testing.assert_array_equal(
+            sitk.GetArrayFromImage(result), sitk.GetArrayFromImage(image)
+        )
+        np.testing.assert_allclose(result.GetOrigin(), image.GetOrigin(), atol=1e-5)
+
+    @pytest.mark.parametrize("fill, message", [
+        ("2.5", "not a whole number"),
+        ("-1", "outside the UInt8 range"),
+        ("256", "outside the UInt8 range"),
+    ])
+    def test_rejects_fill_the_array_cannot_hold(self, tmp_path, capsys, fill, message):
+        values = np.zeros((9, 10, 13), dtype=np.uint8)
+        output = split_image(tmp_path, sitk.GetImageFromArray(values), "--empty", "skip")
+        with pytest.raises(SystemExit):
+            mp.main(["-i", str(output), "-o", str(tmp_path / "merged.nrrd"), "--fill", fill])
+        assert message in capsys.readouterr().err
+        assert not (tmp_path / "merged.nrrd").exists()
+
+    def test_accepts_fill_the_array_can_hold(self, tmp_path):
+        image = make_image((9, 10, 13), np.int16)
+        output = split_image(tmp_path, image)
+        merged = tmp_path / "merged.nrrd"
+        assert mp.main(["-i", str(output), "-o", str(merged), "--fill", "-7"]) == 0
+        assert mp.main(["-i", str(output), "-o", str(merged), "--fill", "1e3"]) == 0
+
+    def test_benchmark_writes_nothing(self, tmp_path, capsys):
+        output = split_image(tmp_path, make_image((9, 10, 13), np.int16))
+        before = set(tmp_path.iterdir())
+        assert mp.main(["-i", str(output), "--benchmark", "-j", "2"]) == 0
+        assert set(tmp_path.iterdir()) == before
+        assert "vtkXMLPImageDataReader" in capsys.readouterr().out
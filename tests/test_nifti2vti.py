@@ -0,0 +1,87 @@
+"""
+Tests for nifti2vti.py
+"""
+# pylint: disable=missing-function-docstring,missing-class-docstring
+
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+
+vtk = pytest.importorskip("vtk")
+import SimpleITK as sitk  # pylint: disable=wrong-import-position,wrong-import-order
+
+from sitk_tools import nifti2vti as n2v  # pylint: disable=wrong-import-position
+
+
+def write_masks(directory, count=3):
+    directory.mkdir(parents=True, exist_ok=True)
+    values = np.zeros((12, 14, 16), dtype=np.uint8)
+    for i in range(count):
+        values[i:, 2:, 3:] = i + 1
+        suffix = ".nii.gz" if i % 2 == 0 else ".nii"
+        sitk.WriteImage(sitk.GetImageFromArray(values), str(directory / f"mask{i}{suffix}"))
+    return values
+
+
+def read_vti(path):
+    reader = vtk.vtkXMLImageDataReader()
+    reader.SetFileName(str(path))
+    reader.Update()
+    return reader.GetOutput()
+
+
+@pytest.mark.parametrize("name", ["a/mask.nii", "a/mask.nii.gz", "a/mask"])
+def test_derive_output_path_strips_nifti_suffixes(name):
+    assert n2v.derive_output_path(name) == "a/mask.vti"
+
+
+class TestMain:
+    def test_converts_files_next_to_inputs(self, tmp_path, capsys):
+        write_masks(tmp_path, 1)
+        assert n2v.main([str(tmp_path / "mask0.nii.gz")]) == 0
+        assert read_vti(tmp_path / "mask0.vti").GetDimensions() == (16, 14, 12)
+        assert f"Written: {tmp_path / 'mask0.vti'}" in capsys.readouterr().out
+
+    @pytest.mark.parametrize("jobs", ["1", "2"])
+    def test_batch_directory(self, tmp_path, capsys, jobs):
+        write_masks(tmp_path / "in")
+        assert n2v.main([str(tmp_path / "in"), "-o", str(tmp_path / "out"), "-j", jobs]) == 0
+        assert sorted(p.name for p in (tmp_path / "out").glob("*.vti")) == [
+            "mask0.vti", "mask1.vti", "mask2.vti"
+        ]
+        assert "Converted 3 files" in capsys.readouterr().out
+
+        assert n2v.main([str(tmp_path / "in"), "-o", str(tmp_path / "out"), "-j", jobs]) == 0
+        assert "Converted 0 files" in capsys.readouterr().out
+
+    def test_jobs_default_to_the_cpu_count(self, tmp_path, monkeypatch):
+        write_masks(tmp_path, 1)
+        workers_seen = []
+        monkeypatch.setattr(n2v.os, "cpu_count", lambda: 3)
+
+        def run_batch(*_args, workers, **_kwargs):
+            workers_seen.append(workers)
+            return SimpleNamespace(failed=[])
+
+        monkeypatch.setattr(n2v, "run_batch", run_batch)
+        assert n2v.main([str(tmp_path)]) == 0
+        assert workers_seen == [3]
+
+    def test_level_changes_output_and_reconverts(self, tmp_path, capsys):
+        write_masks(tmp_path / "in", 1)
+        pattern = str(tmp_path / "in" / "*.nii.gz")
+        output = tmp_path / "out" / "mask0.vti"
+        n2v.main([pattern, "-o", str(tmp_path / "out"), "--level", "0"])
+        stored = output.stat().st_size
+        n2v.main([pattern, "-o", str(tmp_path / "out"), "--level", "9"])
+        assert "Converted 1 files" in capsys.readouterr().out
+        assert output.stat().st_size < stored
+
+    def test_reports_bad_inputs(self, tmp_path, capsys):
+        write_masks(tmp_path, 1)
+        (tmp_path / "broken.nii").write_bytes(b"not a nifti file")
+        assert n2v.main([str(tmp_path)]) == 1
+        out = capsys.readouterr().out
+        assert "Failed to convert" in out and "broken.nii" in out
+        assert (tmp_path / "mask0.vti").exists()
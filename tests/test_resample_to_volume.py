@@ -1,9 +1,11 @@
 """
 Tests for resample_to_volume.py
 """
-# pylint: disable=missing-function-docstring,missing-class-docstring,too-many-arguments,too-many-positional-arguments
+# pylint: disable=missing-function-docstring,missing-class-docstring,too-many-arguments,too-many-positional-arguments,too-many-lines
 
 import argparse
+from collections import Counter
+import logging
 from pathlib import Path
 
 import pytest
@@ -62,11 +64,72 @@ class TestLoadImage:
         assert loaded.GetSize()[2] == 1
 
 
+# ---------------------------------------------------------------------------
+# read_image_header / ImageHeader
+# ---------------------------------------------------------------------------
+
+class TestReadImageHeader:
+    def test_3d_header_matches_loaded_image(self, tmp_path):
+        d = (0.0, 1.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+        img = make_image(size=(5, 6, 7), spacing=(0.5, 1.5, 2.0),
+                         origin=(1.0, 2.0, 3.0), direction=d)
+        p = str(tmp_path / "vol.nrrd")
+        sitk.WriteImage(img, p)
+        header = rtv.read_image_header(p)
+        loaded = rtv.load_image(p)
+        assert header.size == loaded.GetSize()
+        assert header.spacing == pytest.approx(loaded.GetSpacing())
+        assert header.origin == pytest.approx(loaded.GetOrigin())
+        assert header.direction == pytest.approx(loaded.GetDirection())
+        assert header.pixel_id == loaded.GetPixelID()
+
+    def test_2d_header_matches_promoted_image(self, tmp_path):
+        img2d = sitk.Image(8, 9, sitk.sitkInt16)
+        img2d.SetOrigin((4.0, 5.0))
+        p = str(tmp_path / "slice.nrrd")
+        sitk.WriteImage(img2d, p)
+        header = rtv.read_image_header(p, thickness=2.5)
+        loaded = rtv.load_image(p, thickness=2.5)
+        assert header.size == loaded.GetSize()
+        assert header.spacing == pytest.approx(loaded.GetSpacing())
+        assert header.origin == pytest.approx(loaded.GetOrigin())
+        assert header.direction == pytest.approx(loaded.GetDirection())
+
+    def test_invalid_thickness_raises(self, tmp_path):
+        p = str(tmp_path / "slice.nrrd")
+        sitk.WriteImage(sitk.Image(8, 8, sitk.sitkFloat32), p)
+        with pytest.raises(ValueError):
+            rtv.read_image_header(p, thickness=0.0)
+
+    def test_load_reads_pixels(self, tmp_path):
+        img = make_image(size=(4, 4, 4), fill=3.0)
+        p = str(tmp_path / "vol.nrrd")
+        sitk.WriteImage(img, p)
+        loaded = rtv.read_image_header(p).load()
+        assert np.allclose(sitk.GetArrayFromImage(loaded), 3.0)
+
+    def test_headers_stack_like_images(self, tmp_path):
+        paths = []
+        for i, fill in enumerate((1.0, 4.0)):
+            p = str(tmp_path / f"in{i}.nrrd")
+            sitk.WriteImage(make_image(size=(6, 6, 6), origin=(3.0 * i, 0.0, 0.0),
+                                       fill=fill), p)
+            paths.append(p)
+        headers = [rtv.read_image_header(p) for p in paths]
+        images = [rtv.load_image(p) for p in paths]
+        grid = rtv.compute_reference_grid(images, None)
+        assert rtv.compute_reference_grid(headers, None) == grid
+        np.testing.assert_array_equal(
+            sitk.GetArrayFromImage(rtv.stack_images(headers, *grid, sitk.sitkLinear, 0.0)),
+            sitk.GetArrayFromImage(rtv.stack_images(images, *grid, sitk.sitkLinear, 0.0)),
+        )
+
+
 # ---------------------------------------------------------------------------
 # compute_reference_grid
 # ---------------------------------------------------------------------------
 
-class TestComputeReferenceGrid:
+class TestComputeReferenceGrid:  # pylint: disable=protected-access
     def test_single_image_auto_spacing(self):
         img = make_image(size=(10, 10, 10), spacing=(2.0, 2.0, 2.0))
         size, spacing, _, _ = rtv.compute_reference_grid([img], None)
@@ -101,6 +164,26 @@ class TestComputeReferenceGrid:
         _, _, _, direction = rtv.compute_reference_grid([img], None)
         assert direction == d
 
+    def test_batched_bounding_box_matches_corner_points(self):
+        rotation = sitk.Euler3DTransform((0, 0, 0), 0.3, -0.2, 0.5).GetMatrix()
+        images = [
+            make_image(size=(4, 7, 1), spacing=(0.5, 1.0, 2.0),
+                       origin=(1.0, -3.0, 2.0), direction=rotation),
+            make_image(size=(3, 3, 9), spacing=(1.5, 0.7, 0.3),
+                       origin=(-4.0, 2.0, 0.5)),
+        ]
+        ref = np.array(rotation).reshape(3, 3)
+        corners = np.array([
+            img.TransformContinuousIndexToPhysicalPoint(
+                [(n - 1) * far for n, far in zip(img.GetSize(), corner)]
+            )
+            for img in images
+            for corner in np.ndindex(2, 2, 2)
+        ]) @ ref
+        lo, hi = rtv._bounding_box(*rtv._geometry_arrays(images), ref)
+        assert lo == pytest.approx(corners.min(axis=0))
+        assert hi == pytest.approx(corners.max(axis=0))
+
     def test_size_at_least_one_per_axis(self):
         """Single-voxel image should still produce a valid grid."""
         img = make_image(size=(1, 1, 1), spacing=(1.0, 1.0, 1.0))
@@ -206,6 +289,436 @@ class TestStackImages:
         arr = sitk.GetArrayFromImage(out)
         assert np.allclose(arr, 9.0)
 
+    def test_streaming_matches_pairwise_maximum(self):
+        """Folding into one accumulator must match chaining sitk.Maximum."""
+        images = [
+            make_image(size=(6, 6, 6), origin=(float(i), 0.0, 0.0), fill=float(f))
+            for i, f in enumerate((3.0, 1.0, 7.0, 2.0))
+        ]
+        g = self._grid()
+        out = rtv.stack_images(images, **g)
+
+        expected = rtv.resample_to_reference(images[0], **g)
+        for img in images[1:]:
+            expected = sitk.Maximum(expected, rtv.resample_to_reference(img, **g))
+        np.testing.assert_array_equal(
+            sitk.GetArrayFromImage(out), sitk.GetArrayFromImage(expected)
+        )
+        assert out.GetOrigin() == expected.GetOrigin()
+        assert out.GetSpacing() == expected.GetSpacing()
+
+
+    def test_pad_above_data_matches_pairwise_maximum(self):
+        """Padding larger than the data must still win only outside some input."""
+        img_a = make_image(size=(6, 10, 10), origin=(0.0, 0.0, 0.0), fill=1.0)
+        img_b = make_image(size=(6, 10, 10), origin=(3.0, 0.0, 0.0), fill=2.0)
+        g = self._grid()
+        g["default_value"] = 5.0
+        out = rtv.stack_images([img_a, img_b], **g)
+
+        expected = sitk.Maximum(
+            rtv.resample_to_reference(img_a, **g),
+            rtv.resample_to_reference(img_b, **g),
+        )
+        np.testing.assert_array_equal(
+            sitk.GetArrayFromImage(out), sitk.GetArrayFromImage(expected)
+        )
+
+    def test_parallel_matches_serial(self):
+        images = [
+            make_image(size=(4, 10, 10), origin=(2.0 * i, 0.0, 0.0), fill=float(i % 3))
+            for i in range(6)
+        ]
+        g = self._grid()
+        serial = rtv.stack_images(images, **g)
+        parallel = rtv.stack_images(images, **g, jobs=3)
+        np.testing.assert_array_equal(
+            sitk.GetArrayFromImage(serial), sitk.GetArrayFromImage(parallel)
+        )
+
+    def test_invalid_jobs_raises(self):
+        img = make_image()
+        with pytest.raises(ValueError):
+            rtv.stack_images([img], **self._grid(), jobs=0)
+
+    def test_empty_input_list_raises(self):
+        with pytest.raises(ValueError):
+            rtv.stack_images([], **self._grid())
+
+
+# ---------------------------------------------------------------------------
+# stack_images – reducers
+# ---------------------------------------------------------------------------
+
+class TestReducers:  # pylint: disable=protected-access
+    def _grid(self, default_value=-1.0, size=(16, 4, 4)):
+        return {
+            "size": size,
+            "spacing": (1.0, 1.0, 1.0),
+            "origin": (0.0, 0.0, 0.0),
+            "direction": identity_direction(),
+            "interpolator": sitk.sitkNearestNeighbor,
+            "default_value": default_value,
+        }
+
+    def _pair(self):
+        # Rows x = 0..7 and x = 4..11 overlap on x = 4..7; x = 12..15 is empty.
+        # Being one voxel thick in Y and Z, they only feather along X.
+        return [
+            make_image(size=(8, 1, 1), origin=(0.0, 0.0, 0.0), fill=2.0),
+            make_image(size=(8, 1, 1), origin=(4.0, 0.0, 0.0), fill=6.0),
+        ]
+
+    def _row(self, reducer):
+        out = rtv.stack_images(self._pair(), **self._grid(size=(16, 1, 1)), reducer=reducer)
+        return sitk.GetArrayFromImage(out)[0, 0]
+
+    def test_mean_averages_only_covering_inputs(self):
+        row = self._row("mean")
+        np.testing.assert_allclose(row[:4], 2.0)
+        np.testing.assert_allclose(row[4:8], 4.0)
+        np.testing.assert_allclose(row[8:12], 6.0)
+        np.testing.assert_allclose(row[12:], -1.0)
+
+    def test_first_and_last_wins(self):
+        np.testing.assert_allclose(self._row("first")[4:8], 2.0)
+        np.testing.assert_allclose(self._row("last")[4:8], 6.0)
+        np.testing.assert_allclose(self._row("last")[12:], -1.0)
+
+    def test_feather_blends_across_overlap(self):
+        row = self._row("feather")
+        np.testing.assert_allclose(row[:4], 2.0)
+        np.testing.assert_allclose(row[8:12], 6.0)
+        overlap = row[4:8]
+        assert np.all(np.diff(overlap) > 0)
+        assert overlap[0] > 2.0 and overlap[-1] < 6.0
+        # The overlap is symmetric, so its two halves mirror around the mean.
+        np.testing.assert_allclose(overlap + overlap[::-1], 8.0, rtol=1e-6)
+
+    def test_feather_weights_match_physical_distance(self):  # pylint: disable=too-many-locals
+        direction = (0.0, -1.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+        img = make_image(size=(6, 5, 4), spacing=(0.5, 1.0, 2.0),
+                         origin=(3.0, 1.0, 0.0), direction=direction)
+        size, spacing, origin, grid_dir = rtv.compute_reference_grid([img], [0.5, 0.5, 0.5])
+        grid = (size, spacing, origin, grid_dir)
+        region = rtv._reference_region(img, *grid)
+        weights = rtv._feather_weights(img, grid, region)
+
+        ref = sitk.Image(list(size), sitk.sitkUInt8)
+        ref.SetSpacing(spacing)
+        ref.SetOrigin(origin)
+        ref.SetDirection(grid_dir)
+        in_size = img.GetSize()
+        for k, j, i in [(0, 0, 0), (1, 2, 3), (3, 4, 2)]:
+            idx = [region[0][0] + i, region[0][1] + j, region[0][2] + k]
+            cont = img.TransformPhysicalPointToContinuousIndex(
+                ref.TransformIndexToPhysicalPoint(idx)
+            )
+            expected = max(min(
+                min(cont[a] + 0.5, in_size[a] - 0.5 - cont[a]) * img.GetSpacing()[a]
+                for a in range(3)
+            ), 1e-6)
+            assert weights[k, j, i] == pytest.approx(expected, abs=1e-5)
+
+    @pytest.mark.parametrize("reducer", ["mean", "feather", "first", "last"])
+    def test_parallel_matches_serial(self, reducer):
+        images = [
+            make_image(size=(5, 4, 4), origin=(2.0 * i, 0.0, 0.0), fill=float(i + 1))
+            for i in range(6)
+        ]
+        g = self._grid()
+        serial = rtv.stack_images(images, **g, reducer=reducer)
+        parallel = rtv.stack_images(images, **g, jobs=3, reducer=reducer)
+        np.testing.assert_array_equal(
+            sitk.GetArrayFromImage(serial), sitk.GetArrayFromImage(parallel)
+        )
+
+    @pytest.mark.parametrize("reducer", ["mean", "feather", "last"])
+    def test_slabs_match_in_memory(self, tmp_path, reducer):
+        images = [
+            make_image(size=(4, 4, 3), origin=(0.0, 0.0, 3.0 * i), fill=float(i + 1))
+            for i in range(4)
+        ]
+        g = self._grid()
+        grid = rtv.compute_reference_grid(images, [1.0, 1.0, 1.0])
+        expected = rtv.stack_images(images, *grid, sitk.sitkLinear, -1.0, reducer=reducer)
+        out = tmp_path / "out.mha"
+        rtv.write_slabs(images, grid, str(out), 2, sitk.sitkLinear, g["default_value"],
+                        reducer=reducer)
+        np.testing.assert_allclose(
+            sitk.GetArrayFromImage(sitk.ReadImage(str(out))),
+            sitk.GetArrayFromImage(expected), atol=1e-5,
+        )
+
+    def test_unknown_reducer_raises(self):
+        with pytest.raises(ValueError, match="Unknown reducer"):
+            rtv.stack_images(self._pair(), **self._grid(size=(16, 1, 1)), reducer="median")
+
+
+# ---------------------------------------------------------------------------
+# ResampleCache
+# ---------------------------------------------------------------------------
+
+class TestResampleCache:
+    def _headers(self, tmp_path, fills=(1.0, 4.0)):
+        paths = []
+        for k, fill in enumerate(fills):
+            path = tmp_path / f"in{k}.nrrd"
+            sitk.WriteImage(make_image(size=(6, 6, 6), origin=(3.0 * k, 0.0, 0.0),
+                                       fill=fill), str(path))
+            paths.append(str(path))
+        return [rtv.read_image_header(p) for p in paths]
+
+    def _stack(self, headers, cache, pad=0.0, reducer="max"):
+        grid = rtv.compute_reference_grid(headers, [1.0, 1.0, 1.0])
+        out = rtv.stack_images(headers, *grid, sitk.sitkLinear, pad,
+                               reducer=reducer, cache=cache)
+        return sitk.GetArrayFromImage(out)
+
+    def test_rerun_hits_and_matches(self, tmp_path):
+        headers = self._headers(tmp_path)
+        cache = rtv.ResampleCache(str(tmp_path / "cache"), 1 << 30)
+        first = self._stack(headers, cache)
+        assert (cache.hits, cache.misses) == (0, 2)
+        second = self._stack(headers, cache)
+        assert (cache.hits, cache.misses) == (2, 2)
+        np.testing.assert_array_equal(first, second)
+
+    def test_changed_input_misses(self, tmp_path):
+        headers = self._headers(tmp_path)
+        cache = rtv.ResampleCache(str(tmp_path / "cache"), 1 << 30)
+        self._stack(headers, cache)
+        sitk.WriteImage(make_image(size=(6, 6, 6), origin=(3.0, 0.0, 0.0), fill=9.0),
+                        headers[1].path)
+        result = self._stack(headers, cache)
+        assert (cache.hits, cache.misses) == (1, 3)
+        assert result.max() == pytest.approx(9.0)
+
+    @pytest.mark.parametrize("suffix", [".mhd", ".nhdr"])
+    def test_changed_detached_data_misses(self, tmp_path, suffix):
+        path = tmp_path / f"in{suffix}"
+        sitk.WriteImage(make_image(size=(6, 6, 6), fill=1.0), str(path))
+        headers = [rtv.read_image_header(str(path))]
+        cache = rtv.ResampleCache(str(tmp_path / "cache"), 1 << 30)
+        self._stack(headers, cache)
+        # Rewrite only the data file; the header stays byte-identical.
+        header_bytes = path.read_bytes()
+        sitk.WriteImage(make_image(size=(6, 6, 6), fill=9.0), str(tmp_path / f"new{suffix}"))
+        (tmp_path / "new.raw").replace(tmp_path / "in.raw")
+        assert path.read_bytes() == header_bytes
+        result = self._stack(headers, cache)
+        assert (cache.hits, cache.misses) == (0, 2)
+        assert result.max() == pytest.approx(9.0)
+
+    def test_pad_only_keys_max_reducer(self, tmp_path):
+        headers = self._headers(tmp_path)
+        cache = rtv.ResampleCache(str(tmp_path / "cache"), 1 << 30)
+        self._stack(headers, cache, pad=0.0, reducer="mean")
+        self._stack(headers, cache, pad=-5.0, reducer="mean")
+        assert cache.hits == 2
+        self._stack(headers, cache, pad=-5.0, reducer="max")
+        self._stack(headers, cache, pad=-7.0, reducer="max")
+        assert cache.misses == 6
+
+    def test_lru_eviction_keeps_size_under_limit(self, tmp_path):
+        headers = self._headers(tmp_path, fills=(1.0, 2.0, 3.0))
+        entry_bytes = 6 * 6 * 6 * 4 + 128
+        cache_dir = tmp_path / "cache"
+        cache = rtv.ResampleCache(str(cache_dir), 2 * entry_bytes + entry_bytes // 2)
+        self._stack(headers, cache)
+        entries = list(cache_dir.glob("*.npy"))
+        assert len(entries) == 2
+        assert sum(e.stat().st_size for e in entries) <= cache.max_bytes
+
+    def test_overwriting_an_entry_keeps_the_total(self, tmp_path):
+        cache_dir = tmp_path / "cache"
+        cache = rtv.ResampleCache(str(cache_dir), 1 << 30)
+        for _ in range(3):
+            cache.put("entry", np.zeros((4, 4, 4), dtype=np.float32))
+        assert cache._total == (cache_dir / "entry.npy").stat().st_size  # pylint: disable=protected-access
+        assert [p.name for p in cache_dir.iterdir()] == ["entry.npy"]
+
+    def test_main_with_cache_matches_without(self, tmp_path):
+        headers = self._headers(tmp_path)
+        plain = tmp_path / "plain.nrrd"
+        cached = tmp_path / "cached.nrrd"
+        cache_args = ["--cache-dir", str(tmp_path / "cache")]
+        assert rtv.main([h.path for h in headers] + [str(plain)]) == 0
+        for _ in range(2):
+            assert rtv.main(cache_args + [h.path for h in headers] + [str(cached)]) == 0
+            np.testing.assert_array_equal(
+                sitk.GetArrayFromImage(sitk.ReadImage(str(plain))),
+                sitk.GetArrayFromImage(sitk.ReadImage(str(cached))),
+            )
+
+
+# ---------------------------------------------------------------------------
+# _reference_region
+# ---------------------------------------------------------------------------
+
+class TestReferenceRegion:  # pylint: disable=protected-access
+    def _grid(self):
+        return {
+            "size": (8, 8, 20),
+            "spacing": (1.0, 1.0, 1.0),
+            "origin": (0.0, 0.0, 0.0),
+            "direction": identity_direction(),
+        }
+
+    def test_single_slice_covers_one_plane(self):
+        img = make_image(size=(8, 8, 1), origin=(0.0, 0.0, 7.0))
+        index, size = rtv._reference_region(img, **self._grid())
+        assert index == (0, 0, 7)
+        assert size == (8, 8, 1)
+
+    def test_region_clamped_to_grid(self):
+        img = make_image(size=(4, 4, 4), origin=(6.0, -2.0, 18.0))
+        index, size = rtv._reference_region(img, **self._grid())
+        assert index == (6, 0, 18)
+        assert size == (2, 2, 2)
+
+    def test_disjoint_image_returns_none(self):
+        img = make_image(size=(4, 4, 4), origin=(100.0, 0.0, 0.0))
+        assert rtv._reference_region(img, **self._grid()) is None
+
+
+# ---------------------------------------------------------------------------
+# write_slabs / MetaImageSlabWriter
+# ---------------------------------------------------------------------------
+
+class TestWriteSlabs:
+    def _inputs(self):
+        rng = np.random.default_rng(0)
+        images = []
+        for k, origin in enumerate([(0.0, 0.0, 0.0), (3.0, 1.0, 5.0), (1.0, 2.0, 11.0)]):
+            arr = rng.uniform(0, 100, size=(4, 6, 7)).astype(np.float32) + k
+            img = sitk.GetImageFromArray(arr)
+            img.SetOrigin(origin)
+            images.append(img)
+        return images
+
+    @pytest.mark.parametrize("slab", [1, 3, 100])
+    def test_matches_in_memory_stack(self, tmp_path, slab):
+        images = self._inputs()
+        grid = rtv.compute_reference_grid(images, [1.0, 1.0, 1.0])
+        expected = rtv.stack_images(images, *grid, sitk.sitkLinear, -1.0)
+        out = tmp_path / "out.mha"
+        rtv.write_slabs(images, grid, str(out), slab, sitk.sitkLinear, -1.0)
+        result = sitk.ReadImage(str(out))
+        assert result.GetSize() == expected.GetSize()
+        assert result.GetOrigin() == pytest.approx(expected.GetOrigin())
+        np.testing.assert_allclose(
+            sitk.GetArrayFromImage(result), sitk.GetArrayFromImage(expected), atol=1e-4
+        )
+
+    @pytest.mark.parametrize("slab", [1, 2, 5])
+    def test_gap_fill_with_halo_matches_in_memory(self, tmp_path, slab):
+        images = []
+        for k, z in enumerate([0.0, 4.0, 11.0]):
+            img = make_image(size=(5, 5, 1), origin=(0.0, 0.0, z), fill=10.0 * (k + 1))
+            images.append(img)
+        grid = rtv.compute_reference_grid(images, [1.0, 1.0, 1.0])
+        covered = rtv._covered_z_planes(images, *grid)  # pylint: disable=protected-access
+        expected = rtv.fill_slice_gaps(
+            rtv.stack_images(images, *grid, sitk.sitkLinear, 0.0), covered, 0.0
+        )
+        out = tmp_path / "out.mhd"
+        rtv.write_slabs(images, grid, str(out), slab, sitk.sitkLinear, 0.0,
+                        covered=covered)
+        assert (tmp_path / "out.raw").exists()
+        np.testing.assert_allclose(
+            sitk.GetArrayFromImage(sitk.ReadImage(str(out))),
+            sitk.GetArrayFromImage(expected), atol=1e-4,
+        )
+
+    @staticmethod
+    def _count_loads(monkeypatch):
+        loads = []
+        load = rtv.ImageHeader.load
+
+        def counting_load(header, *box):
+            loads.append((header.path, box))
+            return load(header, *box)
+
+        monkeypatch.setattr(rtv.ImageHeader, "load", counting_load)
+        return loads
+
+    @pytest.mark.parametrize("interp", ["linear", "nearest", "bspline", "gaussian"])
+    def test_headers_read_only_the_slab_region(self, tmp_path, monkeypatch, interp):
+        rotation = sitk.Euler3DTransform((0, 0, 0), 0.2, 0.1, 0.4).GetMatrix()
+        paths = []
+        for k, img in enumerate(self._inputs()):
+            img = sitk.Expand(img, (2, 2, 8))
+            img.SetSpacing((0.5, 0.5, 0.25))
+            if k == 1:
+                img.SetDirection(rotation)
+            paths.append(str(tmp_path / f"in{k}.mha"))
+            sitk.WriteImage(img, paths[-1])
+        headers = [rtv.read_image_header(path) for path in paths]
+        images = [header.load() for header in headers]
+        grid = rtv.compute_reference_grid(images, [0.5, 0.5, 0.5])
+        interpolator = rtv.INTERPOLATORS[interp]
+        expected = rtv.stack_images(images, *grid, interpolator, -1.0)
+
+        loads = self._count_loads(monkeypatch)
+        out = tmp_path / "out.mha"
+        rtv.write_slabs(headers, grid, str(out), 4, interpolator, -1.0)
+        np.testing.assert_allclose(
+            sitk.GetArrayFromImage(sitk.ReadImage(str(out))),
+            sitk.GetArrayFromImage(expected), atol=1e-4,
+        )
+        if interp in ("linear", "nearest"):
+            # Every read is a box smaller than the 32-plane input; for
+            # axis-aligned inputs a slab (8 input planes) plus the margin.
+            assert all(box and box[1][2] < 32 for _, box in loads)
+            assert all(box[1][2] <= 8 + 1 for path, box in loads if path != paths[1])
+
+    def test_halo_planes_are_rendered_once(self, tmp_path, monkeypatch):
+        headers = []
+        for k, z in enumerate([0.0, 4.0, 11.0]):
+            path = str(tmp_path / f"slice{k}.mha")
+            sitk.WriteImage(
+                make_image(size=(5, 5, 1), origin=(0.0, 0.0, z), fill=10.0 * (k + 1)), path
+            )
+            headers.append(rtv.read_image_header(path))
+        grid = rtv.compute_reference_grid(headers, [1.0, 1.0, 1.0])
+        covered = rtv._covered_z_planes(headers, *grid)  # pylint: disable=protected-access
+        loads = self._count_loads(monkeypatch)
+        rtv.write_slabs(headers, grid, str(tmp_path / "out.mha"), 1, sitk.sitkLinear, 0.0,
+                        covered=covered)
+        # Once as the upper halo of the gap below it, once in its own slab.
+        counts = Counter(path for path, _ in loads)
+        assert max(counts.values()) <= 2
+
+    def test_rotated_header_round_trips(self, tmp_path):
+        direction = (0.0, -1.0, 0.0, 1.0, 0.0, 0.0, 0.0, 0.0, 1.0)
+        out = tmp_path / "out.mha"
+        arr = np.arange(2 * 3 * 4, dtype=np.int16).reshape(2, 3, 4)
+        with rtv.MetaImageSlabWriter(str(out), (4, 3, 2), (0.5, 0.25, 2.0),
+                                     (1.0, -2.0, 3.5), direction, np.int16) as writer:
+            writer.write(arr[:1])
+            writer.write(arr[1:])
+        result = sitk.ReadImage(str(out))
+        assert result.GetPixelID() == sitk.sitkInt16
+        assert result.GetDirection() == pytest.approx(direction)
+        assert result.GetSpacing() == pytest.approx((0.5, 0.25, 2.0))
+        assert result.GetOrigin() == pytest.approx((1.0, -2.0, 3.5))
+        np.testing.assert_array_equal(sitk.GetArrayFromImage(result), arr)
+
+    def test_incomplete_volume_raises(self, tmp_path):
+        writer = rtv.MetaImageSlabWriter(str(tmp_path / "out.mha"), (2, 2, 3),
+                                         (1.0,) * 3, (0.0,) * 3,
+                                         identity_direction(), np.float32)
+        writer.write(np.zeros((1, 2, 2), dtype=np.float32))
+        with pytest.raises(RuntimeError, match="1 of 3 planes"):
+            writer.close()
+
+    def test_unsupported_suffix_raises(self, tmp_path):
+        with pytest.raises(ValueError, match=".mha or .mhd"):
+            rtv.MetaImageSlabWriter(str(tmp_path / "out.nrrd"), (2, 2, 2),
+                                    (1.0,) * 3, (0.0,) * 3,
+                                    identity_direction(), np.float32)
+
 
 # ---------------------------------------------------------------------------
 # build_spacing
@@ -286,11 +799,56 @@ class TestMain:
         rc = rtv.main(["-i", "nearest", str(inp), str(out)])
         assert rc == 0
 
+    def test_parallel_jobs_match_serial(self, tmp_path):
+        inp1 = tmp_path / "a.nrrd"
+        inp2 = tmp_path / "b.nrrd"
+        self._write_image(inp1, origin=(0.0, 0.0, 0.0), fill=1.0)
+        self._write_image(inp2, origin=(4.0, 0.0, 0.0), fill=5.0)
+        serial = tmp_path / "serial.nrrd"
+        parallel = tmp_path / "parallel.nrrd"
+        assert rtv.main([str(inp1), str(inp2), str(serial)]) == 0
+        assert rtv.main(["-j", "2", str(inp1), str(inp2), str(parallel)]) == 0
+        np.testing.assert_array_equal(
+            sitk.GetArrayFromImage(sitk.ReadImage(str(serial))),
+            sitk.GetArrayFromImage(sitk.ReadImage(str(parallel))),
+        )
+
     def test_no_inputs_returns_error(self, tmp_path):
         out = tmp_path / "out.nrrd"
         rc = rtv.main([str(out)])
         assert rc == 1
 
+    def test_invalid_spacing_fails_before_writing(self, tmp_path):
+        inp = tmp_path / "in.nrrd"
+        out = tmp_path / "out.nrrd"
+        self._write_image(inp)
+        rc = rtv.main(["-x", "-1.0", str(inp), str(out)])
+        assert rc == 1
+        assert not out.exists()
+
+    def test_slab_output_matches_in_memory(self, tmp_path):
+        inp1 = tmp_path / "a.nrrd"
+        inp2 = tmp_path / "b.nrrd"
+        self._write_image(inp1, origin=(0.0, 0.0, 0.0), fill=1.0)
+        self._write_image(inp2, origin=(4.0, 0.0, 3.0), fill=5.0)
+        whole = tmp_path / "whole.mha"
+        slabs = tmp_path / "slabs.mha"
+        assert rtv.main([str(inp1), str(inp2), str(whole)]) == 0
+        assert rtv.main(["--slab", "3", str(inp1), str(inp2), str(slabs)]) == 0
+        expected = sitk.ReadImage(str(whole))
+        result = sitk.ReadImage(str(slabs))
+        assert result.GetPixelID() == expected.GetPixelID()
+        np.testing.assert_allclose(
+            sitk.GetArrayFromImage(result), sitk.GetArrayFromImage(expected)
+        )
+
+    def test_slab_requires_metaimage_output(self, tmp_path):
+        inp = tmp_path / "in.nrrd"
+        out = tmp_path / "out.nrrd"
+        self._write_image(inp)
+        assert rtv.main(["--slab", "4", str(inp), str(out)]) == 1
+        assert not out.exists()
+
     def test_2d_input_promoted(self, tmp_path):
         img2d = sitk.Image(8, 8, sitk.sitkFloat32)
         img2d = img2d + 1.0
@@ -507,6 +1065,22 @@ class TestFillSliceGaps:
         assert arr[0, 0, 0] == pytest.approx(10.0)
         assert arr[4, 0, 0] == pytest.approx(20.0)
 
+    def test_chunked_fill_matches_single_pass(self, monkeypatch):
+        rng = np.random.default_rng(0)
+        arr = rng.random((12, 4, 4)).astype(np.float32)
+        vol = sitk.GetImageFromArray(arr)
+        covered = [2, 5, 9]
+        whole = sitk.GetArrayFromImage(rtv.fill_slice_gaps(vol, covered, 0.0))
+        monkeypatch.setattr(rtv, "_GAP_FILL_CHUNK_BYTES", 1)
+        chunked = sitk.GetArrayFromImage(rtv.fill_slice_gaps(vol, covered, 0.0))
+        np.testing.assert_array_equal(whole, chunked)
+
+    def test_inplace_fill_modifies_array(self):
+        arr = np.zeros((3, 2, 2), dtype=np.float32)
+        arr[2] = 4.0
+        rtv._fill_slice_gaps_inplace(arr, [0, 2])  # pylint: disable=protected-access
+        assert np.allclose(arr[1], 2.0)
+
     def test_metadata_preserved(self):
         vol = self._vol()
         vol.SetSpacing((2.0, 2.0, 3.0))
@@ -580,6 +1154,43 @@ class TestLoadDicomSlices:  # pylint: disable=redefined-outer-name
         for s in rtv.load_dicom_slices(dicom_series_dir, thickness=4.0):
             assert s.GetSpacing()[2] == pytest.approx(4.0)
 
+    def test_headers_match_loaded_slices(self, dicom_series_dir):
+        headers = rtv.read_dicom_headers(dicom_series_dir)
+        slices = rtv.load_dicom_slices(dicom_series_dir)
+        assert len(headers) == len(slices)
+        for header, img in zip(headers, slices):
+            assert header.size == img.GetSize()
+            assert header.spacing == pytest.approx(img.GetSpacing())
+            assert header.origin == pytest.approx(img.GetOrigin())
+            assert header.direction == pytest.approx(img.GetDirection())
+            loaded = header.load()
+            np.testing.assert_array_equal(
+                sitk.GetArrayFromImage(loaded), sitk.GetArrayFromImage(img)
+            )
+
+    def test_parallel_load_preserves_order(self, dicom_series_dir):
+        serial = rtv.load_dicom_slices(dicom_series_dir)
+        parallel = rtv.load_dicom_slices(dicom_series_dir, workers=3)
+        assert [s.GetOrigin() for s in parallel] == [s.GetOrigin() for s in serial]
+        for a, b in zip(serial, parallel):
+            np.testing.assert_array_equal(
+                sitk.GetArrayFromImage(a), sitk.GetArrayFromImage(b)
+            )
+
+    def test_unreadable_file_is_skipped(self, dicom_series_dir, monkeypatch):
+        files = rtv._dicom_series_files(dicom_series_dir)  # pylint: disable=protected-access
+        bogus = str(Path(dicom_series_dir) / "missing.dcm")
+        monkeypatch.setattr(rtv, "_dicom_series_files", lambda _d: files[:1] + [bogus] + files[1:])
+        slices = rtv.load_dicom_slices(dicom_series_dir, workers=2)
+        headers = rtv.read_dicom_headers(dicom_series_dir)
+        assert len(slices) == 3
+        assert len(headers) == 3
+
+    def test_raises_when_no_file_readable(self, dicom_series_dir, monkeypatch):
+        monkeypatch.setattr(rtv, "_dicom_series_files", lambda _d: ["missing.dcm"])
+        with pytest.raises(ValueError, match="Could not read any"):
+            rtv.load_dicom_slices(dicom_series_dir)
+
     def test_raises_for_directory_with_no_dicom(self, tmp_path):
         with pytest.raises(ValueError, match="No DICOM series found"):
             rtv.load_dicom_slices(str(tmp_path))
@@ -608,6 +1219,64 @@ class TestMainDicom:  # pylint: disable=redefined-outer-name
         mid = arr.shape[0] // 2
         assert arr[mid, 0, 0] == pytest.approx(50.0, abs=1.0)
 
+    def test_slab_gap_fill_matches_in_memory(self, dicom_series_dir, tmp_path):
+        (Path(dicom_series_dir) / "slice0001.dcm").unlink()
+        whole = str(tmp_path / "whole.mha")
+        slabs = str(tmp_path / "slabs.mha")
+        assert rtv.main(["-D", dicom_series_dir, "-s", "1.0", whole]) == 0
+        assert rtv.main(["-D", dicom_series_dir, "-s", "1.0", "--slab", "2", slabs]) == 0
+        np.testing.assert_array_equal(
+            sitk.GetArrayFromImage(sitk.ReadImage(slabs)),
+            sitk.GetArrayFromImage(sitk.ReadImage(whole)),
+        )
+
+    @pytest.mark.parametrize("slab", [[], ["--slab", "2"]])
+    def test_undecodable_slice_is_skipped_and_filled(
+        self, dicom_series_dir, tmp_path, monkeypatch, caplog, slab
+    ):
+        """A slice whose header reads but whose pixels fail is treated as a gap."""
+        load = rtv.ImageHeader.load
+
+        def failing_load(header, *box):
+            if header.path.endswith("slice0001.dcm"):
+                raise RuntimeError("corrupt pixel data")
+            return load(header, *box)
+
+        monkeypatch.setattr(rtv.ImageHeader, "load", failing_load)
+        out = str(tmp_path / "out.mha")
+        with caplog.at_level(logging.WARNING):
+            assert rtv.main(["-D", dicom_series_dir, "-s", "1.0", *slab, out]) == 0
+        assert "Skipping" in caplog.text and "corrupt pixel data" in caplog.text
+        assert "1 of 3 DICOM slice(s) could not be decoded" in caplog.text
+        assert caplog.text.count("Skipping") == 1
+        arr = sitk.GetArrayFromImage(sitk.ReadImage(out))
+        assert arr[arr.shape[0] // 2, 0, 0] == pytest.approx(50.0, abs=1.0)
+
+    def test_fails_when_no_slice_decodes(self, dicom_series_dir, tmp_path, monkeypatch, capsys):
+        def failing_load(_header, *_box):
+            raise RuntimeError("corrupt pixel data")
+
+        monkeypatch.setattr(rtv.ImageHeader, "load", failing_load)
+        out = tmp_path / "out.mha"
+        assert rtv.main(["-D", dicom_series_dir, "--slab", "2", str(out)]) == 1
+        assert "could not decode any DICOM slice" in capsys.readouterr().out
+        assert not out.exists()
+
+    @pytest.mark.parametrize("slab", [[], ["--slab", "2"]])
+    def test_logs_header_scan_and_decode_throughput(
+        self, dicom_series_dir, tmp_path, caplog, slab
+    ):
+        with caplog.at_level(logging.INFO):
+            rtv.main(["-D", dicom_series_dir, "-s", "1.0", *slab, str(tmp_path / "out.mha")])
+        scan = next(r.getMessage() for r in caplog.records if "header scan" in r.getMessage())
+        assert "3 slice(s)" in scan and "MB/s" not in scan
+        decode = next(r.getMessage().strip() for r in caplog.records
+                      if r.getMessage().strip().startswith("decoded"))
+        # Each 8x8 uint16 slice decodes to 128 bytes.
+        count = int(decode.split()[1])
+        assert count >= 3 and f"{count * 128 / 1e6:.1f} MB" in decode
+        assert "slices/s" in decode and "MB/s" in decode
+
     def test_dicom_only_needs_output_positional_arg(self, dicom_series_dir, tmp_path):
         """When -D is given, a single positional arg (output) is enough."""
         out = str(tmp_path / "out.nrrd")
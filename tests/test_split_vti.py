@@ -0,0 +1,82 @@
+"""
+Tests for split_vti.py
+"""
+# pylint: disable=missing-function-docstring,missing-class-docstring
+
+import xml.etree.ElementTree as ET
+
+import numpy as np
+import pytest
+
+vtk = pytest.importorskip("vtk")
+from vtk.util.numpy_support import numpy_to_vtk, vtk_to_numpy  # pylint: disable=wrong-import-position,wrong-import-order
+
+from conftest import read_pvti  # pylint: disable=wrong-import-position
+from sitk_tools import split_vti as sv  # pylint: disable=wrong-import-position
+
+
+def write_fields(path):
+    """Write a .vti with int16 scalars, a float64 vector and uint8 cell labels."""
+    image = vtk.vtkImageData()
+    image.SetExtent(0, 9, 0, 7, 0, 5)
+    n_points = image.GetNumberOfPoints()
+    fields = [
+        ("density", np.arange(n_points, dtype=np.int16), image.GetPointData()),
+        ("velocity", np.arange(3 * n_points, dtype=np.float64).reshape(-1, 3),
+         image.GetPointData()),
+        ("label", np.arange(image.GetNumberOfCells(), dtype=np.uint8), image.GetCellData()),
+    ]
+    for name, values, data in fields:
+        array = numpy_to_vtk(values, deep=True)
+        array.SetName(name)
+        data.AddArray(array)
+    image.GetPointData().SetActiveScalars("density")
+    writer = vtk.vtkXMLImageDataWriter()
+    writer.SetFileName(str(path))
+    writer.SetInputData(image)
+    assert writer.Write() == 1
+
+
+def header_arrays(path):
+    root = ET.parse(path).getroot()
+    return {
+        (section.tag, array.get("Name")): (array.get("type"),
+                                           array.get("NumberOfComponents", "1"))
+        for section in root.find("PImageData")
+        if section.tag in ("PPointData", "PCellData")
+        for array in section
+    }
+
+
+class TestSplitVti:
+    def test_header_declares_real_types(self, tmp_path):
+        write_fields(tmp_path / "in.vti")
+        output = tmp_path / "out.pvti"
+        sv.split_vti(str(tmp_path / "in.vti"), str(output), 2, 2, 1)
+        assert header_arrays(output) == {
+            ("PPointData", "density"): ("Int16", "1"),
+            ("PPointData", "velocity"): ("Float64", "3"),
+            ("PCellData", "label"): ("UInt8", "1"),
+        }
+        merged = read_pvti(output)
+        assert vtk_to_numpy(merged.GetPointData().GetArray("density")).dtype == np.int16
+        np.testing.assert_array_equal(
+            vtk_to_numpy(merged.GetCellData().GetArray("label")),
+            np.arange(9 * 7 * 5, dtype=np.uint8),
+        )
+
+    def test_arrays_option_limits_pieces(self, tmp_path):
+        write_fields(tmp_path / "in.vti")
+        output = tmp_path / "out.pvti"
+        assert sv.main(["-i", str(tmp_path / "in.vti"), "-o", str(output),
+                        "-nx", "2", "-ny", "1", "-nz", "1",
+                        "--arrays", "density", "label"]) == 0
+        assert set(header_arrays(output)) == {
+            ("PPointData", "density"), ("PCellData", "label"),
+        }
+        merged = read_pvti(output)
+        assert merged.GetPointData().GetArray("velocity") is None
+        assert all(
+            "velocity" not in piece.read_text(errors="ignore")
+            for piece in tmp_path.glob("out_*.vti")
+        )
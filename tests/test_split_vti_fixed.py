@@ -0,0 +1,54 @@
+"""
+Tests for split_vti_fixed.py
+"""
+# pylint: disable=missing-function-docstring,missing-class-docstring
+
+import numpy as np
+import pytest
+
+vtk = pytest.importorskip("vtk")
+from vtk.util.numpy_support import vtk_to_numpy  # pylint: disable=wrong-import-position,wrong-import-order
+
+from conftest import read_pvti  # pylint: disable=wrong-import-position
+from sitk_tools import split_vti_fixed as svf  # pylint: disable=wrong-import-position
+
+
+class TestSplitVtiFixed:
+    @pytest.mark.parametrize("jobs,parallel", [(1, "thread"), (3, "thread"), (2, "process")])
+    def test_pieces_reassemble(self, tmp_path, jobs, parallel):
+        source = tmp_path / "in.vti"
+        svf.create_dummy_vti(str(source))
+        output = tmp_path / "out" / "out.pvti"
+        svf.split_vti(str(source), str(output), 2, 3, 2, jobs, parallel)
+
+        assert len(list(output.parent.glob("out_*.vti"))) == 12
+        reader = vtk.vtkXMLImageDataReader()
+        reader.SetFileName(str(source))
+        reader.Update()
+        merged = read_pvti(output)
+        assert merged.GetExtent() == reader.GetOutput().GetExtent()
+        np.testing.assert_array_equal(
+            vtk_to_numpy(merged.GetPointData().GetArray("Elevation")),
+            vtk_to_numpy(reader.GetOutput().GetPointData().GetArray("Elevation")),
+        )
+
+    def test_main_threads(self, tmp_path, capsys):
+        source = tmp_path / "in.vti"
+        svf.create_dummy_vti(str(source))
+        output = tmp_path / "out.pvti"
+        assert svf.main(["-i", str(source), "-o", str(output), "-j", "2"]) == 0
+        assert "2 worker threads" in capsys.readouterr().out
+        assert read_pvti(output).GetNumberOfPoints() == 31 ** 3
+
+    def test_header_lists_pieces(self, tmp_path):
+        image = vtk.vtkImageData()
+        image.SetExtent(0, 4, 0, 4, 0, 4)
+        image.AllocateScalars(vtk.VTK_SHORT, 1)
+        extents = [[0, 4, 0, 4, 0, 2], [0, 4, 0, 4, 2, 4]]
+        svf.write_pvti_header(
+            str(tmp_path / "out.pvti"), [0, 4, 0, 4, 0, 4], [0.0] * 3, [1.0] * 3,
+            image.GetPointData(), image.GetCellData(), extents, "out",
+        )
+        text = (tmp_path / "out.pvti").read_text()
+        assert 'type="Int16"' in text
+        assert text.count("<Piece ") == 2
@@ -0,0 +1,871 @@
+"""
+Tests for split_vtk_volume.py
+"""
+# pylint: disable=missing-function-docstring,missing-class-docstring,protected-access
+
+from multiprocessing import shared_memory
+import sys
+import zlib
+
+import numpy as np
+import pytest
+
+vtk = pytest.importorskip("vtk")
+from vtk.util.numpy_support import numpy_to_vtk, vtk_to_numpy  # pylint: disable=wrong-import-position,wrong-import-order
+
+from sitk_tools import split_vtk_volume as svv  # pylint: disable=wrong-import-position
+
+
+# ---------------------------------------------------------------------------
+# Helpers
+# ---------------------------------------------------------------------------
+
+def make_volume(extent=(0, 12, 0, 9, 0, 7), origin=(1.0, -2.0, 0.5),
+                spacing=(0.5, 1.0, 2.0)):
+    """Return a vtkImageData with int16 scalars, a vector array and cell data."""
+    image = vtk.vtkImageData()
+    image.SetExtent(*extent)
+    image.SetOrigin(*origin)
+    image.SetSpacing(*spacing)
+    n_points = image.GetNumberOfPoints()
+    n_cells = image.GetNumberOfCells()
+
+    scalars = numpy_to_vtk(np.arange(n_points, dtype=np.int16), deep=True)
+    scalars.SetName("density")
+    image.GetPointData().SetScalars(scalars)
+
+    vectors = numpy_to_vtk(
+        np.arange(3 * n_points, dtype=np.float32).reshape(n_points, 3), deep=True
+    )
+    vectors.SetName("velocity")
+    image.GetPointData().AddArray(vectors)
+
+    labels = numpy_to_vtk(np.arange(n_cells, dtype=np.uint8), deep=True)
+    labels.SetName("label")
+    image.GetCellData().AddArray(labels)
+    return image
+
+
+def make_mask(extent=(0, 12, 0, 9, 0, 7)):
+    """Return a uint8 mask that is 1 only in the upper corner of the volume."""
+    image = vtk.vtkImageData()
+    image.SetExtent(*extent)
+    values = np.zeros((extent[5] + 1, extent[3] + 1, extent[1] + 1), dtype=np.uint8)
+    values[5:, 6:, 8:] = 1
+    mask = numpy_to_vtk(values.ravel(), deep=True)
+    mask.SetName("mask")
+    image.GetPointData().SetScalars(mask)
+    return image
+
+
+def write_volume(image, path):
+    if str(path).endswith(".vtk"):
+        writer = vtk.vtkStructuredPointsWriter()
+        writer.SetFileTypeToBinary()
+        writer.SetFileName(str(path))
+        writer.SetInputData(image)
+        assert writer.Write() == 1
+        return
+    writer = vtk.vtkXMLImageDataWriter()
+    writer.SetFileName(str(path))
+    writer.SetInputData(image)
+    assert writer.Write() == 1
+
+
+def read_vti(path):
+    reader = vtk.vtkXMLImageDataReader()
+    reader.SetFileName(str(path))
+    reader.Update()
+    return reader.GetOutput()
+
+
+def array_values(data, name):
+    return vtk_to_numpy(data.GetAbstractArray(name))
+
+
+# ---------------------------------------------------------------------------
+# Shared-memory source
+# ---------------------------------------------------------------------------
+
+class TestSharedSource:
+    def test_wrapped_source_matches_original(self):
+        image = make_volume()
+        image.SetDirectionMatrix(0, 1, 0, 1, 0, 0, 0, 0, -1)
+        shm, shared = svv._share_source(image)
+        try:
+            view = svv._wrap_shared_source(shm, shared)
+            assert view.GetExtent() == image.GetExtent()
+            assert view.GetOrigin() == image.GetOrigin()
+            assert view.GetSpacing() == image.GetSpacing()
+            assert [view.GetDirectionMatrix().GetElement(i, j)
+                    for i in range(3) for j in range(3)] == [0, 1, 0, 1, 0, 0, 0, 0, -1]
+            assert view.GetPointData().GetScalars().GetName() == "density"
+            for data, view_data, name in (
+                (image.GetPointData(), view.GetPointData(), "density"),
+                (image.GetPointData(), view.GetPointData(), "velocity"),
+                (image.GetCellData(), view.GetCellData(), "label"),
+            ):
+                expected = array_values(data, name)
+                actual = array_values(view_data, name)
+                assert actual.dtype == expected.dtype
+                np.testing.assert_array_equal(actual, expected)
+            del view, actual
+        finally:
+            shm.close()
+            shm.unlink()
+
+    def test_wrapped_source_does_not_copy(self):
+        image = make_volume()
+        shm, shared = svv._share_source(image)
+        try:
+            view = svv._wrap_shared_source(shm, shared)
+            np.ndarray((1,), dtype=np.int16, buffer=shm.buf,
+                       offset=shared.arrays[0].offset)[0] = 1234
+            assert view.GetPointData().GetScalars().GetValue(0) == 1234
+            del view
+        finally:
+            shm.close()
+            shm.unlink()
+
+    @pytest.mark.parametrize("suffix, share", [
+        (".vti", "_share_streamed_source"),
+        (".vtk", "_share_source"),
+    ])
+    def test_block_is_unlinked_after_parallel_split(self, tmp_path, monkeypatch, suffix, share):
+        created = []
+        original = getattr(svv, share)
+
+        def recording_share(*args):
+            shm, shared = original(*args)
+            if shm is not None:
+                created.append(shared.shm_name)
+            return shm, shared
+
+        monkeypatch.setattr(svv, share, recording_share)
+        write_volume(make_volume(), tmp_path / f"in{suffix}")
+        svv.split_vti(str(tmp_path / f"in{suffix}"), str(tmp_path / "out" / "out.pvti"),
+                      svv.SplitOptions(2, 2, 1, jobs=2))
+        assert len(created) == 1
+        with pytest.raises(FileNotFoundError):
+            shared_memory.SharedMemory(name=created[0])
+
+    @pytest.mark.parametrize("slab_bytes", [1, 1000, 1 << 20])
+    def test_streamed_source_matches_original(self, tmp_path, monkeypatch, slab_bytes):
+        monkeypatch.setattr(svv, "_SHARED_SLAB_BYTES", slab_bytes)
+        image = make_volume()
+        write_volume(image, tmp_path / "in.vti")
+        shm, shared = svv._share_streamed_source(str(tmp_path / "in.vti"))
+        try:
+            view = svv._wrap_shared_source(shm, shared)
+            assert view.GetExtent() == image.GetExtent()
+            assert view.GetPointData().GetScalars().GetName() == "density"
+            for data, view_data, name in (
+                (image.GetPointData(), view.GetPointData(), "density"),
+                (image.GetPointData(), view.GetPointData(), "velocity"),
+                (image.GetCellData(), view.GetCellData(), "label"),
+            ):
+                np.testing.assert_array_equal(
+                    array_values(view_data, name), array_values(data, name)
+                )
+            del view
+        finally:
+            svv._release_shared(shm)
+
+    def test_streamed_source_keeps_selected_arrays(self, tmp_path):
+        write_volume(make_volume(), tmp_path / "in.vti")
+        shm, shared = svv._share_streamed_source(str(tmp_path / "in.vti"), ("velocity",))
+        svv._release_shared(shm)
+        assert [entry.name for entry in shared.arrays] == ["velocity"]
+
+    def test_unstreamable_input_is_not_shared(self, tmp_path):
+        write_volume(make_volume(), tmp_path / "in.vtk")
+        assert svv._share_streamed_source(str(tmp_path / "in.vtk")) == (None, None)
+        write_sitk_volume(tmp_path / "packed.mha", compress=True)
+        assert svv._share_streamed_source(str(tmp_path / "packed.mha")) == (None, None)
+        write_sitk_volume(tmp_path / "plain.mha")
+        shm, _ = svv._share_streamed_source(str(tmp_path / "plain.mha"))
+        svv._release_shared(shm)
+
+
+# ---------------------------------------------------------------------------
+# split_vti
+# ---------------------------------------------------------------------------
+
+class TestSplitVti:
+    def _split(self, tmp_path, name, **options):
+        source = tmp_path / "in.vti"
+        if not source.exists():
+            write_volume(make_volume(), source)
+        output = tmp_path / name / "out.pvti"
+        svv.split_vti(str(source), str(output), svv.SplitOptions(**options))
+        return output
+
+    def test_pieces_cover_source(self, tmp_path):
+        output = self._split(tmp_path, "serial", nx=3, ny=2, nz=2)
+        reader = vtk.vtkXMLPImageDataReader()
+        reader.SetFileName(str(output))
+        reader.Update()
+        merged = reader.GetOutput()
+        source = make_volume()
+        assert merged.GetExtent() == source.GetExtent()
+        for name in ("density", "velocity"):
+            np.testing.assert_array_equal(
+                array_values(merged.GetPointData(), name),
+                array_values(source.GetPointData(), name),
+            )
+
+    def test_parallel_pieces_match_serial(self, tmp_path):
+        serial = self._split(tmp_path, "serial", nx=3, ny=2, nz=2)
+        parallel = self._split(tmp_path, "parallel", nx=3, ny=2, nz=2, jobs=3)
+        assert parallel.read_text() == serial.read_text()
+        for piece in sorted(serial.parent.glob("*.vti")):
+            assert (parallel.parent / piece.name).read_bytes() == piece.read_bytes()
+
+    def test_single_piece_with_jobs_is_written(self, tmp_path):
+        output = self._split(tmp_path, "single", nx=1, ny=1, nz=1, jobs=4)
+        assert (output.parent / "out_0.vti").exists()
+
+    def test_prints_piece_timing_summary(self, tmp_path, capsys):
+        self._split(tmp_path, "parallel", nx=2, ny=2, nz=1, jobs=2)
+        out = capsys.readouterr().out
+        assert "Wrote 4 pieces in" in out
+        assert "p95" in out
+
+    def test_timing_summary_ignores_skipped_pieces(self, capsys):
+        timings = {0: 2.0, 1: 0.001, 2: 4.0, 3: 0.001}
+        svv._print_piece_timings(timings, 6.0, [1, 3])  # pylint: disable=protected-access
+        out = capsys.readouterr().out
+        assert "Skipped 2 constant pieces" in out
+        assert "Wrote 2 pieces in 6.00 s" in out
+        assert "mean 3.000 s" in out and "median 4.000 s" in out
+        assert "max 4.000 s for piece 2" in out
+
+
+# ---------------------------------------------------------------------------
+# Piece scheduling
+# ---------------------------------------------------------------------------
+
+class TestScheduling:
+    def test_largest_pieces_first(self):
+        extents = svv._build_piece_extents(
+            svv._extract_geometry(make_volume(extent=(0, 10, 0, 4, 0, 4))),
+            svv.SplitOptions(3, 2, 1),
+        )
+        order = svv._schedule_piece_jobs(extents)
+        sizes = [svv._piece_points(extent) for _, extent in order]
+        assert sizes == sorted(sizes, reverse=True)
+        assert sorted(piece_id for piece_id, _ in order) == list(range(len(extents)))
+
+    def test_ties_keep_piece_order(self):
+        extents = [[0, 1, 0, 1, 0, 1]] * 4
+        assert [piece_id for piece_id, _ in svv._schedule_piece_jobs(extents)] == [0, 1, 2, 3]
+
+    def test_parallel_timings_cover_every_piece(self, tmp_path):
+        image = make_volume()
+        extents = svv._build_piece_extents(svv._extract_geometry(image),
+                                           svv.SplitOptions(2, 2, 2))
+        shm, shared = svv._share_source(image)
+        try:
+            timings, skipped = svv._write_piece_grid_parallel(
+                shared, str(tmp_path / "out.pvti"), "out", extents,
+                svv.SplitOptions(2, 2, 2, jobs=3),
+            )
+        finally:
+            shm.close()
+            shm.unlink()
+        assert sorted(timings) == list(range(8))
+        assert all(t >= 0.0 for t in timings.values())
+        assert not skipped
+
+
+# ---------------------------------------------------------------------------
+# Direct piece writer
+# ---------------------------------------------------------------------------
+
+class TestDirectWriter:
+    EXTENT = [3, 9, 2, 6, 1, 5]
+
+    def _assert_same_piece(self, a, b):
+        assert a.GetExtent() == b.GetExtent()
+        assert a.GetOrigin() == b.GetOrigin()
+        assert a.GetSpacing() == b.GetSpacing()
+        assert a.GetPointData().GetScalars().GetName() == b.GetPointData().GetScalars().GetName()
+        data_a, data_b = a.GetPointData(), b.GetPointData()
+        assert data_a.GetNumberOfArrays() == data_b.GetNumberOfArrays()
+        for idx in range(data_a.GetNumberOfArrays()):
+            name = data_a.GetArrayName(idx)
+            expected = array_values(data_b, name)
+            actual = array_values(data_a, name)
+            assert actual.dtype == expected.dtype
+            np.testing.assert_array_equal(actual, expected)
+
+    @pytest.mark.parametrize("compressor", ["none", "zlib"])
+    def test_matches_vtk_pipeline(self, tmp_path, compressor):
+        image = make_volume()
+        direct = tmp_path / "direct.vti"
+        pipeline = tmp_path / "pipeline.vti"
+        svv._write_piece(image, self.EXTENT, direct,
+                         svv.SplitOptions(1, 1, 1, writer="direct", compressor=compressor))
+        svv._write_piece(image, self.EXTENT, pipeline,
+                         svv.SplitOptions(1, 1, 1, writer="vtk", compressor=compressor))
+        self._assert_same_piece(read_vti(direct), read_vti(pipeline))
+
+    @pytest.mark.parametrize("writer", svv.PIECE_WRITERS)
+    @pytest.mark.parametrize("compressor", ["none", "zlib", "lzma"])
+    @pytest.mark.parametrize("encoding", svv.ENCODINGS)
+    def test_encodings_round_trip(  # pylint: disable=too-many-locals
+        self, tmp_path, writer, compressor, encoding
+    ):
+        image = make_volume()
+        options = svv.SplitOptions(1, 1, 1, writer=writer, compressor=compressor,
+                                   level=1, block_size=100, encoding=encoding)
+        piece = tmp_path / "piece.vti"
+        svv._write_piece(image, self.EXTENT, piece, options)
+        text = piece.read_bytes()
+        assert (b'format="binary"' in text) == (encoding == "inline")
+        density = array_values(image.GetPointData(), "density").reshape(8, 10, 13)
+        x0, x1, y0, y1, z0, z1 = self.EXTENT
+        np.testing.assert_array_equal(
+            array_values(read_vti(piece).GetPointData(), "density"),
+            density[z0:z1 + 1, y0:y1 + 1, x0:x1 + 1].ravel(),
+        )
+
+    def test_invalid_level_raises(self):
+        with pytest.raises(ValueError, match="level"):
+            svv.SplitOptions(1, 1, 1, level=12).validate()
+
+    def test_keeps_cell_data(self, tmp_path):
+        image = make_volume()
+        piece = tmp_path / "piece.vti"
+        svv._write_piece_direct(image, self.EXTENT, piece)
+        labels = array_values(image.GetCellData(), "label").reshape(7, 9, 12)
+        x0, x1, y0, y1, z0, z1 = self.EXTENT
+        np.testing.assert_array_equal(
+            array_values(read_vti(piece).GetCellData(), "label"),
+            labels[z0:z1, y0:y1, x0:x1].ravel(),
+        )
+
+    def test_compressed_is_smaller(self, tmp_path):
+        image = make_volume()
+        raw = tmp_path / "raw.vti"
+        packed = tmp_path / "packed.vti"
+        svv._write_piece_direct(image, self.EXTENT, raw,
+                                 svv.SplitOptions(1, 1, 1, compressor="none"))
+        svv._write_piece_direct(image, self.EXTENT, packed)
+        assert packed.stat().st_size < raw.stat().st_size
+
+    @pytest.mark.parametrize("block_size", [7, 64, 1000])
+    def test_blocks_reassemble_strided_view(self, block_size):
+        values = np.arange(6 * 5 * 4 * 2, dtype=np.int16).reshape(6, 5, 4, 2)
+        view = values[1:5, 2:4, 1:3]
+        blocks = list(svv._iter_blocks(view, block_size))
+        assert all(len(b) == block_size for b in blocks[:-1])
+        assert b"".join(blocks) == np.ascontiguousarray(view).tobytes()
+
+    def test_compressed_header_layout(self):
+        view = np.arange(24, dtype=np.uint8).reshape(2, 3, 4, 1)
+        encoded = svv._encode_array(view, zlib.compress, 16)
+        with pytest.raises(RuntimeError, match="every block"):
+            encoded.header()
+        blocks = list(encoded.chunks())
+        words = np.frombuffer(encoded.header(), dtype="<u8")
+        assert len(words) * 8 == encoded.header_size
+        assert list(words[:3]) == [2, 16, 8]
+        assert list(words[3:]) == [len(b) for b in blocks]
+
+    def test_compressed_blocks_are_streamed(self, monkeypatch):
+        compressed = []
+
+        def compress(block):
+            compressed.append(block)
+            return zlib.compress(block)
+
+        monkeypatch.setattr(svv, "_iter_blocks", lambda view, size: iter([b"a" * size] * 3))
+        encoded = svv._encode_array(np.zeros((1, 1, 48, 1), np.uint8), compress, 16)
+        chunks = encoded.chunks()
+        next(chunks)
+        # Only the block being written has been compressed.
+        assert len(compressed) == 1
+
+    def test_missing_lz4_raises(self, monkeypatch):
+        monkeypatch.setitem(sys.modules, "lz4", None)
+        with pytest.raises(ValueError, match="lz4"):
+            svv.SplitOptions(1, 1, 1, compressor="lz4").validate()
+
+
+# ---------------------------------------------------------------------------
+# Ghost layers
+# ---------------------------------------------------------------------------
+
+class TestGhostLayers:
+    OWNED = [4, 8, 0, 4, 3, 7]
+
+    def test_extent_is_clamped_to_volume(self):
+        whole = (0, 12, 0, 9, 0, 7)
+        assert svv._ghost_extent(self.OWNED, 2, whole) == [2, 10, 0, 6, 1, 7]
+        assert svv._ghost_extent(self.OWNED, 0, whole) == self.OWNED
+
+    def test_negative_ghost_raises(self):
+        with pytest.raises(ValueError, match="ghost"):
+            svv.SplitOptions(1, 1, 1, ghost=-1).validate()
+
+    @pytest.mark.parametrize("writer", svv.PIECE_WRITERS)
+    def test_piece_marks_ghosts(self, tmp_path, writer):
+        source = make_volume()
+        options = svv.SplitOptions(1, 1, 1, writer=writer, compressor="none", ghost=1)
+        svv._write_piece(source, self.OWNED, tmp_path / "piece.vti", options)
+        piece = read_vti(tmp_path / "piece.vti")
+        assert list(piece.GetExtent()) == [3, 9, 0, 5, 2, 7]
+
+        points = array_values(piece.GetPointData(), "vtkGhostType").reshape(6, 6, 7)
+        expected = np.ones((6, 6, 7), dtype=np.uint8)
+        expected[1:, :5, 1:6] = 0
+        np.testing.assert_array_equal(points, expected)
+
+        cells = array_values(piece.GetCellData(), "vtkGhostType").reshape(5, 5, 6)
+        expected = np.ones((5, 5, 6), dtype=np.uint8)
+        expected[1:, :4, 1:5] = 0
+        np.testing.assert_array_equal(cells, expected)
+
+    def test_split_records_ghost_level(self, tmp_path):
+        write_volume(make_volume(), tmp_path / "in.vti")
+        output = tmp_path / "out" / "out.pvti"
+        assert svv.main(["-i", str(tmp_path / "in.vti"), "-o", str(output),
+                         "-nx", "2", "-ny", "2", "-nz", "1", "--ghost", "2"]) == 0
+        text = output.read_text()
+        assert 'GhostLevel="2"' in text
+        assert text.count('Name="vtkGhostType"') == 2
+        assert 'Extent="0 8 0 7 0 7"' in text
+
+        reader = vtk.vtkXMLPImageDataReader()
+        reader.SetFileName(str(output))
+        reader.Update()
+        merged = reader.GetOutput()
+        source = make_volume()
+        assert merged.GetExtent() == source.GetExtent()
+        np.testing.assert_array_equal(
+            array_values(merged.GetPointData(), "density"),
+            array_values(source.GetPointData(), "density"),
+        )
+
+
+# ---------------------------------------------------------------------------
+# Constant (empty) pieces
+# ---------------------------------------------------------------------------
+
+class TestEmptyPieces:
+    def _split(self, tmp_path, name, **options):
+        source = tmp_path / "in.vti"
+        if not source.exists():
+            write_volume(make_mask(), source)
+        output = tmp_path / name / "out.pvti"
+        svv.split_vti(str(source), str(output),
+                      svv.SplitOptions(2, 2, 2, compressor="none", **options))
+        return output
+
+    def test_detects_constant_pieces(self):
+        mask = make_mask()
+        assert svv._is_constant_piece(mask, [0, 6, 0, 4, 0, 3])
+        assert not svv._is_constant_piece(mask, [6, 12, 5, 9, 4, 7])
+        assert not svv._is_constant_piece(make_volume(), [0, 1, 0, 0, 0, 0])
+
+    def test_invalid_mode_raises(self):
+        with pytest.raises(ValueError, match="empty"):
+            svv.SplitOptions(1, 1, 1, empty="drop").validate()
+
+    @pytest.mark.parametrize("block_size", [7, 100, 32768])
+    def test_constant_encoding_matches_full_encoding(self, block_size):
+        view = np.full((3, 4, 5, 3), 2.5, dtype=np.float32)
+        compress = svv._block_compressor("zlib")
+        constant = svv._encode_constant(view, compress, block_size)
+        expected = svv._encode_array(view, compress, block_size)
+        assert list(constant.chunks()) == list(expected.chunks())
+        assert constant.header() == expected.header()
+
+    @pytest.mark.parametrize("jobs", [1, 3])
+    def test_skip_omits_constant_pieces(self, tmp_path, jobs):
+        output = self._split(tmp_path, f"skip{jobs}", empty="skip", jobs=jobs)
+        assert sorted(p.name for p in output.parent.glob("*.vti")) == ["out_7.vti"]
+        text = output.read_text()
+        assert text.count("<Piece ") == 1
+        assert 'Source="out_7.vti"' in text
+
+    def test_stub_pieces_read_back(self, tmp_path):
+        full = self._split(tmp_path, "write")
+        small = self._split(tmp_path, "small", empty="stub")
+        assert small.with_name("out_0.vti").stat().st_size < (
+            full.with_name("out_0.vti").stat().st_size
+        )
+        stub = self._split(tmp_path, "stub", empty="stub", ghost=1)
+        reader = vtk.vtkXMLPImageDataReader()
+        reader.SetFileName(str(stub))
+        reader.Update()
+        np.testing.assert_array_equal(
+            array_values(reader.GetOutput().GetPointData(), "mask"),
+            array_values(make_mask().GetPointData(), "mask"),
+        )
+        piece = read_vti(stub.with_name("out_0.vti"))
+        assert array_values(piece.GetPointData(), "vtkGhostType").any()
+
+
+# ---------------------------------------------------------------------------
+# Octree splitting
+# ---------------------------------------------------------------------------
+
+def covered_cells(extents, whole):
+    """Return how many pieces cover each cell of *whole*."""
+    counts = np.zeros((whole[5] - whole[4], whole[3] - whole[2], whole[1] - whole[0]), int)
+    for e in extents:
+        counts[e[4] - whole[4]:e[5] - whole[4],
+               e[2] - whole[2]:e[3] - whole[2],
+               e[0] - whole[0]:e[1] - whole[0]] += 1
+    return counts
+
+
+class TestOctreeSplit:
+    def test_children_split_owned_points_evenly(self):
+        whole = [0, 7, 0, 1, 0, 7]
+        assert svv._octree_children(whole, whole) == [
+            [0, 4, 0, 1, 0, 4], [4, 7, 0, 1, 0, 4],
+            [0, 4, 0, 1, 4, 7], [4, 7, 0, 1, 4, 7],
+        ]
+        assert svv._octree_children([0, 1, 0, 1, 0, 1], whole) == [[0, 1, 0, 1, 0, 1]]
+
+    def test_payload_balanced_pieces(self):
+        mask = make_mask()
+        whole = list(mask.GetExtent())
+        extents = svv._build_octree_extents(
+            mask, svv.SplitOptions(4, 4, 4, split="octree")
+        )
+        assert len(extents) >= 64
+        assert (covered_cells(extents, whole) == 1).all()
+        # The dense corner is cut finer than the background.
+        sizes = {svv._content_points(mask, e, 0) > 0: svv._piece_points(e)
+                 for e in extents}
+        assert sizes[True] < sizes[False]
+
+    def test_target_bytes_bounds_payload(self):
+        volume = make_volume()
+        options = svv.SplitOptions(1, 1, 1, split="octree", target_bytes=2000,
+                                   background=None)
+        extents = svv._build_octree_extents(volume, options)
+        whole = list(volume.GetExtent())
+        assert (covered_cells(extents, whole) == 1).all()
+        point_bytes = 2 + 3 * 4
+        for extent in extents:
+            owned = svv._owned_points_extent(extent, whole)
+            assert svv._piece_points(owned) * point_bytes <= 2000
+
+    @pytest.mark.parametrize("target_bytes", [0, 1])
+    def test_all_background_is_one_piece(self, target_bytes):
+        image = make_mask()
+        vtk_to_numpy(image.GetPointData().GetScalars())[:] = 0
+        extents = svv._build_octree_extents(
+            image, svv.SplitOptions(2, 2, 2, split="octree", target_bytes=target_bytes)
+        )
+        assert extents == [list(image.GetExtent())]
+
+    def test_split_reads_back(self, tmp_path):
+        write_volume(make_mask(), tmp_path / "in.vti")
+        output = tmp_path / "out" / "out.pvti"
+        assert svv.main(["-i", str(tmp_path / "in.vti"), "-o", str(output),
+                         "--split", "octree", "-nx", "4", "-ny", "4", "-nz", "4",
+                         "-j", "2", "--empty", "stub"]) == 0
+        assert output.read_text().count("<Piece ") >= 64
+        reader = vtk.vtkXMLPImageDataReader()
+        reader.SetFileName(str(output))
+        reader.Update()
+        np.testing.assert_array_equal(
+            array_values(reader.GetOutput().GetPointData(), "mask"),
+            array_values(make_mask().GetPointData(), "mask"),
+        )
+
+
+# ---------------------------------------------------------------------------
+# Manifest and resumable runs
+# ---------------------------------------------------------------------------
+
+class TestResume:
+    def _split(self, tmp_path, image=None, **options):
+        write_volume(image or make_volume(), tmp_path / "in.vti")
+        output = tmp_path / "out" / "out.pvti"
+        svv.split_vti(str(tmp_path / "in.vti"), str(output),
+                      svv.SplitOptions(2, 2, 2, **options))
+        return output
+
+    def _count_writes(self, monkeypatch):
+        written = []
+        original = svv._write_piece
+
+        def counting(source_data, extent, piece_filename, options=None):
+            written.append(piece_filename.name)
+            return original(source_data, extent, piece_filename, options)
+
+        monkeypatch.setattr(svv, "_write_piece", counting)
+        return written
+
+    def test_manifest_describes_pieces(self, tmp_path):
+        output = self._split(tmp_path)
+        manifest = svv.PieceManifest._load(output.with_name("out.manifest.jsonl"))
+        assert sorted(manifest) == list(range(8))
+        for piece_id, record in manifest.items():
+            piece = output.with_name(f"out_{piece_id}.vti")
+            assert record["bytes"] == piece.stat().st_size
+            assert record["checksum"] == svv._file_checksum(piece)
+            assert list(read_vti(piece).GetExtent()) == record["extent"]
+        assert not list(output.parent.glob("*.part"))
+
+    def test_resume_reuses_current_pieces(self, tmp_path, monkeypatch, capsys):
+        output = self._split(tmp_path)
+        before = {p.name: p.read_bytes() for p in output.parent.iterdir()}
+        written = self._count_writes(monkeypatch)
+        self._split(tmp_path, resume=True)
+        assert not written
+        assert "Reused 8 unchanged pieces" in capsys.readouterr().out
+        self._split(tmp_path, resume=True, jobs=3)
+        assert "Reused 8 unchanged pieces" in capsys.readouterr().out
+        assert {p.name: p.read_bytes() for p in output.parent.iterdir()} == before
+
+    def test_resume_rewrites_missing_corrupt_and_changed(self, tmp_path, monkeypatch):
+        output = self._split(tmp_path)
+        output.with_name("out_1.vti").unlink()
+        with open(output.with_name("out_2.vti"), "r+b") as f:
+            f.seek(-20, 2)
+            f.write(b"x" * 8)
+        changed = make_volume()
+        # Point (12, 9, 7) only lies in the last piece.
+        vtk_to_numpy(changed.GetPointData().GetScalars())[-1] = -1
+        written = self._count_writes(monkeypatch)
+        self._split(tmp_path, image=changed, resume=True)
+        assert sorted(written) == ["out_1.vti.part", "out_2.vti.part", "out_7.vti.part"]
+        assert array_values(read_vti(output.with_name("out_7.vti")).GetPointData(),
+                            "density")[-1] == -1
+
+    def test_settings_change_rewrites_everything(self, tmp_path, monkeypatch):
+        self._split(tmp_path)
+        written = self._count_writes(monkeypatch)
+        self._split(tmp_path, resume=True, compressor="none")
+        assert len(written) == 8
+
+    def test_interrupted_run_resumes(self, tmp_path, monkeypatch):
+        original = svv._write_piece
+
+        def failing(source_data, extent, piece_filename, options=None):
+            if piece_filename.name.startswith("out_3."):
+                piece_filename.write_bytes(b"partial")
+                raise OSError("disk full")
+            return original(source_data, extent, piece_filename, options)
+
+        monkeypatch.setattr(svv, "_write_piece", failing)
+        with pytest.raises(OSError):
+            self._split(tmp_path)
+        output = tmp_path / "out" / "out.pvti"
+        assert not output.exists()
+        assert not output.with_name("out_3.vti").exists()
+        # Simulate a line torn by the crash.
+        with open(output.with_name("out.manifest.jsonl"), "a", encoding="utf-8") as f:
+            f.write('{"piece": 3, "ext')
+
+        monkeypatch.setattr(svv, "_write_piece", original)
+        written = self._count_writes(monkeypatch)
+        self._split(tmp_path, resume=True)
+        assert sorted(written) == [f"out_{i}.vti.part" for i in range(3, 8)]
+        reader = vtk.vtkXMLPImageDataReader()
+        reader.SetFileName(str(output))
+        reader.Update()
+        np.testing.assert_array_equal(
+            array_values(reader.GetOutput().GetPointData(), "density"),
+            array_values(make_volume().GetPointData(), "density"),
+        )
+        manifest = svv.PieceManifest._load(output.with_name("out.manifest.jsonl"))
+        assert sorted(manifest) == list(range(8))
+
+    def test_skipped_pieces_are_reused(self, tmp_path, monkeypatch):
+        self._split(tmp_path, image=make_mask(), empty="skip")
+        written = self._count_writes(monkeypatch)
+        self._split(tmp_path, image=make_mask(), empty="skip", resume=True)
+        assert not written
+
+
+# ---------------------------------------------------------------------------
+# Streaming reads
+# ---------------------------------------------------------------------------
+
+def write_sitk_volume(path, compress=False):
+    sitk = pytest.importorskip("SimpleITK")
+    values = np.random.default_rng(1).integers(0, 500, (9, 10, 13), dtype=np.int16)
+    image = sitk.GetImageFromArray(values)
+    image.SetOrigin((1.0, 2.0, 3.0))
+    image.SetSpacing((0.5, 1.0, 2.0))
+    image.SetDirection((0, 1, 0, 1, 0, 0, 0, 0, 1))
+    sitk.WriteImage(image, str(path), compress)
+
+
+class TestStreaming:
+    def _split_both(self, tmp_path, source, **options):
+        outputs = []
+        for stream in (False, True):
+            output = tmp_path / f"stream{stream}" / "out.pvti"
+            svv.split_vti(str(source), str(output),
+                          svv.SplitOptions(3, 2, 2, stream=stream, **options))
+            outputs.append(output)
+        return outputs
+
+    def _assert_same_files(self, outputs):
+        plain, streamed = outputs
+        names = sorted(p.name for p in plain.parent.glob("*.vti"))
+        assert names == sorted(p.name for p in streamed.parent.glob("*.vti"))
+        assert plain.read_text() == streamed.read_text()
+        for name in names:
+            assert (plain.parent / name).read_bytes() == (streamed.parent / name).read_bytes()
+
+    @pytest.mark.parametrize("options", [{}, {"ghost": 1, "jobs": 2}])
+    def test_vti_matches_loaded_split(self, tmp_path, options):
+        write_volume(make_volume(), tmp_path / "in.vti")
+        self._assert_same_files(self._split_both(tmp_path, tmp_path / "in.vti", **options))
+
+    @pytest.mark.parametrize("suffix", [".mha", ".nrrd"])
+    @pytest.mark.parametrize("options", [{}, {"ghost": 1, "jobs": 2}])
+    def test_file_formats_match_loaded_split(self, tmp_path, suffix, options):
+        write_sitk_volume(tmp_path / f"in{suffix}")
+        self._assert_same_files(
+            self._split_both(tmp_path, tmp_path / f"in{suffix}", **options)
+        )
+
+    def test_reads_one_piece_at_a_time(self, tmp_path, monkeypatch):
+        write_volume(make_volume(), tmp_path / "in.vti")
+        sizes = []
+        original = svv._VTKStreamingReader.read
+
+        def recording(self, extent):
+            data = original(self, extent)
+            sizes.append(data.GetNumberOfPoints())
+            return data
+
+        monkeypatch.setattr(svv._VTKStreamingReader, "read", recording)
+        options = svv.SplitOptions(3, 2, 2, stream=True, ghost=1)
+        svv.split_vti(str(tmp_path / "in.vti"), str(tmp_path / "out" / "out.pvti"), options)
+        largest = max(
+            svv._piece_points(svv._ghost_extent(extent, 1, make_volume().GetExtent()))
+            for extent in svv._build_piece_extents(svv._extract_geometry(make_volume()),
+                                                   options)
+        )
+        assert len(sizes) == 1 + 12
+        assert max(sizes) <= largest < make_volume().GetNumberOfPoints()
+
+    def test_unsupported_reader_raises(self, tmp_path):
+        write_sitk_volume(tmp_path / "in.nii")
+        with pytest.raises(ValueError, match="Streaming is not supported"):
+            svv.split_vti(str(tmp_path / "in.nii"), str(tmp_path / "out.pvti"),
+                          svv.SplitOptions(2, 2, 2, stream=True))
+
+    def test_octree_cannot_stream(self):
+        with pytest.raises(ValueError, match="octree"):
+            svv.SplitOptions(2, 2, 2, split="octree", stream=True).validate()
+
+
+# ---------------------------------------------------------------------------
+# Thread-mode workers
+# ---------------------------------------------------------------------------
+
+class TestThreadWorkers:
+    def _split(self, tmp_path, name, **options):
+        output = tmp_path / name / "out.pvti"
+        svv.split_vti(str(tmp_path / "in.vti"), str(output),
+                      svv.SplitOptions(3, 2, 2, **options))
+        return output
+
+    @pytest.mark.parametrize("options", [
+        {"writer": "direct"},
+        {"writer": "vtk"},
+        {"ghost": 1, "empty": "stub"},
+        {"stream": True},
+    ])
+    def test_threads_match_serial(self, tmp_path, options):
+        write_volume(make_volume(), tmp_path / "in.vti")
+        serial = self._split(tmp_path, "serial", **options)
+        threaded = self._split(tmp_path, "threaded", jobs=3, parallel="thread", **options)
+        assert serial.read_text() == threaded.read_text()
+        names = sorted(p.name for p in serial.parent.glob("*.vti"))
+        assert names == sorted(p.name for p in threaded.parent.glob("*.vti"))
+        for name in names:
+            assert (serial.parent / name).read_bytes() == (threaded.parent / name).read_bytes()
+
+    def test_threads_do_not_share_the_source(self, tmp_path, monkeypatch):
+        write_volume(make_volume(), tmp_path / "in.vti")
+        monkeypatch.setattr(svv, "_share_source", None)
+        sources = set()
+        original = svv._write_piece
+
+        def recording(source, *args):
+            sources.add(id(source))
+            return original(source, *args)
+
+        monkeypatch.setattr(svv, "_write_piece", recording)
+        self._split(tmp_path, "threaded", jobs=2, parallel="thread")
+        assert 1 <= len(sources) <= 2
+
+    def test_invalid_mode_raises(self):
+        with pytest.raises(ValueError, match="parallel"):
+            svv.SplitOptions(2, 2, 2, parallel="fibers").validate()
+
+
+# ---------------------------------------------------------------------------
+# Array selection
+# ---------------------------------------------------------------------------
+
+class TestArraySelection:
+    def test_selection_shares_kept_arrays(self):
+        image = make_volume()
+        selected = svv._select_arrays(image, ("velocity", "label"))
+        assert selected.GetPointData().GetNumberOfArrays() == 1
+        assert selected.GetCellData().GetArrayName(0) == "label"
+        assert np.shares_memory(array_values(selected.GetPointData(), "velocity"),
+                                array_values(image.GetPointData(), "velocity"))
+        assert image.GetPointData().GetNumberOfArrays() == 2
+
+    def test_unknown_array_raises(self):
+        with pytest.raises(ValueError, match="'missing'.*available: density, label, velocity"):
+            svv._select_arrays(make_volume(), ("density", "missing"))
+
+    def test_empty_selection_raises(self):
+        with pytest.raises(ValueError, match="arrays"):
+            svv.SplitOptions(2, 2, 2, arrays=()).validate()
+
+    @pytest.mark.parametrize("options", [{}, {"jobs": 2}, {"stream": True}])
+    def test_pieces_hold_only_selected_arrays(self, tmp_path, options):
+        write_volume(make_volume(), tmp_path / "in.vti")
+        output = tmp_path / "out" / "out.pvti"
+        svv.split_vti(str(tmp_path / "in.vti"), str(output),
+                      svv.SplitOptions(2, 2, 2, arrays=("velocity",), **options))
+        header = output.read_text()
+        assert 'Name="velocity"' in header
+        assert "density" not in header and "label" not in header
+        piece = read_vti(output.parent / "out_0.vti")
+        assert piece.GetPointData().GetNumberOfArrays() == 1
+        assert piece.GetCellData().GetNumberOfArrays() == 0
+        assert array_values(piece.GetPointData(), "velocity").dtype == np.float32
+
+
+# ---------------------------------------------------------------------------
+# Encoding benchmark
+# ---------------------------------------------------------------------------
+
+class TestBenchmarkEncodings:
+    def test_reports_every_available_setting(self, tmp_path, monkeypatch):
+        monkeypatch.setitem(sys.modules, "lz4", None)
+        write_volume(make_volume(), tmp_path / "in.vti")
+        results = svv.benchmark_encodings(str(tmp_path / "in.vti"),
+                                          svv.SplitOptions(2, 2, 1))
+        settings = {(r["compressor"], r["encoding"]) for r in results}
+        assert settings == {(c, e) for c in ("none", "zlib", "lzma") for e in svv.ENCODINGS}
+        sizes = {(r["compressor"], r["encoding"]): r["bytes"] for r in results}
+        assert sizes[("zlib", "appended")] < sizes[("none", "appended")]
+        assert sizes[("none", "appended")] < sizes[("none", "inline")]
+
+    def test_main_benchmark_writes_no_output(self, tmp_path):
+        write_volume(make_volume(), tmp_path / "in.vti")
+        output = tmp_path / "out" / "out.pvti"
+        assert svv.main(["-i", str(tmp_path / "in.vti"), "-o", str(output),
+                         "--benchmark", "--level", "1"]) == 0
+        assert sorted(p.name for p in tmp_path.iterdir()) == ["in.vti"]
@@ -0,0 +1,240 @@
+"""
+Tests for vti_sitk.py
+"""
+# pylint: disable=missing-function-docstring,missing-class-docstring
+
+import gc
+import os
+from pathlib import Path
+import subprocess
+import sys
+
+import numpy as np
+import pytest
+
+vtk = pytest.importorskip("vtk")
+import SimpleITK as sitk  # pylint: disable=wrong-import-position,wrong-import-order
+from vtk.util.numpy_support import numpy_to_vtk, vtk_to_numpy  # pylint: disable=wrong-import-position,wrong-import-order
+
+from conftest import assert_same_image, make_image  # pylint: disable=wrong-import-position
+from sitk_tools import merge_pvti as mp  # pylint: disable=wrong-import-position
+from sitk_tools import split_vtk_volume as svv  # pylint: disable=wrong-import-position
+from sitk_tools import vti_sitk as vs  # pylint: disable=wrong-import-position
+
+_SRC = Path(__file__).resolve().parent.parent / "src"
+
+
+def available_memory() -> int:
+    try:
+        with open("/proc/meminfo", encoding="utf-8") as f:
+            for line in f:
+                if line.startswith("MemAvailable:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    return 0
+
+
+def peak_rss_growth(code: str) -> tuple[float, float]:
+    """Run *code* in a fresh interpreter; it prints two ru_maxrss values in KiB."""
+    env = dict(os.environ, PYTHONPATH=str(_SRC))
+    result = subprocess.run(
+        [sys.executable, "-c", code], env=env, check=True, capture_output=True, text=True
+    )
+    before, after = (int(value) / 1024.0 for value in result.stdout.split())
+    return before, after
+
+
+class TestConversion:
+    @pytest.mark.parametrize("components", [1, 3])
+    def test_round_trip(self, components):
+        image = make_image(components=components)
+        assert_same_image(vs.vtk_image_to_sitk(vs.sitk_to_vtk_image(image)), image)
+
+    def test_vtk_image_shares_sitk_buffer(self):
+        image = make_image()
+        vti = vs.sitk_to_vtk_image(image)
+        assert np.shares_memory(
+            vtk_to_numpy(vti.GetPointData().GetScalars()), sitk.GetArrayViewFromImage(image)
+        )
+
+    def test_copy_is_independent(self):
+        image = make_image()
+        vti = vs.sitk_to_vtk_image(image, copy=True)
+        assert not np.shares_memory(
+            vtk_to_numpy(vti.GetPointData().GetScalars()), sitk.GetArrayViewFromImage(image)
+        )
+
+    def test_vtk_image_pins_sitk_image(self):
+        vti = vs.sitk_to_vtk_image(make_image())
+        gc.collect()
+        # Reuse freed memory so a dangling buffer would show garbage.
+        filler = [np.full(1 << 16, -1.0) for _ in range(64)]
+        np.testing.assert_array_equal(
+            vtk_to_numpy(vti.GetPointData().GetScalars()),
+            np.arange(4 * 5 * 6, dtype=np.float32),
+        )
+        del filler
+
+    def test_origin_follows_extent_start(self):
+        image = vtk.vtkImageData()
+        image.SetExtent(2, 4, 0, 1, 0, 1)
+        image.SetOrigin(1.0, 0.0, 0.0)
+        image.SetSpacing(0.5, 1.0, 1.0)
+        array = numpy_to_vtk(np.arange(12, dtype=np.int16), deep=True)
+        image.GetPointData().SetScalars(array)
+        assert vs.vtk_image_to_sitk(image).GetOrigin() == (2.0, 0.0, 0.0)
+
+    def test_files_round_trip(self, tmp_path):
+        image = make_image()
+        vs.sitk_to_vti(image, str(tmp_path / "out.vti"))
+        assert_same_image(vs.vti_to_sitk(str(tmp_path / "out.vti")), image)
+        assert vs.main([str(tmp_path / "out.vti"), str(tmp_path / "out.nrrd")]) == 0
+        assert_same_image(sitk.ReadImage(str(tmp_path / "out.nrrd")), image)
+
+
+class TestPvtiInput:
+    def _split(self, tmp_path, *options):
+        image = make_image()
+        sitk.WriteImage(image, str(tmp_path / "in.mha"))
+        output = tmp_path / "split" / "out.pvti"
+        svv.main(["-i", str(tmp_path / "in.mha"), "-o", str(output),
+                  "-nx", "2", "-ny", "2", "-nz", "2", *options])
+        return image, output
+
+    @pytest.mark.parametrize("jobs", [1, 3])
+    def test_pvti_to_sitk(self, tmp_path, jobs):
+        image, output = self._split(tmp_path, "--ghost", "1")
+        assert_same_image(vs.vti_to_sitk(str(output), jobs=jobs), image)
+
+    def test_read_pvti_image(self, tmp_path, monkeypatch):
+        image, output = self._split(tmp_path)
+        parsed = []
+        read_header = mp.read_pvti_header
+        for module in (mp, vs):
+            monkeypatch.setattr(module, "read_pvti_header",
+                                lambda path: parsed.append(path) or read_header(path))
+        vti = vs.read_vti_image(str(output), jobs=2)
+        assert len(parsed) == 1
+        assert vti.GetDimensions() == image.GetSize()
+        assert vti.GetPointData().GetScalars().GetName() == "MetaImage"
+        assert_same_image(vs.vtk_image_to_sitk(vti), image)
+
+    def test_main_converts_pvti(self, tmp_path):
+        image, output = self._split(tmp_path)
+        assert vs.main([str(output), str(tmp_path / "out.nrrd")]) == 0
+        assert_same_image(sitk.ReadImage(str(tmp_path / "out.nrrd")), image)
+
+
+class TestMemory:
+    @pytest.mark.skipif(available_memory() < 3 << 30, reason="needs 3 GiB of free memory")
+    def test_sitk_to_vtk_does_not_copy_2gb_volume(self):
+        # The Image constructor zero-fills, so all 2 GiB are resident before
+        # the conversion; reading the whole array through VTK afterwards must
+        # not grow the peak.
+        before, after = peak_rss_growth(
+            "import resource\n"
+            "import SimpleITK as sitk\n"
+            "from sitk_tools import vti_sitk\n"
+            "image = sitk.Image([1024, 1024, 1024], sitk.sitkInt16)\n"
+            "before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+            "vti = vti_sitk.sitk_to_vtk_image(image)\n"
+            "assert vti.GetPointData().GetScalars().GetRange() == (0.0, 0.0)\n"
+            "print(before, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+        )
+        assert before > 2048
+        assert after - before < 64
+
+    def test_vtk_to_sitk_copies_once(self):
+        before, after = peak_rss_growth(
+            "import resource\n"
+            "import numpy as np, vtk\n"
+            "from vtk.util.numpy_support import numpy_to_vtk\n"
+            "from sitk_tools import vti_sitk\n"
+            "values = np.ones(256 * 512 * 1024, dtype=np.int16)\n"
+            "image = vtk.vtkImageData()\n"
+            "image.SetDimensions(1024, 512, 256)\n"
+            "image.GetPointData().SetScalars(numpy_to_vtk(values))\n"
+            "before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss\n"
+            "converted = vti_sitk.vtk_image_to_sitk(image)\n"
+            "print(before, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss)\n"
+        )
+        # One 256 MiB copy, not two.
+        assert 200 < after - before < 320
+
+
+class TestBatch:
+    def test_vti_to_nrrd_and_back(self, tmp_path, capsys):
+        image = make_image()
+        (tmp_path / "vti").mkdir()
+        for name in ["a", "b"]:
+            vs.sitk_to_vti(image, str(tmp_path / "vti" / f"{name}.vti"))
+        args = ["--batch", str(tmp_path / "vti"), "-o", str(tmp_path / "nrrd"), "-j", "2"]
+        assert vs.main(args) == 0
+        assert_same_image(sitk.ReadImage(str(tmp_path / "nrrd" / "b.nrrd")), image)
+        assert vs.main(args) == 0
+        assert "skipped 2 unchanged" in capsys.readouterr().out
+
+        assert vs.main(["--batch", str(tmp_path / "nrrd" / "*.nrrd"), "--to", ".vti",
+                        "-o", str(tmp_path / "back")]) == 0
+        assert_same_image(vs.vti_to_sitk(str(tmp_path / "back" / "a.vti")), image)
+
+    def test_pvti_pieces_are_inputs_not_jobs(self, tmp_path, capsys):
+        image, output = TestPvtiInput()._split(tmp_path)  # pylint: disable=protected-access
+        result = vs.convert_batch([str(output.parent)], ".nii.gz", output_dir=str(tmp_path / "o"))
+        assert result.converted == 1
+        assert_same_image(sitk.ReadImage(str(tmp_path / "o" / "out.nii.gz")), image)
+
+        piece = next(output.parent.glob("*.vti"))
+        stat = piece.stat()
+        os.utime(piece, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        capsys.readouterr()
+        result = vs.convert_batch([str(output)], ".nii.gz", output_dir=str(tmp_path / "o"))
+        assert result.converted == 1
+
+    def test_detached_outputs_are_complete(self, tmp_path, capsys):
+        image = make_image()
+        (tmp_path / "in").mkdir()
+        vs.sitk_to_vti(image, str(tmp_path / "in" / "a.vti"))
+        assert vs.main(["--batch", str(tmp_path / "in"), "--to", ".mhd",
+                        "-o", str(tmp_path / "out")]) == 0
+        names = sorted(p.name for p in (tmp_path / "out").iterdir())
+        assert names == [".sitk_batch.json", "a.mhd", "a.zraw"]
+        assert "ElementDataFile = a.zraw" in (tmp_path / "out" / "a.mhd").read_text()
+        assert_same_image(sitk.ReadImage(str(tmp_path / "out" / "a.mhd")), image)
+        assert "(0.0 MiB in" in capsys.readouterr().out
+        state = (tmp_path / "out" / ".sitk_batch.json").read_text()
+        assert "a.mhd" in state
+
+    @pytest.mark.parametrize("suffix, data", [(".mhd", ".raw"), (".nhdr", ".raw.gz")])
+    def test_detached_input_data_is_checked(self, tmp_path, capsys, suffix, data):
+        image = make_image()
+        (tmp_path / "in").mkdir()
+        sitk.WriteImage(image, str(tmp_path / "in" / f"a{suffix}"), suffix == ".nhdr")
+        assert (tmp_path / "in" / f"a{data}").exists()
+        args = ["--batch", str(tmp_path / "in"), "--to", ".vti", "-o", str(tmp_path / "out")]
+        assert vs.main(args) == 0
+        assert vs.main(args) == 0
+        assert "skipped 1 unchanged" in capsys.readouterr().out
+
+        data_file = tmp_path / "in" / f"a{data}"
+        stat = data_file.stat()
+        os.utime(data_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        assert vs.main(args) == 0
+        assert "Converted 1 files" in capsys.readouterr().out
+
+    @pytest.mark.parametrize("header, expected", [
+        ("ObjectType = Image\nElementDataFile = LOCAL\n", []),
+        ("ObjectType = Image\nElementDataFile = LIST\ns0.raw\ns1.raw\n", ["s0.raw", "s1.raw"]),
+        ("ObjectType = Image\nElementDataFile = s%d.raw 0 2 2\n", ["s0.raw", "s2.raw"]),
+    ])
+    def test_reads_element_data_file_forms(self, tmp_path, header, expected):
+        for name in ["s0.raw", "s1.raw", "s2.raw"]:
+            (tmp_path / name).write_bytes(b"")
+        (tmp_path / "a.mhd").write_text(header)
+        files = vs._source_files(tmp_path / "a.mhd")  # pylint: disable=protected-access
+        assert [p.name for p in files] == ["a.mhd", *expected]
+
+    def test_requires_two_paths_without_batch(self, tmp_path):
+        with pytest.raises(SystemExit):
+            vs.main([str(tmp_path / "a.vti")])